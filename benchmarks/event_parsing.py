@@ -0,0 +1,67 @@
+"""
+Parse time and peak memory of a StatsBomb events file, mplsoccer against the streaming reader
+
+    python benchmarks/event_parsing.py data/statsbomb/events/*.json
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import pandas as pd
+from mplsoccer import Sblocal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "webapp"))
+from analysis import event_stream
+
+PARSERS = {
+    "mplsoccer": lambda path: Sblocal().event(path)[0],
+    "event_stream": event_stream.read_events,
+}
+
+def measure(parse, path: str, repeat: int) -> dict:
+    """
+    Best parse time, then peak traced memory and size of the frame on a separate run
+
+    Returns:
+        dict: seconds, peak_mb, frame_mb, columns
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(path)
+        best = min(best, time.perf_counter() - start)
+
+    #tracing slows the parse down, memory is measured apart
+    tracemalloc.start()
+    df = parse(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"seconds": best, "peak_mb": peak / 2**20,
+            "frame_mb": df.memory_usage(deep=True).sum() / 2**20, "columns": df.shape[1]}
+
+def run(paths: list, repeat: int = 3) -> list:
+    """
+    Measure every parser on every file
+
+    Returns:
+        list: one record per parser and file
+    """
+    results = []
+    for path in paths:
+        for name, parse in PARSERS.items():
+            results.append({"file": os.path.basename(path), "file_mb": os.path.getsize(path) / 2**20,
+                            "parser": name, **measure(parse, path, repeat)})
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="StatsBomb events JSON files")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = pd.DataFrame(run(args.paths, args.repeat))
+    print(results.round(3).to_string(index=False))
+    print()
+    print(results.groupby("parser")[["seconds", "peak_mb", "frame_mb"]].mean().round(3).to_string())
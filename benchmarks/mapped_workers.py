@@ -0,0 +1,95 @@
+"""
+Memory of several server processes holding the events of every match of a season, mapped against parsed from parquet
+
+Each worker loads every match with stat_match and reads every column, then all workers hold their matches
+together while their proportional set size (PSS, shared pages split between the processes that map them) is read
+from /proc. With mapped events the total stays about flat as workers are added. The start time is the load of
+every match by a worker once the files exist.
+
+    python benchmarks/mapped_workers.py
+    python benchmarks/mapped_workers.py --competition 43 --season 106 --workers 1 2 4 8
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+import pandas as pd
+
+WEBAPP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "webapp")
+
+def memory() -> dict:
+    """
+    Proportional and private kilobytes of this process, Linux only
+    """
+    fields = {}
+    with open("/proc/self/smaps_rollup") as file:
+        for line in file:
+            name, _, value = line.partition(":")
+            if name in ("Pss", "Private_Clean", "Private_Dirty"):
+                fields[name] = int(value.split()[0])
+
+    return {"pss_kb": fields["Pss"], "private_kb": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+def worker(competition_id: int, season_id: int, mapped: bool, barrier, results):
+    """
+    Every match of a season loaded and read, memory taken while every worker holds its matches
+    """
+    os.environ["SOCCER_DATA_MAPPED"] = "1" if mapped else "0"
+    sys.path.insert(0, WEBAPP)
+    from analysis import store
+    from analysis import stats_match
+
+    match_ids = store.load_matches(competition_id, season_id).match_id
+    before = memory()
+    start = time.perf_counter()
+    matches = [stats_match.stat_match(match_id, competition_id, season_id) for match_id in match_ids]
+    for match in matches:
+        for column in match.df_event.columns:
+            match.df_event[column].to_numpy()
+    seconds = time.perf_counter() - start
+
+    barrier.wait()
+    after = memory()
+    results.put({"matches": len(matches), "seconds": seconds,
+                 "pss_kb": after["pss_kb"] - before["pss_kb"], "private_kb": after["private_kb"] - before["private_kb"]})
+    barrier.wait()
+
+def run(competition_id: int, season_id: int, mapped: bool, workers: int) -> dict:
+    """
+    Workers started together, their memory summed
+
+    Returns:
+        dict: matches, mean start seconds, total PSS and private kilobytes
+    """
+    context = multiprocessing.get_context("spawn")
+    barrier, results = context.Barrier(workers), context.Queue()
+    processes = [context.Process(target=worker, args=(competition_id, season_id, mapped, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    records = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    return {"mapped": mapped, "workers": workers, "matches": records[0]["matches"],
+            "start_s": sum(record["seconds"] for record in records) / workers,
+            "pss_mb": sum(record["pss_kb"] for record in records) / 1024,
+            "private_mb": sum(record["private_kb"] for record in records) / 1024}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--competition", type=int, default=43)
+    parser.add_argument("--season", type=int, default=106)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--output", default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    #mapped files written once before timing
+    run(args.competition, args.season, True, 1)
+    results = [run(args.competition, args.season, mapped, workers) for mapped in (False, True) for workers in args.workers]
+
+    print(pd.DataFrame(results).round(3).to_string(index=False))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"competition": args.competition, "season": args.season, "results": results}, file, indent=1)
@@ -0,0 +1,108 @@
+"""
+Figure-build time of the analysis charts as shot and pass counts grow
+
+    python benchmarks/rendering.py
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "webapp"))
+from analysis import visuals
+
+TEAMS = np.array(["Argentina", "France"])
+COLORS = ['#3e5eeb', '#ff3131']
+
+def synthetic_shots(n: int, seed: int = 0) -> pd.core.frame.DataFrame:
+    """
+    Shots of a whole tournament, StatsBomb coordinates
+
+    Args:
+        n (int): number of shots
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        pd.core.frame.DataFrame: shots as stat_match.get_shots_compact
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "x": rng.uniform(80, 119, n), "y": rng.uniform(10, 70, n),
+        "end_x": np.full(n, 120.), "end_y": rng.uniform(36, 44, n),
+        "outcome_name": np.where(rng.random(n) < 0.1, "Goal", "Saved"),
+        "shot_statsbomb_xg": rng.uniform(0.01, 0.8, n),
+        "player_name": [f"Player {i % 40}" for i in range(n)],
+        "team_name": TEAMS[rng.integers(0, 2, n)],
+    })
+
+def synthetic_network(players: int, seed: int = 0) -> tuple:
+    """
+    Passing network where every pair of players is linked
+
+    Args:
+        players (int): number of players
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        tuple: position, line as stat_match.get_passing_network
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array([f"Name{i:03d}" for i in range(players)])
+    scatter_df = pd.DataFrame({"player_name": names, "x": rng.uniform(0, 120, players),
+                               "y": rng.uniform(0, 80, players), "no": rng.integers(1, 80, players).astype(float)})
+    scatter_df["marker_size"] = scatter_df["no"] / scatter_df["no"].max() * 1500
+    i, j = np.triu_indices(players, 1)
+    lines_df = pd.DataFrame({"pair_key": [f"{a}_{b}" for a, b in zip(names[i], names[j])],
+                             "pass_count": rng.integers(3, 40, len(i))})
+    return scatter_df, lines_df
+
+def timed(build, repeat: int) -> float:
+    """
+    Best build plus draw time in seconds
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = build()
+        fig.canvas.draw()
+        best = min(best, time.perf_counter() - start)
+        plt.close(fig)
+    return best
+
+def run(shot_counts: list, player_counts: list, repeat: int = 3) -> list:
+    """
+    Time every chart at each size
+
+    Returns:
+        list: one record per chart and size
+    """
+    results = []
+    for n in shot_counts:
+        shots = synthetic_shots(n)
+        charts = {
+            "display_shots_separate_pitch": lambda: visuals.display_shots_separate_pitch(shots, TEAMS, COLORS),
+            "display_shots_same_pitch": lambda: visuals.display_shots_same_pitch(shots, TEAMS, COLORS),
+            "display_shots_one_team": lambda: visuals.display_shots_one_team(shots, TEAMS[0], COLORS[0]),
+        }
+        for chart, build in charts.items():
+            results.append({"chart": chart, "shots": n, "seconds": timed(build, repeat)})
+    for players in player_counts:
+        scatter_df, lines_df = synthetic_network(players)
+        seconds = timed(lambda: visuals.display_passing_network(scatter_df, lines_df, TEAMS[0], COLORS[0]), repeat)
+        results.append({"chart": "display_passing_network", "players": players, "lines": len(lines_df), "seconds": seconds})
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shots", type=int, nargs="+", default=[25, 250, 1700, 10000])
+    parser.add_argument("--players", type=int, nargs="+", default=[11, 16, 30, 60])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = pd.DataFrame(run(args.shots, args.players, args.repeat)).convert_dtypes()
+    print(results.astype(object).where(results.notna(), "").to_string(index=False))
@@ -0,0 +1,117 @@
+"""
+Grid index against brute force for the close_players and triangle counts, with the crossover point
+
+Two layouts: grid points against one shared defence of growing size (the xG surface case),
+and one shot per freeze frame against frames of growing size (scoring seasons of 360 data).
+Index times include building the index.
+
+    python benchmarks/spatial_index.py
+    python benchmarks/spatial_index.py --players 11 22 50 100 200 500 1000 --queries 5040 --frames 20000
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "webapp"))
+from simulator import spatial
+from simulator import features
+
+def brute_force(points: np.ndarray, players: np.ndarray, radius: float = 3.) -> tuple:
+    """
+    Every player tested against every point, as features.batch_features does
+
+    Returns:
+        tuple: players within radius (N,), players inside the triangle (N,)
+    """
+    players = np.broadcast_to(players, (len(points),) + players.shape[-2:])
+    xp, yp = players[:, :, 0], players[:, :, 1]
+    xs, ys = points[:, :1], points[:, 1:]
+    close = (((xs - xp)**2 + (ys - yp)**2) < radius**2).sum(axis=1)
+
+    x1, y1 = features.GOAL_X, features.GOAL_Y - features.GOAL_WIDTH/2
+    x2, y2 = features.GOAL_X, features.GOAL_Y + features.GOAL_WIDTH/2
+    c1 = (x2-x1)*(yp-y1)-(y2-y1)*(xp-x1)
+    c2 = (xs-x2)*(yp-y2)-(ys-y2)*(xp-x2)
+    c3 = (x1-xs)*(yp-ys)-(y1-ys)*(xp-xs)
+    triangle = (((c1<0) & (c2<0) & (c3<0)) | ((c1>0) & (c2>0) & (c3>0))).sum(axis=1)
+
+    return close, triangle
+
+def best(call, repeat: int) -> float:
+    """
+    Best time of a call in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def shared_case(players: int, queries: int, rng: np.random.Generator, repeat: int) -> dict:
+    """
+    Grid points of the attacking half against one defence
+    """
+    defence = rng.uniform([52.5, 0], [105, 68], (players, 2))
+    points = rng.uniform([52.5, 0], [105, 68], (queries, 2))
+
+    def index():
+        grid = spatial.PlayerIndex(defence)
+        return grid.count_within(points), grid.count_in_triangle(points)
+
+    assert all((a == b).all() for a, b in zip(index(), brute_force(points, defence)))
+    return {"layout": "shared", "players": players, "queries": queries,
+            "brute_ms": best(lambda: brute_force(points, defence), repeat) * 1e3, "index_ms": best(index, repeat) * 1e3}
+
+def frames_case(players: int, frames: int, rng: np.random.Generator, repeat: int) -> dict:
+    """
+    One shot per freeze frame, frames NaN padded to the same size as batch_features takes them
+    """
+    positions = rng.uniform([60, 0], [105, 68], (frames, players, 2))
+    positions[rng.random((frames, players)) < 0.2] = np.nan
+    shots = rng.uniform([70, 10], [105, 58], (frames, 2))
+    owner = np.repeat(np.arange(frames), players)
+    queries = np.arange(frames)
+
+    def index():
+        grid = spatial.PlayerIndex(positions.reshape(-1, 2), owner)
+        return grid.count_within(shots, frames=queries), grid.count_in_triangle(shots, frames=queries)
+
+    assert all((a == b).all() for a, b in zip(index(), brute_force(shots, positions)))
+    return {"layout": "frames", "players": players, "queries": frames,
+            "brute_ms": best(lambda: brute_force(shots, positions), repeat) * 1e3, "index_ms": best(index, repeat) * 1e3}
+
+def crossover(df: pd.core.frame.DataFrame) -> dict:
+    """
+    Fewest players from which the index is faster, per layout
+    """
+    faster = df.loc[df.index_ms < df.brute_ms]
+    return {layout: (int(faster.loc[faster.layout == layout, "players"].min()) if (faster.layout == layout).any() else None)
+            for layout in df.layout.unique()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[5, 11, 22, 50, 100, 200, 500, 1000])
+    parser.add_argument("--queries", type=int, default=70 * 72, help="grid points of the shared layout")
+    parser.add_argument("--frames", type=int, default=20000, help="freeze frames of the frames layout")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = [shared_case(players, args.queries, rng, args.repeat) for players in args.players]
+    results += [frames_case(players, args.frames, rng, args.repeat) for players in args.players if players <= 100]
+    df = pd.DataFrame(results)
+    df["speedup"] = df.brute_ms / df.index_ms
+
+    print(df.round(2).to_string(index=False))
+    for layout, players in crossover(df).items():
+        print(f"{layout}: index faster from {players} players" if players else f"{layout}: brute force faster at every size")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"results": results, "crossover": crossover(df)}, file, indent=1)
@@ -0,0 +1,302 @@
+"""
+Benchmark suite of the analysis, simulator and rendering hot paths, offline
+
+Runs on a synthetic match, or on the first match of local StatsBomb files with --fixtures.
+Results are written as JSON and compared with a stored baseline, the exit code is 1 when a
+case is slower than the baseline by more than the tolerance.
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --fixtures data/statsbomb --output results.json
+    python benchmarks/suite.py --save-baseline
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import atexit
+import platform
+import tempfile
+import argparse
+import warnings
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+
+#every load stays on this machine
+STORE = tempfile.mkdtemp(prefix="soccer-data-bench-")
+atexit.register(shutil.rmtree, STORE, ignore_errors=True)
+os.environ["SOCCER_DATA_OFFLINE"] = "1"
+os.environ["SOCCER_DATA_STORE"] = STORE
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_PATH, "..", "webapp"))
+from analysis import store
+from analysis import stats_match
+from analysis import outcome
+from analysis import visuals as analysis_visuals
+from simulator import xG
+from simulator import features
+from simulator import visuals as simulator_visuals
+from rendering import timed as timed_figure
+
+BASELINE_PATH = os.path.join(BENCHMARKS_PATH, "baseline.json")
+COMPETITION_ID, SEASON_ID = 43, 106
+SYNTHETIC_MATCH_ID = 1
+#arguments of the stat_match accessors, the others are called without arguments
+ACCESSOR_ARGS = {
+    "get_passing_network": [(), (0, 45), (60, 91)],
+    "get_passing_network_segment": [(0,), (1,)],
+    "get_event_density": [(0,), (1,)],
+}
+TYPES = ["Pass", "Ball Receipt", "Carry", "Pressure", "Duel", "Foul Committed", "Dribble", "Interception", "Shot"]
+TYPE_WEIGHTS = [0.5, 0.15, 0.15, 0.04, 0.05, 0.04, 0.04, 0.02, 0.01]
+
+def synthetic_events(teams: tuple = ("Argentina", "France"), per_minute: int = 35, seed: int = 0) -> pd.core.frame.DataFrame:
+    """
+    Events of a 90 minute match in the layout of store.load_events, one substitution per team
+
+    Args:
+        teams (tuple, optional): team names. Defaults to ("Argentina", "France").
+        per_minute (int, optional): events per minute. Defaults to 35.
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        pd.core.frame.DataFrame: events of the match
+    """
+    rng = np.random.default_rng(seed)
+    n = 90 * per_minute
+    minute = np.sort(rng.integers(0, 90, n))
+    team = rng.integers(0, 2, n)
+    squads = np.array([[f"{name} Player{i:02d}" for i in range(16)] for name in teams])
+    type_name = rng.choice(TYPES, n, p=TYPE_WEIGHTS).astype(object)
+    is_pass, is_shot = type_name == "Pass", type_name == "Shot"
+    #one substitution per team after the hour
+    for k in range(2):
+        type_name[np.flatnonzero((minute >= 60 + 10 * k) & (team == k))[0]] = "Substitution"
+
+    outcome_name = np.full(n, None, dtype=object)
+    outcome_name[is_pass & (rng.random(n) < 0.15)] = "Incomplete"
+    outcome_name[is_shot] = rng.choice(["Goal", "Saved", "Off T", "Blocked"], is_shot.sum(), p=[0.15, 0.35, 0.3, 0.2])
+    sub_type_name = np.full(n, None, dtype=object)
+    sub_type_name[is_pass & (rng.random(n) < 0.05)] = "Throw-in"
+    player_name = squads[team, rng.integers(0, 11, n)].astype(object)
+    recipient = np.where(is_pass, squads[team, rng.integers(0, 11, n)], None)
+    has_end = is_pass | is_shot | (type_name == "Carry")
+
+    return pd.DataFrame({
+        "index": np.arange(1, n + 1), "period": np.where(minute < 45, 1, 2), "minute": minute,
+        "second": rng.integers(0, 60, n), "type_name": type_name, "team_name": np.array(teams, dtype=object)[team],
+        "player_name": player_name, "pass_recipient_name": recipient,
+        "x": np.where(is_shot, rng.uniform(95, 119, n), rng.uniform(0, 120, n)).round(1),
+        "y": np.where(is_shot, rng.uniform(20, 60, n), rng.uniform(0, 80, n)).round(1),
+        "end_x": np.where(has_end, np.where(is_shot, 120., rng.uniform(0, 120, n)), np.nan),
+        "end_y": np.where(has_end, rng.uniform(0, 80, n), np.nan),
+        "outcome_name": outcome_name, "sub_type_name": sub_type_name,
+        "shot_statsbomb_xg": np.where(is_shot, rng.uniform(0.01, 0.7, n), np.nan),
+    })
+
+def prepare_match(fixtures_path: str = None) -> int:
+    """
+    Fill the temporary store with the benchmarked match
+
+    Args:
+        fixtures_path (str, optional): StatsBomb open-data directory. Defaults to None, synthetic match.
+
+    Returns:
+        int: match id
+    """
+    if fixtures_path is None:
+        store.save(synthetic_events(), store.event_path(COMPETITION_ID, SEASON_ID, SYNTHETIC_MATCH_ID))
+        return SYNTHETIC_MATCH_ID
+
+    store.seed(COMPETITION_ID, SEASON_ID, fixtures_path)
+    return int(store.load_matches(COMPETITION_ID, SEASON_ID).match_id.iloc[0])
+
+def synthetic_situations(n: int, defenders: int = 4, seed: int = 0) -> tuple:
+    """
+    Shots and their defence on the simulator pitch (105x68)
+
+    Args:
+        n (int): number of shots
+        defenders (int, optional): defenders besides the goalkeeper. Defaults to 4.
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        tuple: shot frame with id, track frame with id
+    """
+    rng = np.random.default_rng(seed)
+    shot_df = pd.DataFrame({"id": np.arange(n), "x": rng.uniform(80, 104, n), "y": rng.uniform(15, 53, n),
+                            "body_part_name": np.where(rng.random(n) < 0.2, "Head", "Foot")})
+    m = defenders + 1
+    track_df = pd.DataFrame({"id": np.repeat(np.arange(n), m),
+                             "x": np.where(np.tile(np.arange(m), n) == 0, rng.uniform(100, 105, n * m), rng.uniform(85, 105, n * m)),
+                             "y": rng.uniform(20, 48, n * m),
+                             "position_name": np.tile(["Goalkeeper"] + ["Defender"] * defenders, n)})
+    return shot_df, track_df
+
+#fast cases are repeated until they ran this long, their best time is then stable
+MIN_TIME = 0.2
+MAX_REPEAT = 200
+
+def timed(call, repeat: int, setup=None) -> dict:
+    """
+    Best and median time of a call in seconds, setup runs before each call and is not timed
+    """
+    times = []
+    while len(times) < repeat or (sum(times) < MIN_TIME and len(times) < MAX_REPEAT):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        call(argument) if setup is not None else call()
+        times.append(time.perf_counter() - start)
+    return {"seconds": min(times), "median": float(np.median(times)), "repeat": len(times)}
+
+def bench_stat_match(match_id: int, repeat: int) -> list:
+    """
+    stat_match construction and each accessor on a fresh match, the accessors are memoized
+    """
+    new_match = lambda: stats_match.stat_match(match_id, COMPETITION_ID, SEASON_ID)
+    results = [{"name": "stat_match.__init__", **timed(new_match, repeat)}]
+    accessors = sorted(name for name in dir(stats_match.stat_match) if name.startswith("get_"))
+    for name in accessors:
+        for args in ACCESSOR_ARGS.get(name, [()]):
+            label = f"stat_match.{name}({', '.join(map(str, args))})"
+            results.append({"name": label, **timed(lambda match: getattr(match, name)(*args), repeat, new_match)})
+    return results
+
+def bench_xG(batch_sizes: list, loop_limit: int, repeat: int) -> list:
+    """
+    Per-shot and batched model variables, then predictions, at each batch size
+    """
+    results = []
+    for n in batch_sizes:
+        shot_df, track_df = synthetic_situations(n)
+        if n <= loop_limit:
+            shots = [shot_df.iloc[[i]] for i in range(n)]
+            tracks = [df for _, df in track_df.groupby("id")]
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                loop = lambda: [xG.get_model_vars(shot, track) for shot, track in zip(shots, tracks)]
+                results.append({"name": "xG.get_model_vars", "size": n, **timed(loop, repeat)})
+        results.append({"name": "features.get_batch_model_vars", "size": n,
+                        **timed(lambda: features.get_batch_model_vars(shot_df, track_df), repeat)})
+
+        X = features.get_batch_model_vars(shot_df, track_df)[features.FEATURES].to_numpy()
+        if n == 1:
+            results.append({"name": "xG.prediction", "size": n, **timed(lambda: xG.prediction(X), repeat)})
+        results.append({"name": "xG.predictions", "size": n, **timed(lambda: xG.predictions(X), repeat)})
+    return results
+
+def bench_outcome(match_id: int, repeat: int) -> list:
+    """
+    Monte Carlo replays of one match from its shot xG
+    """
+    match = stats_match.stat_match(match_id, COMPETITION_ID, SEASON_ID)
+    xG_df = match.get_xG()
+    return [{"name": "outcome.simulate_match", "size": outcome.REPLAYS,
+             **timed(lambda: outcome.simulate_match(xG_df, match.teams), repeat)}]
+
+def bench_figures(match_id: int, repeat: int) -> list:
+    """
+    Build and draw time of every figure of both pages
+    """
+    match = stats_match.stat_match(match_id, COMPETITION_ID, SEASON_ID)
+    teams, colors = match.teams, match.colors
+    scatter_df, lines_df = match.get_passing_network()
+    shot_df, track_df = synthetic_situations(1)
+    shot_df, track_df = shot_df.drop(columns="id"), track_df.drop(columns="id")
+    xG.xG_surface(track_df)
+    figures = {
+        "analysis.display_events": lambda: analysis_visuals.display_events(match.get_events()[0], match.cmap[0]),
+        "analysis.display_passing_network": lambda: analysis_visuals.display_passing_network(scatter_df[0], lines_df[0], teams[0], colors[0]),
+        "analysis.display_shots_separate_pitch": lambda: analysis_visuals.display_shots_separate_pitch(match.get_shots_compact(), teams, colors),
+        "analysis.display_statistics": lambda: analysis_visuals.display_statistics(match.get_statistics(), teams, colors),
+        "analysis.display_shots_same_pitch": lambda: analysis_visuals.display_shots_same_pitch(match.get_shots_compact(), teams, colors),
+        "analysis.display_shots_one_team": lambda: analysis_visuals.display_shots_one_team(match.get_shots_compact(), teams[0], colors[0]),
+        "analysis.display_xG": lambda: analysis_visuals.display_xG(match.get_xG(), teams, colors),
+        "analysis.display_outcome": lambda: analysis_visuals.display_outcome(*outcome.simulate_match(match.get_xG(), teams), teams, colors),
+        "analysis.display_momentum": lambda: analysis_visuals.display_momentum(match.get_timeline().momentum(), teams, colors, (60, 75)),
+        "simulator.display_state": lambda: simulator_visuals.display_state(shot_df, track_df),
+        "simulator.display_state(surface)": lambda: simulator_visuals.display_state(shot_df, track_df, xG.xG_surface(track_df)),
+    }
+    return [{"name": name, "seconds": timed_figure(build, repeat), "repeat": repeat} for name, build in figures.items()]
+
+def run(fixtures_path: str = None, batch_sizes: list = (1, 100, 10000), loop_limit: int = 100, repeat: int = 5) -> dict:
+    """
+    Every benchmark case
+
+    Returns:
+        dict: metadata and one record per case
+    """
+    match_id = prepare_match(fixtures_path)
+    results = bench_stat_match(match_id, repeat) + bench_xG(batch_sizes, loop_limit, repeat) + bench_outcome(match_id, repeat) + bench_figures(match_id, repeat)
+    meta = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "data": fixtures_path or "synthetic", "match_id": match_id,
+        "python": platform.python_version(), "machine": platform.machine(), "processor": platform.processor(),
+        "numpy": np.__version__, "pandas": pd.__version__, "matplotlib": matplotlib.__version__,
+        "xg_backend": xG.BACKEND,
+    }
+    return {"meta": meta, "results": results}
+
+def case_key(result: dict) -> str:
+    """
+    Identity of a case across runs
+    """
+    return result["name"] if "size" not in result else f"{result['name']}[{result['size']}]"
+
+def compare(report: dict, baseline: dict, tolerance: float, min_delta: float = 0.001) -> pd.core.frame.DataFrame:
+    """
+    Time of each case against the baseline
+
+    Args:
+        report (dict): output of run
+        baseline (dict): stored output of run
+        tolerance (float): allowed slowdown, 0.25 is 25% slower
+        min_delta (float, optional): slowdowns under this many seconds are noise. Defaults to 0.001.
+
+    Returns:
+        pd.core.frame.DataFrame: one row per case in milliseconds, ratio to the baseline and regression flag
+    """
+    reference = {case_key(result): result["seconds"] * 1e3 for result in baseline["results"]}
+    df = pd.DataFrame({"case": [case_key(result) for result in report["results"]],
+                       "ms": [result["seconds"] * 1e3 for result in report["results"]]})
+    df["baseline_ms"] = df["case"].map(reference)
+    df["ratio"] = df["ms"] / df["baseline_ms"]
+    df["regression"] = (df["ratio"] > 1 + tolerance) & (df["ms"] - df["baseline_ms"] > min_delta * 1e3)
+
+    return df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=None, help="StatsBomb open-data directory, synthetic match otherwise")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--loop-limit", type=int, default=100, help="largest batch timed with the per-shot functions")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=os.path.join(BENCHMARKS_PATH, "results.json"))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta", type=float, default=0.001, help="seconds, smaller slowdowns are ignored")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    args = parser.parse_args()
+
+    report = run(args.fixtures, args.batch_sizes, args.loop_limit, args.repeat)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=1)
+        print(f"baseline saved to {args.baseline}")
+
+    baseline = report
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    df = compare(report, baseline, args.tolerance, args.min_delta)
+    print(df.round(3).astype(object).where(df.notna(), "").to_string(index=False))
+    print(f"results written to {args.output}")
+    if df["regression"].any():
+        print(f"{df['regression'].sum()} cases slower than the baseline by more than {args.tolerance:.0%}")
+        sys.exit(1)
@@ -0,0 +1,78 @@
+"""
+Speedup of the knockout tournament simulator with the number of worker processes, on a synthetic bracket
+
+Every worker count plays the same chunks with the same seeds, the probabilities must be identical.
+
+    python benchmarks/tournament_scaling.py
+    python benchmarks/tournament_scaling.py --teams 32 --simulations 2000000 --workers 1 2 4 8
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "webapp"))
+from analysis import tournament
+
+def synthetic_bracket(teams: int = 16, seed: int = 0) -> tuple:
+    """
+    Bracket of teams in seeding order and random team rates
+
+    Returns:
+        tuple: stages, fixtures, feeders, rates as from tournament.bracket and tournament.team_rates
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array([f"Team {i:02d}" for i in range(teams)])
+    rounds = int(np.log2(teams))
+    stages = [f"Last {teams >> stage}" for stage in range(rounds)]
+    fixtures = names.reshape(-1, 2)
+    feeders = [np.arange(teams >> stage).reshape(-1, 2) for stage in range(1, rounds)]
+    rates = pd.DataFrame({"matches": 3, "xG_for": rng.uniform(0.6, 2.2, teams), "xG_against": rng.uniform(0.6, 2.2, teams)},
+                         index=pd.Index(names, name="team_name"))
+
+    return stages, fixtures, feeders, rates
+
+def run(teams: int, simulations: int, workers: list, chunk: int, repeat: int) -> list:
+    """
+    Best time of each worker count and its speedup over one worker
+
+    Returns:
+        list: one record per worker count
+    """
+    stages, fixtures, feeders, rates = synthetic_bracket(teams)
+    results, reference = [], None
+    for count in workers:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            df = tournament.simulate(stages, fixtures, feeders, rates, simulations, workers=count, chunk=chunk)
+            best = min(best, time.perf_counter() - start)
+        if reference is None:
+            reference = df
+        results.append({"workers": count, "seconds": best, "identical": bool(df.equals(reference))})
+
+    for result in results:
+        result["speedup"] = results[0]["seconds"] / result["seconds"]
+        result["efficiency"] = result["speedup"] * results[0]["workers"] / result["workers"]
+    return results
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=16, help="teams of the bracket, a power of two")
+    parser.add_argument("--simulations", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, *[2**i for i in range(1, 8) if 2**i <= cores], cores}))
+    parser.add_argument("--chunk", type=int, default=tournament.CHUNK)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    results = run(args.teams, args.simulations, args.workers, args.chunk, args.repeat)
+    print(f"{args.simulations} tournaments of {args.teams} teams, {cores} cores")
+    print(pd.DataFrame(results).round(3).to_string(index=False))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"teams": args.teams, "simulations": args.simulations, "cores": cores, "results": results}, file, indent=1)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+#the app imports its modules from webapp/, as when launched with streamlit
+sys.path.insert(0, os.path.join(ROOT, "webapp"))
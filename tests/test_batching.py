@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+from simulator import batching
+
+def test_requests_resolve_in_batches():
+    service = batching.PredictionService(lambda X: X.sum(axis=1), max_wait=0.05)
+    futures = [service.submit(np.full((rows, 9), rows)) for rows in (1, 2, 3)]
+    service.close()
+
+    assert [future.result(timeout=1).tolist() for future in futures] == [[9.], [18., 18.], [27., 27., 27.]]
+    assert service.requests == 3
+
+def test_submit_after_close_raises():
+    service = batching.PredictionService(lambda X: X.sum(axis=1))
+    service.close()
+
+    with pytest.raises(RuntimeError):
+        service.submit(np.zeros(9))
+    service.close()
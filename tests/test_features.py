@@ -0,0 +1,51 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from simulator import xG
+from simulator import features
+
+def random_situations(n: int, seed: int) -> tuple:
+    """
+    Shots with freeze frames of random size, a goalkeeper in each and some players without a position
+    """
+    rng = np.random.default_rng(seed)
+    shot = pd.DataFrame({"id": np.arange(n) + 100, "x": rng.uniform(70, 105, n), "y": rng.uniform(10, 58, n),
+                         "body_part_name": np.where(rng.random(n) < 0.3, "Head", "Right Foot")})
+    #shooters on the goal line and on a post
+    shot.loc[0, ["x", "y"]] = [105, 20]
+    shot.loc[1, ["x", "y"]] = [105, 34 - 7.32/2]
+    frames = []
+    for shot_id, x, y in zip(shot.id, shot.x, shot.y):
+        size = rng.integers(0, 10)
+        position = np.where(np.arange(size + 1) == 0, "Goalkeeper", "Center Back")
+        frame = pd.DataFrame({"id": shot_id, "x": rng.uniform(x - 10, 105, size + 1), "y": rng.uniform(y - 5, y + 5, size + 1),
+                              "position_name": rng.permutation(position)})
+        frame.loc[rng.random(size + 1) < 0.15, ["x", "y"]] = np.nan
+        frames.append(frame)
+
+    return shot, pd.concat(frames, ignore_index=True)
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batch_matches_per_shot(seed):
+    shot, track = random_situations(40, seed)
+    batch = features.get_batch_model_vars(shot, track)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        single = pd.concat([xG.get_model_vars(shot.loc[[i]], track.loc[track.id == shot_id])
+                            for i, shot_id in zip(shot.index, shot.id)])
+
+    np.testing.assert_allclose(batch.to_numpy(), single[features.FEATURES].to_numpy(dtype=float), equal_nan=True)
+
+def test_shared_defence_broadcasts():
+    shot, track = random_situations(5, 3)
+    frame = track.loc[track.id == shot.id[2]]
+    players, is_gk = frame[["x", "y"]].to_numpy(dtype=float), (frame.position_name == "Goalkeeper").to_numpy()
+    X = features.batch_features(shot[["x", "y"]].to_numpy(dtype=float), np.zeros(len(shot)), players, is_gk)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        single = pd.concat([xG.get_model_vars(shot.loc[[i]].assign(body_part_name="Right Foot"), frame) for i in shot.index])
+
+    np.testing.assert_allclose(X, single[features.FEATURES].to_numpy(dtype=float), equal_nan=True)
@@ -0,0 +1,59 @@
+import io
+import os
+import json
+import zipfile
+import numpy as np
+import pytest
+from simulator import inference
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+KERAS_PATH = os.path.join(ROOT, inference.KERAS_PATH)
+SCALER_PATH = os.path.join(ROOT, inference.SCALER_PATH)
+#largest gap allowed between the NumPy and the Keras predictions, float32 layers on both sides
+TOLERANCE = 1e-5
+
+def random_rows(scaler, n: int = 10000, seed: int = 0) -> np.ndarray:
+    """
+    Variables drawn around the training distribution
+    """
+    rng = np.random.default_rng(seed)
+    return rng.normal(scaler.mean_, scaler.scale_, size=(n, len(scaler.mean_)))
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory) -> str:
+    pytest.importorskip("h5py")
+    path = str(tmp_path_factory.mktemp("models") / "xG_predictor.npz")
+    inference.export(KERAS_PATH, SCALER_PATH, path)
+    return path
+
+def test_npz_round_trip(exported):
+    h5py = pytest.importorskip("h5py")
+    joblib = pytest.importorskip("joblib")
+    scaler = joblib.load(SCALER_PATH)
+    model = inference.NumpyModel(exported)
+
+    np.testing.assert_array_equal(model.mean, scaler.mean_)
+    np.testing.assert_array_equal(model.scale, scaler.scale_)
+    with zipfile.ZipFile(KERAS_PATH) as archive:
+        weights = h5py.File(io.BytesIO(archive.read("model.weights.h5")), "r")
+        config = json.loads(archive.read("config.json"))
+        kernels = [layer["config"]["name"] for layer in config["config"]["layers"] if layer["class_name"] == "Dense"]
+        assert len(model.layers) == len(kernels)
+        for (kernel, bias, _), name in zip(model.layers, kernels):
+            np.testing.assert_array_equal(kernel, weights[f"layers/{name}/vars/0"][()])
+            np.testing.assert_array_equal(bias, weights[f"layers/{name}/vars/1"][()])
+
+    X = random_rows(scaler, 100)
+    assert model.predict(X).shape == (100, 1)
+    assert ((model.predict(X) >= 0) & (model.predict(X) <= 1)).all()
+
+def test_parity_with_keras(exported):
+    joblib = pytest.importorskip("joblib")
+    #any Keras 3 backend, TensorFlow in the requirements
+    keras = pytest.importorskip("keras")
+    scaler = joblib.load(SCALER_PATH)
+    X = random_rows(scaler)
+
+    expected = keras.models.load_model(KERAS_PATH).predict(scaler.transform(X), verbose=0)
+
+    assert np.abs(inference.NumpyModel(exported).predict(X) - expected).max() <= TOLERANCE
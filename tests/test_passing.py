@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from analysis import passing
+
+#first half stoppage time (45', 46', 47') before the second half restarts at 45'
+MINUTES = [10, 20, 44, 45, 46, 47, 45, 46, 50, 60, 80]
+PERIODS = [1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2]
+PLAYERS = ["Ann Smith", "Bea Jones", "Cleo Brown"]
+
+def stoppage_passes(repeat: int = 1) -> pd.core.frame.DataFrame:
+    """
+    Successful passes in event order, every minute played repeat times
+    """
+    rng = np.random.default_rng(0)
+    minutes, periods = np.repeat(MINUTES, repeat), np.repeat(PERIODS, repeat)
+    passer = rng.integers(0, len(PLAYERS), len(minutes))
+    recipient = (passer + rng.integers(1, len(PLAYERS), len(minutes))) % len(PLAYERS)
+    return pd.DataFrame({
+        "x": rng.uniform(0, 120, len(minutes)), "y": rng.uniform(0, 80, len(minutes)),
+        "end_x": rng.uniform(0, 120, len(minutes)), "end_y": rng.uniform(0, 80, len(minutes)),
+        "period": periods, "minute": minutes,
+        "player_name": np.array(PLAYERS)[passer], "pass_recipient_name": np.array(PLAYERS)[recipient],
+    })
+
+def masked_network(df_pass: pd.core.frame.DataFrame, start: int, end: int) -> tuple:
+    """
+    Passes and pair counts of the passes selected by a plain minute mask
+    """
+    df = df_pass.loc[(df_pass.minute >= start) & (df_pass.minute < end)]
+    passer = df.player_name.str.split().str[-1]
+    recipient = df.pass_recipient_name.str.split().str[-1]
+    pairs = pd.Series(["_".join(sorted(pair)) for pair in zip(passer, recipient)], dtype=object).value_counts()
+
+    return passer.value_counts().sort_index(), pairs.loc[pairs > 2].sort_index()
+
+@pytest.mark.parametrize("start, end", [(0, 46), (46, 90), (47, 90), (45, 46), (0, 91), (44, 48), (50, 50)])
+def test_window_matches_minute_mask(start, end):
+    df_pass = stoppage_passes(repeat=3)
+    index = passing.PassingIndex(df_pass, np.arange(len(df_pass)), np.array([], dtype=np.int64))
+    expected_no, expected_pairs = masked_network(df_pass, start, end)
+
+    scatter_df, lines_df = index.network(index.window(start, end))
+
+    assert sum(last - first for first, last in index.window(start, end)) == expected_no.sum()
+    assert scatter_df.set_index("player_name")["no"].sort_index().to_dict() == expected_no.to_dict()
+    assert lines_df.set_index("pair_key")["pass_count"].to_dict() == expected_pairs.to_dict()
+
+def test_window_stoppage_time_counts():
+    df_pass = stoppage_passes()
+    index = passing.PassingIndex(df_pass, np.arange(len(df_pass)), np.array([], dtype=np.int64))
+
+    def passes(start, end):
+        return sum(last - first for first, last in index.window(start, end))
+
+    assert passes(0, 46) == 5
+    assert passes(46, 90) == 6
+    assert index.network(index.window(47, 90))[0]["no"].sum() == 4
+
+def test_players_in_order_of_first_pass():
+    df_pass = stoppage_passes(repeat=3)
+    index = passing.PassingIndex(df_pass, np.arange(len(df_pass)), np.array([], dtype=np.int64))
+    df = df_pass.loc[df_pass.minute >= 46]
+
+    scatter_df, _ = index.network(index.window(46, None))
+
+    assert scatter_df.player_name.tolist() == df.player_name.str.split().str[-1].unique().tolist()
+
+def test_segment_ends_at_substitution():
+    df_pass = stoppage_passes()
+    index = passing.PassingIndex(df_pass, np.arange(len(df_pass)), np.array([7]))
+
+    assert index.segment(0) == [(0, 7)]
+    assert index.network(index.segment(1))[0]["no"].sum() == len(df_pass) - 7
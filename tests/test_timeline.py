@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from analysis import timeline
+from test_passing import MINUTES, PERIODS
+
+TEAMS = ["Home", "Away"]
+
+def stoppage_events() -> tuple:
+    """
+    Shots and passes of both teams around the first half stoppage time, grouped as stat_match._rows
+    """
+    rng = np.random.default_rng(0)
+    minutes, periods = np.repeat(MINUTES, 4), np.repeat(PERIODS, 4)
+    team = np.array(TEAMS)[rng.integers(0, 2, len(minutes))]
+    action = np.where(rng.random(len(minutes)) < 0.5, "Shot", "Pass")
+    xG = np.where(action == "Shot", rng.uniform(0, 0.5, len(minutes)), np.nan)
+    rows = pd.DataFrame({"type_name": action, "team_name": team}).groupby(["type_name", "team_name"]).indices
+
+    return pd.DataFrame({"period": periods, "minute": minutes, "team_name": team, "type_name": action, "xG": xG}), rows
+
+@pytest.mark.parametrize("start, end", [(0, 46), (46, 90), (45, 46), (44, 48), (0, 91), (50, 50)])
+def test_window_matches_minute_mask(start, end):
+    df, rows = stoppage_events()
+    index = timeline.TimelineIndex(timeline.minute_table(df.period.to_numpy(), df.minute.to_numpy(), df.xG.to_numpy(), rows),
+                                   TEAMS, df.minute.max() + 1)
+    window = df.loc[(df.minute >= start) & (df.minute < end)]
+
+    counts = window.loc[window.type_name == "Pass"].team_name.value_counts().reindex(TEAMS, fill_value=0).to_numpy()
+    np.testing.assert_array_equal(index.count("Pass", start, end), counts)
+    np.testing.assert_allclose(index.xG_delta(start, end), window.groupby("team_name").xG.sum().reindex(TEAMS, fill_value=0).to_numpy())
+
+def test_momentum_follows_the_match_clock():
+    df, rows = stoppage_events()
+    index = timeline.TimelineIndex(timeline.minute_table(df.period.to_numpy(), df.minute.to_numpy(), df.xG.to_numpy(), rows),
+                                   TEAMS, df.minute.max() + 1)
+    xG = lambda period, minute: df.loc[(df.period == period) & (df.minute == minute)].groupby("team_name").xG.sum().reindex(TEAMS, fill_value=0).to_numpy()
+    momentum = lambda window: index.momentum(window).set_index(["period", "minute"]).loc[(2, 46), TEAMS].to_numpy(dtype=float)
+
+    #minute 45 of the second half only, not the first half one
+    np.testing.assert_allclose(momentum(1), xG(2, 45))
+    #then the first half stoppage time, the clock carries on from it
+    np.testing.assert_allclose(momentum(2), xG(2, 45) + xG(1, 47))
+    np.testing.assert_allclose(momentum(3), xG(2, 45) + xG(1, 47) + xG(1, 46))
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from analysis import tournament
+
+TEAMS = [f"Team {i}" for i in range(8)]
+
+class ShootoutMatch:
+
+    def __init__(self, winner: str):
+        self.winner = winner
+
+    def get_xG(self) -> pd.core.frame.DataFrame:
+        return pd.DataFrame({"period": [5, 5, 5], "result": ["Goal", "Goal", "Saved"],
+                             "team_name": [self.winner, self.winner, "other"]})
+
+def knockout(final_score: tuple = (None, None)) -> pd.core.frame.DataFrame:
+    """
+    Quarter-finals played, one semi-final played after a draw, the other semi-final and the final to play
+    """
+    rows = [("Quarter-finals", 0, 1, 2, 0), ("Quarter-finals", 2, 3, 1, 1), ("Quarter-finals", 4, 5, 0, 3), ("Quarter-finals", 6, 7, 1, 0),
+            ("Semi-finals", 0, 3, 2, 2), ("Semi-finals", 5, 6, None, None), ("Final", 3, 5, *final_score)]
+    return pd.DataFrame({
+        "match_id": np.arange(len(rows)), "competition_id": 43, "season_id": 106,
+        "match_date": ["2022-12-09", "2022-12-09", "2022-12-10", "2022-12-10", "2022-12-13", "2022-12-14", "2022-12-18"],
+        "competition_stage_name": [row[0] for row in rows],
+        "home_team_name": [TEAMS[row[1]] for row in rows], "away_team_name": [TEAMS[row[2]] for row in rows],
+        "home_score": [row[3] for row in rows], "away_score": [row[4] for row in rows],
+    })
+
+def test_played_matches_are_kept():
+    df_match = knockout()
+    stages, fixtures, feeders = tournament.bracket(df_match)
+    winners = tournament.results(df_match, stages, fixtures, feeders, load=lambda *key: ShootoutMatch(TEAMS[3]))
+    #the drawn quarter-final and semi-final are won by the team that played on
+    assert winners == [[TEAMS[0], TEAMS[3], TEAMS[5], TEAMS[6]], [TEAMS[3], None], [None]]
+
+    rates = pd.DataFrame({"matches": 1, "xG_for": 1.5, "xG_against": 1.5}, index=pd.Index(TEAMS, name="team_name"))
+    df = tournament.simulate(stages, fixtures, feeders, rates, 4000, workers=1, winners=winners)
+    assert df.loc[[TEAMS[0], TEAMS[3], TEAMS[5], TEAMS[6]], "Semi-finals"].eq(1).all()
+    assert df.loc[[TEAMS[1], TEAMS[2], TEAMS[4], TEAMS[7]], ["Semi-finals", "Final", "Winner"]].eq(0).all().all()
+    assert df.loc[TEAMS[3], "Final"] == 1 and df.loc[TEAMS[0], "Final"] == 0
+    assert 0 < df.loc[TEAMS[5], "Final"] < 1 and df.loc[TEAMS[5], "Final"] + df.loc[TEAMS[6], "Final"] == 1
+
+def test_drawn_final_goes_to_the_shootout():
+    df_match = knockout(final_score=(1, 1)).assign(home_score=lambda df: df.home_score.fillna(1), away_score=lambda df: df.away_score.fillna(0))
+    stages, fixtures, feeders = tournament.bracket(df_match)
+    winners = tournament.results(df_match, stages, fixtures, feeders, load=lambda *key: ShootoutMatch(TEAMS[5]))
+
+    assert winners[-1] == [TEAMS[5]]
+    rates = pd.DataFrame({"matches": 1, "xG_for": 1.5, "xG_against": 1.5}, index=pd.Index(TEAMS, name="team_name"))
+    df = tournament.simulate(stages, fixtures, feeders, rates, 1000, workers=1, winners=winners)
+    assert df.Winner.loc[TEAMS[5]] == 1 and df.Winner.sum() == 1
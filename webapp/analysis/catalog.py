@@ -0,0 +1,168 @@
+import os
+import glob
+import time
+import logging
+import numpy as np
+import pandas as pd
+from analysis import store
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['match_id', 'match_date', 'home_score', 'away_score', 'home_team_name', 'away_team_name',
+           'competition_stage_name', 'stadium_name', 'referee_name', 'competition_id', 'competition_name',
+           'season_id', 'season_name', 'last_updated', 'last_updated_360']
+CATEGORIES = ['home_team_name', 'away_team_name', 'competition_stage_name', 'stadium_name',
+              'referee_name', 'competition_name', 'season_name']
+
+#seconds a server keeps its catalog, and the catalog its competition and match lists, before fetching them again
+REFRESH_SECONDS = store.REFRESH_SECONDS
+
+def catalog_path() -> str:
+    """
+    Store path of the catalog
+
+    Returns:
+        str: parquet file path
+    """
+    return os.path.join(store.STORE_PATH, "catalog.parquet")
+
+class Catalog:
+
+    def __init__(self, df_match: pd.core.frame.DataFrame):
+        """
+        Matches of every competition with hash indexes on competition, season, stage, team and date
+
+        Args:
+            df_match (pd.core.frame.DataFrame): matches in COLUMNS layout
+        """
+        self.df_match = df_match.reset_index(drop=True)
+        self.df_match['teams'] = (self.df_match['home_team_name'].astype(str) + ' vs ' +
+                                  self.df_match['away_team_name'].astype(str))
+        self.indexes = {
+            'competition': self._index(self.df_match.competition_id),
+            'season': self._index(self.df_match.season_id),
+            'stage': self._index(self.df_match.competition_stage_name),
+            'date': self._index(self.df_match.match_date),
+        }
+        #a team plays home or away
+        home = self._index(self.df_match.home_team_name)
+        away = self._index(self.df_match.away_team_name)
+        empty = np.array([], dtype=np.intp)
+        self.indexes['team'] = {team: np.union1d(home.get(team, empty), away.get(team, empty))
+                                for team in home.keys() | away.keys()}
+
+    @staticmethod
+    def _index(column: pd.core.series.Series) -> dict:
+        """
+        Hash index of a column
+
+        Args:
+            column (pd.core.series.Series): indexed column
+
+        Returns:
+            dict: sorted row positions of each value
+        """
+        return column.groupby(column.to_numpy(), sort=False).indices
+
+    def rows(self, competition_id: int = None, season_id: int = None, stage: str = None,
+             team: str = None, date=None) -> np.ndarray:
+        """
+        Row positions matching every given key
+
+        Args:
+            competition_id (int, optional): competition id. Defaults to None.
+            season_id (int, optional): season id. Defaults to None.
+            stage (str, optional): competition stage name. Defaults to None.
+            team (str, optional): home or away team name. Defaults to None.
+            date (optional): match date. Defaults to None.
+
+        Returns:
+            np.ndarray: sorted row positions
+        """
+        keys = {'competition': competition_id, 'season': season_id, 'stage': stage, 'team': team,
+                'date': None if date is None else pd.Timestamp(date)}
+        rows = None
+        #smallest index first, the intersection only shrinks
+        for positions in sorted((self.indexes[name].get(key, np.array([], dtype=np.intp))
+                                 for name, key in keys.items() if key is not None), key=len):
+            rows = positions if rows is None else np.intersect1d(rows, positions, assume_unique=True)
+
+        return np.arange(len(self.df_match)) if rows is None else rows
+
+    def lookup(self, **keys) -> pd.core.frame.DataFrame:
+        """
+        Matches matching every given key, see rows
+
+        Returns:
+            pd.core.frame.DataFrame: information on each match
+        """
+        return self.df_match.iloc[self.rows(**keys)]
+
+    def competitions(self) -> pd.core.frame.DataFrame:
+        """
+        Competition seasons of the catalog
+
+        Returns:
+            pd.core.frame.DataFrame: competition and season ids and names
+        """
+        return (self.df_match[['competition_id', 'competition_name', 'season_id', 'season_name']]
+                .drop_duplicates().sort_values(['competition_name', 'season_name'], ignore_index=True))
+
+def build() -> pd.core.frame.DataFrame:
+    """
+    Matches of every competition season from the store, lists older than REFRESH_SECONDS are fetched again,
+    seasons that can't be loaded are skipped
+
+    Returns:
+        pd.core.frame.DataFrame: matches in COLUMNS layout
+    """
+    try:
+        df_competition = store.load_competitions(REFRESH_SECONDS)
+    except Exception as error:
+        logger.warning("no competitions: %s", error)
+        df_competition = pd.DataFrame(columns=['competition_id', 'season_id'])
+    frames = []
+    for competition_id, season_id in df_competition[['competition_id', 'season_id']].itertuples(index=False):
+        try:
+            frames.append(store.load_matches(competition_id, season_id, REFRESH_SECONDS).reindex(columns=COLUMNS))
+        except Exception as error:
+            logger.warning("competition %s season %s skipped: %s", competition_id, season_id, error)
+
+    df_match = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+    #compact layout
+    df_match[CATEGORIES] = df_match[CATEGORIES].astype('category')
+    df_match[['match_id', 'competition_id', 'season_id']] = df_match[['match_id', 'competition_id', 'season_id']].astype(np.int32)
+    df_match[['home_score', 'away_score']] = df_match[['home_score', 'away_score']].astype('Int8')
+
+    return df_match
+
+def _store_time() -> float:
+    """
+    Last modification of the competition and match frames of the store, 0 when there are none
+    """
+    paths = [store.competition_path()] + glob.glob(os.path.join(store.STORE_PATH, "*", "*", "matches.parquet"))
+
+    return max((os.path.getmtime(path) for path in paths if os.path.exists(path)), default=0.)
+
+def load(refresh: bool = False) -> Catalog:
+    """
+    Catalog read from the store, built again when a competition or match frame of the store is newer
+    or after REFRESH_SECONDS, the build then fetches the expired lists so that new matches show up
+
+    Args:
+        refresh (bool, optional): rebuild from the competition seasons. Defaults to False.
+
+    Returns:
+        Catalog: indexed matches
+    """
+    path = catalog_path()
+    if (os.path.exists(path) and not refresh and os.path.getmtime(path) >= _store_time() and
+            time.time() - os.path.getmtime(path) < REFRESH_SECONDS):
+        return Catalog(pd.read_parquet(path))
+
+    df_match = build()
+    #an empty catalog is not kept, the next load tries the store again
+    if len(df_match):
+        store.save(df_match, path)
+
+    return Catalog(df_match)
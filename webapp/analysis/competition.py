@@ -1,16 +1,19 @@
-from mplsoccer import Sbopen
 import pandas as pd
+from analysis import store
 
-def get_competition() -> pd.core.frame.DataFrame:
+def get_competition(competition_id: int = 43, season_id: int = 106, max_age: float = None) -> pd.core.frame.DataFrame:
     """
     Information on each match 
 
+    Args:
+        competition_id (int, optional): competition id. Defaults to 43.
+        season_id (int, optional): season id. Defaults to 106.
+        max_age (float, optional): seconds the stored match list is trusted. Defaults to None, forever.
+
     Returns:
         pd.core.frame.DataFrame: information on each match 
     """
-    parser = Sbopen()
-
-    df_match = parser.match(competition_id=43, season_id=106)
+    df_match = store.load_matches(competition_id, season_id, max_age)
     df_match[['match_id', 'match_date', 
             'home_score', 'away_score', 
             'home_team_name', 'away_team_name', 
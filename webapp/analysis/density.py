@@ -0,0 +1,112 @@
+import numpy as np
+
+#evaluation grid of seaborn.kdeplot, points per axis
+GRIDSIZE = 200
+#StatsBomb pitch, the density is not evaluated outside
+CLIP = ((0, 120), (0, 80))
+
+def support(x: np.ndarray, y: np.ndarray, bandwidth: np.ndarray, cut: float = 20, clip: tuple = CLIP,
+            gridsize: int = GRIDSIZE) -> tuple:
+    """
+    Evaluation grid of seaborn.kdeplot: data range extended by cut bandwidths, clipped
+
+    Args:
+        x (np.ndarray): x coordinates
+        y (np.ndarray): y coordinates
+        bandwidth (np.ndarray): kernel standard deviation on x and y
+        cut (float, optional): bandwidths past the extreme points. Defaults to 20.
+        clip (tuple, optional): (x limits, y limits). Defaults to CLIP.
+        gridsize (int, optional): points per axis. Defaults to GRIDSIZE.
+
+    Returns:
+        tuple: x grid, y grid
+    """
+    return tuple(np.linspace(max(values.min() - bw * cut, lo), min(values.max() + bw * cut, hi), gridsize)
+                 for values, bw, (lo, hi) in zip((x, y), bandwidth, clip))
+
+def linear_binning(x: np.ndarray, y: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    Points spread on their four surrounding grid nodes, weighted by distance
+
+    Args:
+        x (np.ndarray): x coordinates
+        y (np.ndarray): y coordinates
+        xs (np.ndarray): regular x grid
+        ys (np.ndarray): regular y grid
+
+    Returns:
+        np.ndarray: weight of each node (len(ys), len(xs)), sums to the number of points
+    """
+    nx, ny = len(xs), len(ys)
+    fx = np.clip((x - xs[0]) / (xs[1] - xs[0]), 0, nx - 1)
+    fy = np.clip((y - ys[0]) / (ys[1] - ys[0]), 0, ny - 1)
+    i = np.minimum(fx.astype(int), nx - 2)
+    j = np.minimum(fy.astype(int), ny - 2)
+    wx, wy = fx - i, fy - j
+
+    counts = np.zeros(ny * nx)
+    for dj, dy_weight in ((0, 1 - wy), (1, wy)):
+        for di, dx_weight in ((0, 1 - wx), (1, wx)):
+            counts += np.bincount((j + dj) * nx + i + di, dy_weight * dx_weight, minlength=ny * nx)
+
+    return counts.reshape(ny, nx)
+
+def kde_grid(x: np.ndarray, y: np.ndarray, bw_adjust: float = 1., cut: float = 20, clip: tuple = CLIP,
+             gridsize: int = GRIDSIZE) -> tuple:
+    """
+    Gaussian KDE of seaborn.kdeplot (Scott bandwidth, full covariance) on its evaluation grid,
+    points binned on the grid then convolved with the kernel by FFT
+
+    Args:
+        x (np.ndarray): x coordinates
+        y (np.ndarray): y coordinates
+        bw_adjust (float, optional): bandwidth factor. Defaults to 1.
+        cut (float, optional): bandwidths past the extreme points. Defaults to 20.
+        clip (tuple, optional): (x limits, y limits). Defaults to CLIP.
+        gridsize (int, optional): points per axis. Defaults to GRIDSIZE.
+
+    Returns:
+        tuple: x grid, y grid, density (len(y grid), len(x grid))
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    #events without location, dropped as seaborn does
+    located = np.isfinite(x) & np.isfinite(y)
+    x, y = x[located], y[located]
+    n = len(x)
+    #scipy.stats.gaussian_kde covariance
+    factor = n ** (-1 / 6) * bw_adjust
+    covariance = np.cov(np.vstack([x, y])) * factor**2
+    xs, ys = support(x, y, np.sqrt(np.diag(covariance)), cut, clip, gridsize)
+    counts = linear_binning(x, y, xs, ys)
+
+    #kernel on every grid offset
+    u = np.arange(-(len(xs) - 1), len(xs)) * (xs[1] - xs[0])
+    v = np.arange(-(len(ys) - 1), len(ys)) * (ys[1] - ys[0])
+    uu, vv = np.meshgrid(u, v)
+    inverse = np.linalg.inv(covariance)
+    kernel = np.exp(-0.5 * (inverse[0, 0] * uu**2 + 2 * inverse[0, 1] * uu * vv + inverse[1, 1] * vv**2))
+    kernel /= 2 * np.pi * np.sqrt(np.linalg.det(covariance)) * n
+
+    #linear convolution, padded so the FFT does not wrap around
+    shape = (counts.shape[0] + kernel.shape[0] - 1, counts.shape[1] + kernel.shape[1] - 1)
+    full = np.fft.irfft2(np.fft.rfft2(counts, shape) * np.fft.rfft2(kernel, shape), shape)
+    density = full[len(ys) - 1:2 * len(ys) - 1, len(xs) - 1:2 * len(xs) - 1]
+
+    return xs, ys, np.maximum(density, 0)
+
+def iso_levels(density: np.ndarray, levels: int = 25, thresh: float = 0) -> np.ndarray:
+    """
+    Contour levels of seaborn.kdeplot, densities enclosing evenly spaced proportions of the mass
+
+    Args:
+        density (np.ndarray): density grid
+        levels (int, optional): number of levels. Defaults to 25.
+        thresh (float, optional): lowest proportion. Defaults to 0.
+
+    Returns:
+        np.ndarray: density levels, increasing
+    """
+    values = np.sort(density.ravel())[::-1]
+    mass = np.cumsum(values) / values.sum()
+
+    return np.take(values, np.searchsorted(mass, 1 - np.linspace(thresh, 1, levels)), mode="clip")
@@ -0,0 +1,203 @@
+import io
+import json
+from array import array
+import numpy as np
+import pandas as pd
+
+#columns used by the analysis pages, named as mplsoccer flattens them
+EVENT_COLUMNS = ['id', 'index', 'period', 'timestamp', 'minute', 'second', 'possession',
+                 'type_name', 'team_name', 'player_name', 'position_name', 'play_pattern_name',
+                 'x', 'y', 'end_x', 'end_y', 'outcome_name', 'sub_type_name', 'body_part_name',
+                 'pass_recipient_name', 'shot_statsbomb_xg', 'substitution_replacement_name']
+
+#storage of the known columns, anything else is kept as python objects
+SCHEMA = {
+    'index': 'int', 'period': 'int', 'minute': 'int', 'second': 'int', 'possession': 'int',
+    'x': 'float', 'y': 'float', 'z': 'float', 'end_x': 'float', 'end_y': 'float', 'end_z': 'float',
+    'duration': 'float', 'shot_statsbomb_xg': 'float', 'pass_length': 'float', 'pass_angle': 'float',
+    'under_pressure': 'float', 'counterpress': 'float', 'off_camera': 'float', 'out': 'float',
+    'player_id': 'float', 'position_id': 'float', 'pass_recipient_id': 'float', 'outcome_id': 'float',
+    'type_name': 'str', 'team_name': 'str', 'player_name': 'str', 'position_name': 'str',
+    'play_pattern_name': 'str', 'possession_team_name': 'str', 'outcome_name': 'str',
+    'sub_type_name': 'str', 'body_part_name': 'str', 'technique_name': 'str',
+    'pass_recipient_name': 'str', 'pass_height_name': 'str', 'substitution_replacement_name': 'str',
+}
+
+#needed to order the events as mplsoccer does
+SORT_COLUMNS = ['period', 'timestamp', 'index']
+
+CHUNK_SIZE = 1 << 16
+
+class _Column:
+
+    def __init__(self, kind: str):
+        """
+        Typed storage of one column while the events stream in
+
+        Args:
+            kind (str): int, float, str or object
+        """
+        self.kind = kind
+        if kind == 'int':
+            self.values = array('q')
+        elif kind == 'float':
+            self.values = array('d')
+        elif kind == 'str':
+            #dictionary encoded
+            self.values = array('i')
+            self.uniques = {}
+        else:
+            self.values = []
+
+    def append(self, value):
+        if self.kind == 'float':
+            self.values.append(np.nan if value is None else float(value))
+        elif self.kind == 'str':
+            self.values.append(-1 if value is None else self.uniques.setdefault(value, len(self.uniques)))
+        else:
+            self.values.append(value)
+
+    def to_numpy(self) -> np.ndarray:
+        """
+        Column as a numpy array, strings as objects with None when missing
+        """
+        if self.kind == 'str':
+            uniques = np.array(list(self.uniques) + [None], dtype=object)
+            return uniques[np.frombuffer(self.values, dtype=np.int32)]
+        if self.kind == 'object':
+            return np.array(self.values, dtype=object)
+        return np.frombuffer(self.values, dtype=np.int64 if self.kind == 'int' else np.float64)
+
+def _iter_array(file, chunk_size: int = CHUNK_SIZE):
+    """
+    Elements of a top-level JSON array, decoded one at a time from chunks of the file
+
+    Args:
+        file: text file object
+        chunk_size (int, optional): characters read at a time. Defaults to CHUNK_SIZE.
+
+    Yields:
+        dict: one event
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError("events file is not a JSON array")
+    pos = 1
+    eof = False
+    while True:
+        #separators between elements
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield element
+        pos = end
+
+def iter_elements(source, chunk_size: int = CHUNK_SIZE):
+    """
+    Elements of a StatsBomb JSON array (events, 360 frames) decoded one at a time
+
+    Args:
+        source: path or text file object
+        chunk_size (int, optional): characters read at a time. Defaults to CHUNK_SIZE.
+
+    Yields:
+        dict: one element
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        with open(source, encoding='utf-8') as file:
+            yield from _iter_array(file, chunk_size)
+    else:
+        yield from _iter_array(source, chunk_size)
+
+def _flatten(event: dict) -> dict:
+    """
+    Flat keys of an event, same names as mplsoccer.statsbomb.flatten_event
+    """
+    row = {}
+    for key, value in event.items():
+        if isinstance(value, dict):
+            for nested_key, nested_value in value.items():
+                if nested_key == 'end_location':
+                    row['end_x'], row['end_y'] = nested_value[0], nested_value[1]
+                    if len(nested_value) == 3:
+                        row['end_z'] = nested_value[2]
+                elif nested_key == 'aerial_won':
+                    row[nested_key] = nested_value
+                elif nested_key in ('outcome', 'body_part', 'technique'):
+                    for k in nested_value:
+                        row[f'{nested_key}_{k}'] = nested_value[k]
+                elif nested_key in ('freeze_frame', 'lineup'):
+                    continue
+                elif nested_key == 'type':
+                    for k in nested_value:
+                        row[f'sub_type_{k}'] = nested_value[k]
+                elif isinstance(nested_value, dict):
+                    for k in nested_value:
+                        row[f'{key}_{nested_key}_{k}'] = nested_value[k]
+                else:
+                    row[f'{key}_{nested_key}'] = nested_value
+        elif key == 'location':
+            row['x'], row['y'] = value[0], value[1]
+            if len(value) == 3:
+                row['z'] = value[2]
+        else:
+            row[key] = value
+    if row.get('type_name') == 'Ball Receipt*':
+        row['type_name'] = 'Ball Receipt'
+
+    return row
+
+def read_events(source, columns: list = EVENT_COLUMNS) -> pd.core.frame.DataFrame:
+    """
+    Events of a match streamed from StatsBomb JSON, only the requested columns are kept
+
+    Args:
+        source: path or text file object of a StatsBomb events file
+        columns (list, optional): flattened column names. Defaults to EVENT_COLUMNS.
+
+    Returns:
+        pd.core.frame.DataFrame: events ordered as mplsoccer Sbopen().event()[0]
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        with open(source, encoding='utf-8') as file:
+            return read_events(file, columns)
+
+    wanted = list(dict.fromkeys(list(columns) + SORT_COLUMNS))
+    store = {column: _Column(SCHEMA.get(column, 'object')) for column in wanted}
+    for event in _iter_array(source):
+        row = _flatten(event)
+        for column in wanted:
+            store[column].append(row.get(column))
+
+    df = pd.DataFrame({column: store[column].to_numpy() for column in wanted})
+    df.sort_values(SORT_COLUMNS, inplace=True, kind='stable')
+    df.reset_index(drop=True, inplace=True)
+    if 'timestamp' in columns:
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='%H:%M:%S.%f').dt.time
+
+    return df[list(columns)]
+
+def open_stream(response) -> io.TextIOWrapper:
+    """
+    Text stream over a streamed requests response
+
+    Args:
+        response (requests.Response): response opened with stream=True
+
+    Returns:
+        io.TextIOWrapper: utf-8 text file object
+    """
+    response.raw.decode_content = True
+    return io.TextIOWrapper(response.raw, encoding='utf-8')
@@ -0,0 +1,137 @@
+import os
+import io
+import time
+import glob
+import json
+import hashlib
+import threading
+import matplotlib
+import matplotlib.pyplot as plt
+import mplsoccer
+from analysis import store
+from analysis import timing
+
+#rendered figures, relative to the directory the app is launched from
+CACHE_PATH = os.environ.get("SOCCER_DATA_FIGURE_CACHE", "data/figures")
+#least recently used figures are removed above this size
+MAX_BYTES = int(float(os.environ.get("SOCCER_DATA_FIGURE_CACHE_MB", "256")) * 2**20)
+#seconds between two scans of the cache, other processes write to it too
+SCAN_SECONDS = 60
+
+#cache size at the last scan plus the figures this process wrote since, time of the scan
+_total = None
+_scanned = 0.0
+_lock = threading.Lock()
+
+def _code_version() -> str:
+    """
+    Hash of the analysis sources and plotting libraries, a change invalidates every figure
+    """
+    digest = hashlib.sha1(f"{matplotlib.__version__} {mplsoccer.__version__}".encode())
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.py"))):
+        with open(path, "rb") as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()[:12]
+
+CODE_VERSION = _code_version()
+
+def figure_path(match_id: int, chart: str, params: dict = None, fmt: str = "png") -> str:
+    """
+    Cache path of a chart
+
+    Args:
+        match_id (int): match id
+        chart (str): chart name
+        params (dict, optional): everything else the figure depends on. Defaults to None.
+        fmt (str, optional): png or svg. Defaults to "png".
+
+    Returns:
+        str: file path
+    """
+    key = json.dumps([CODE_VERSION, params], sort_keys=True, default=str)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+
+    return os.path.join(CACHE_PATH, str(int(match_id)), f"{chart}-{digest}.{fmt}")
+
+def get(match_id: int, chart: str, build, params: dict = None, fmt: str = "png") -> bytes:
+    """
+    Rendered chart from the cache, built and stored on a miss
+
+    Args:
+        match_id (int): match id
+        chart (str): chart name
+        build (callable): returns the matplotlib figure, only called on a miss
+        params (dict, optional): everything else the figure depends on. Defaults to None.
+        fmt (str, optional): png or svg. Defaults to "png".
+
+    Returns:
+        bytes: image, rendered as st.pyplot does
+    """
+    path = figure_path(match_id, chart, params, fmt)
+    try:
+        with open(path, "rb") as file:
+            image = file.read()
+        #access time for the eviction order
+        os.utime(path)
+        return image
+    except FileNotFoundError:
+        pass
+
+    with timing.stage("figure.build", chart=chart):
+        fig = build()
+    with timing.stage("figure.savefig", chart=chart):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, bbox_inches="tight", dpi=200)
+        plt.close(fig)
+    image = buffer.getvalue()
+
+    tmp_path = store.temp_path(path)
+    with open(tmp_path, "wb") as file:
+        file.write(image)
+    os.replace(tmp_path, path)
+    _written(len(image))
+
+    return image
+
+def _written(size: int, max_bytes: int = MAX_BYTES):
+    """
+    Count a new figure, the cache is only scanned when it may be over max_bytes or the last scan is old
+    """
+    global _total
+    with _lock:
+        if _total is not None and time.time() - _scanned < SCAN_SECONDS:
+            _total += size
+            if _total <= max_bytes:
+                return
+    evict(max_bytes)
+
+def evict(max_bytes: int = MAX_BYTES):
+    """
+    Remove the least recently used figures until the cache fits in max_bytes
+
+    Args:
+        max_bytes (int, optional): cache size. Defaults to MAX_BYTES.
+    """
+    global _total, _scanned
+    files = []
+    for path in glob.glob(os.path.join(CACHE_PATH, "*", "*")):
+        #figures being written by another session
+        if path.endswith(".tmp"):
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    _total, _scanned = total, time.time()
@@ -0,0 +1,166 @@
+import os
+import json
+import logging
+import argparse
+import pandas as pd
+import pyarrow as pa
+from analysis import store
+from analysis import schema
+from analysis import timing
+
+logger = logging.getLogger(__name__)
+
+#compact event frames written once and memory-mapped read-only by every server process, 0 reads the parquet store
+ENABLED = os.environ.get("SOCCER_DATA_MAPPED", "1") == "1"
+#schema metadata key of the categories of each dictionary
+METADATA_KEY = b"soccer_data"
+
+def event_path(competition_id: int, season_id: int, match_id: int) -> str:
+    """
+    Store path of the mapped event file of a match
+
+    Args:
+        competition_id (int): competition id
+        season_id (int): season id
+        match_id (int): match id
+
+    Returns:
+        str: arrow file path
+    """
+    return os.path.join(store.STORE_PATH, str(competition_id), str(season_id), "mapped", f"{int(match_id)}.arrow")
+
+def write_events(df_event: pd.core.frame.DataFrame, path: str):
+    """
+    Atomic write of a compact event frame as an uncompressed Arrow file, categoricals as their codes
+    and their categories in the schema metadata. Float NaN stay values so every numeric column maps without a copy.
+
+    Args:
+        df_event (pd.core.frame.DataFrame): events in the schema.compact layout
+        path (str): destination
+    """
+    columns, categories = {}, {}
+    for column in df_event.columns:
+        values = df_event[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            columns[column] = pa.array(values.cat.codes.to_numpy())
+            categories[column] = values.cat.categories.tolist()
+        elif values.dtype == object:
+            columns[column] = pa.array(values.to_numpy(), from_pandas=True)
+        else:
+            columns[column] = pa.array(values.to_numpy())
+    table = pa.table(columns).replace_schema_metadata({METADATA_KEY: json.dumps({"categories": categories})})
+
+    tmp_path = store.temp_path(path)
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+def open_events(path: str) -> tuple:
+    """
+    Event frame over a memory-mapped Arrow file, every column is a read-only view of the mapping
+
+    Args:
+        path (str): arrow file path
+
+    Returns:
+        tuple: events, categories of each categorical column
+    """
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    categories = json.loads(table.schema.metadata[METADATA_KEY])["categories"]
+
+    columns = {}
+    for column in table.column_names:
+        values = table.column(column)
+        if column in categories:
+            columns[column] = pd.Categorical.from_codes(values.to_numpy(), dtype=pd.CategoricalDtype(categories[column]), validate=False)
+        elif pa.types.is_integer(values.type) or pa.types.is_floating(values.type):
+            columns[column] = values.to_numpy()
+        else:
+            #strings and times stay in arrow memory
+            columns[column] = pd.arrays.ArrowExtensionArray(values)
+
+    return pd.DataFrame(columns, copy=False), categories
+
+def _layout(competition_id: int) -> dict:
+    """
+    Categorical dtype of each column, as the competition dictionaries hold them now
+    """
+    dtypes = schema.dtypes(pd.DataFrame(), competition_id)
+
+    return {column: dtypes[name] for name, columns in schema.DICTIONARIES.items() for column in columns}
+
+def _stale(categories: dict, competition_id: int) -> bool:
+    """
+    Whether a file was written with fewer categories than the competition dictionaries, its codes then follow older categories.
+    Categories of a file written by a process that knew more grow the dictionaries of this one, so workers agree and never
+    rewrite a file with fewer categories.
+    """
+    layout = _layout(competition_id)
+    unknown = {column: values for column, values in categories.items()
+               if column in layout and not set(values) <= set(layout[column].categories)}
+    if unknown:
+        schema.dtypes(pd.DataFrame({column: pd.Series(values, dtype=object) for column, values in unknown.items()}), competition_id)
+        layout = _layout(competition_id)
+
+    return any(column in layout and values != layout[column].categories.tolist() for column, values in categories.items())
+
+@timing.timed("mapped.load_events")
+def load_events(match_id: int, competition_id: int = 43, season_id: int = 106) -> pd.core.frame.DataFrame:
+    """
+    Compact event frame of a match, memory-mapped from a file shared by every process,
+    written from the parquet store on first use and again when the competition dictionaries grew past its categories
+
+    Args:
+        match_id (int): match id
+        competition_id (int, optional): competition id. Defaults to 43.
+        season_id (int, optional): season id. Defaults to 106.
+
+    Returns:
+        pd.core.frame.DataFrame: events of the match, read-only
+    """
+    if not ENABLED:
+        return schema.compact(store.load_events(match_id, competition_id, season_id), competition_id)
+
+    path = event_path(competition_id, season_id, match_id)
+    source = store.event_path(competition_id, season_id, match_id)
+    #stored events dropped or fetched again since the file was written
+    if os.path.exists(path) and os.path.exists(source) and os.path.getmtime(path) >= os.path.getmtime(source):
+        df_event, categories = open_events(path)
+        if not _stale(categories, competition_id):
+            return df_event
+        logger.info("competition dictionaries grew, rewriting %s", path)
+
+    write_events(schema.compact(store.load_events(match_id, competition_id, season_id), competition_id), path)
+
+    return open_events(path)[0]
+
+def seed(competition_id: int, season_id: int) -> int:
+    """
+    Write the mapped event file of every stored match of a season, so that new processes start warm
+
+    Args:
+        competition_id (int): competition id
+        season_id (int): season id
+
+    Returns:
+        int: number of matches written
+    """
+    match_ids = [match_id for match_id in store.load_matches(competition_id, season_id).match_id
+                 if os.path.exists(store.event_path(competition_id, season_id, match_id))]
+    #dictionaries grown with every match first, no file is written with categories that are already stale
+    for match_id in match_ids:
+        schema.dtypes(store.load_events(match_id, competition_id, season_id), competition_id)
+    for match_id in match_ids:
+        df_event = store.load_events(match_id, competition_id, season_id)
+        write_events(schema.compact(df_event, competition_id), event_path(competition_id, season_id, match_id))
+
+    return len(match_ids)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the memory-mapped event files of a season from the local store")
+    parser.add_argument("--competition", type=int, default=43)
+    parser.add_argument("--season", type=int, default=106)
+    args = parser.parse_args()
+
+    print(f"{seed(args.competition, args.season)} matches mapped in {store.STORE_PATH}")
@@ -0,0 +1,162 @@
+import argparse
+import numpy as np
+import pandas as pd
+from analysis import competition
+from analysis import stats_match
+from analysis import precompute
+from analysis import timing
+
+#simulated replays of each match
+REPLAYS = 1_000_000
+#random draws generated at once, bounds the memory of a batch
+BATCH_DRAWS = 2**23
+
+def load_match(id_match: int, competition_id: int = 43, season_id: int = 106):
+    """
+    Match read for its shots, precomputed tables when the offline pipeline ran
+
+    Args:
+        id_match (int): id match
+        competition_id (int, optional): competition id. Defaults to 43.
+        season_id (int, optional): season id. Defaults to 106.
+
+    Returns:
+        stat_match: match
+    """
+    return (precompute.load(id_match, competition_id, season_id) or
+            stats_match.stat_match(id_match, competition_id, season_id))
+
+def shot_matrix(xGs: list, teams: list) -> np.ndarray:
+    """
+    Shot xG of each match and team, padded with zeros
+
+    Args:
+        xGs (list): get_xG frame of each match
+        teams (list): the two team names of each match
+
+    Returns:
+        np.ndarray: xG (matches, 2, shots), shootout shots left out
+    """
+    shots = []
+    for xG, names in zip(xGs, teams):
+        #penalty shootout and the start rows of get_xG are not match shots
+        xG = xG.loc[(xG.period < 5) & (xG.result != "start")]
+        shots.append([xG.loc[xG.team_name == team, "xG"].fillna(0).to_numpy(dtype=np.float32) for team in names])
+
+    matrix = np.zeros((len(shots), 2, max([len(team) for match in shots for team in match], default=0)), dtype=np.float32)
+    for i, match in enumerate(shots):
+        for j, team in enumerate(match):
+            matrix[i, j, :len(team)] = team
+
+    return matrix
+
+@timing.timed("outcome.simulate")
+def simulate(xG: np.ndarray, replays: int = REPLAYS, seed: int = 0) -> np.ndarray:
+    """
+    Replays of matches, every shot a Bernoulli trial with its xG
+
+    Args:
+        xG (np.ndarray): xG (matches, 2, shots) from shot_matrix
+        replays (int, optional): replays of each match. Defaults to REPLAYS.
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        np.ndarray: scoreline probabilities (matches, goals of the first team, goals of the second team)
+    """
+    matches, _, shots = xG.shape
+    rng = np.random.default_rng(seed)
+    size = shots + 1
+    counts = np.zeros(matches * size * size, dtype=np.int64)
+    offsets = (np.arange(matches) * size * size)[:, None]
+
+    batch = max(1, BATCH_DRAWS // max(1, matches * 2 * shots))
+    for start in range(0, replays, batch):
+        n = min(batch, replays - start)
+        #goals of each replay, one draw per shot
+        goals = np.zeros((matches, n, 2), dtype=np.int64)
+        for shot in range(shots):
+            goals += rng.random((matches, n, 2), dtype=np.float32) < xG[:, None, :, shot]
+        counts += np.bincount((offsets + goals[..., 0] * size + goals[..., 1]).ravel(), minlength=counts.size)
+
+    return counts.reshape(matches, size, size) / replays
+
+def outcomes(scorelines: np.ndarray) -> np.ndarray:
+    """
+    Win, draw and loss probabilities of the first team
+
+    Args:
+        scorelines (np.ndarray): scoreline probabilities (matches, goals, goals) from simulate
+
+    Returns:
+        np.ndarray: (matches, 3) win, draw, loss
+    """
+    win = np.tril(scorelines, k=-1).sum(axis=(1, 2))
+    draw = np.trace(scorelines, axis1=1, axis2=2)
+
+    return np.stack([win, draw, 1 - win - draw], axis=1)
+
+def simulate_match(xG: pd.core.frame.DataFrame, teams: np.ndarray, replays: int = REPLAYS, seed: int = 0) -> tuple:
+    """
+    Outcome of a match replayed from its shots
+
+    Args:
+        xG (pd.core.frame.DataFrame): xG informations from get_xG
+        teams (np.ndarray): team names
+        replays (int, optional): replays. Defaults to REPLAYS.
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        tuple: probabilities (team 1 win, draw, team 2 win), scorelines with their probability, most likely first
+    """
+    scorelines = simulate(shot_matrix([xG], [list(teams)]), replays, seed)
+    win, draw, loss = outcomes(scorelines)[0]
+    goals1, goals2 = np.nonzero(scorelines[0])
+    df_scorelines = pd.DataFrame({teams[0]: goals1, teams[1]: goals2, 'probability': scorelines[0, goals1, goals2]})
+
+    probabilities = pd.Series([win, draw, loss], index=[teams[0], 'Draw', teams[1]], name='probability')
+
+    return probabilities, df_scorelines.sort_values('probability', ascending=False, ignore_index=True)
+
+def simulate_competition(competition_id: int = 43, season_id: int = 106, replays: int = REPLAYS, seed: int = 0,
+                         load=load_match) -> pd.core.frame.DataFrame:
+    """
+    Outcome of every match of a competition, replayed in one batch
+
+    Args:
+        competition_id (int, optional): competition id. Defaults to 43.
+        season_id (int, optional): season id. Defaults to 106.
+        replays (int, optional): replays of each match. Defaults to REPLAYS.
+        seed (int, optional): random seed. Defaults to 0.
+        load (callable, optional): (id_match, competition_id, season_id) to match. Defaults to load_match.
+
+    Returns:
+        pd.core.frame.DataFrame: win, draw and loss probabilities and most likely score of each match
+    """
+    df_match = competition.get_competition(competition_id, season_id)
+    matches = [load(match_id, competition_id, season_id) for match_id in df_match.match_id]
+    teams = [list(match.teams) for match in matches]
+
+    scorelines = simulate(shot_matrix([match.get_xG() for match in matches], teams), replays, seed)
+    probabilities = outcomes(scorelines)
+    likely = scorelines.reshape(len(matches), -1).argmax(axis=1)
+
+    return pd.DataFrame({
+        'match_id': df_match.match_id.to_numpy(),
+        'competition_stage_name': df_match.competition_stage_name.to_numpy(),
+        'team1': [names[0] for names in teams],
+        'team2': [names[1] for names in teams],
+        'win': probabilities[:, 0].round(3),
+        'draw': probabilities[:, 1].round(3),
+        'loss': probabilities[:, 2].round(3),
+        'likely_score': [f"{goals // scorelines.shape[2]}-{goals % scorelines.shape[2]}" for goals in likely],
+    })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay every match of a competition from its shot xG")
+    parser.add_argument("--competition", type=int, default=43)
+    parser.add_argument("--season", type=int, default=106)
+    parser.add_argument("--replays", type=int, default=REPLAYS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(simulate_competition(args.competition, args.season, args.replays, args.seed).to_string(index=False))
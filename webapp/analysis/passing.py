@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+#minutes of the match clock per period, above the longest period
+PERIOD_MINUTES = 1000
+
+class PassingIndex:
+
+    def __init__(self, df_pass: pd.core.frame.DataFrame, rows: np.ndarray, substitution_rows: np.ndarray):
+        """
+        Per-segment partial sums of one team's passes, segments cut at every minute of every period and substitution.
+        Minutes only grow inside a period (first half stoppage time comes before the second half restarts at 45),
+        so the passes of a minute window are one run of passes per period.
+
+        Args:
+            df_pass (pd.core.frame.DataFrame): successful passes in event order (x, y, end_x, end_y, period, minute,
+                player_name, pass_recipient_name)
+            rows (np.ndarray): row positions of the passes in the event frame
+            substitution_rows (np.ndarray): row positions of the team substitutions
+        """
+        n = len(df_pass)
+        self.minutes = df_pass["minute"].to_numpy()
+        self.periods = df_pass["period"].to_numpy()
+        #match clock, sorted in event order
+        self.clock = self.periods.astype(np.int64) * PERIOD_MINUTES + self.minutes
+        self.substitution_cuts = np.searchsorted(rows, substitution_rows)
+
+        #surname of a player, codes follow the alphabetical order of the surnames
+        full_names = np.concatenate([df_pass["player_name"].astype(str).to_numpy(),
+                                     df_pass["pass_recipient_name"].astype(str).to_numpy()])
+        full_codes, uniques = pd.factorize(full_names)
+        self.names, surname_codes = np.unique([name.split()[-1] for name in uniques], return_inverse=True)
+        codes = surname_codes[full_codes]
+        passer, recipient = codes[:n], codes[n:]
+        players = len(self.names)
+
+        minute_cuts = np.flatnonzero(np.diff(self.clock)) + 1
+        self.cuts = np.unique(np.concatenate([[0, n], minute_cuts, self.substitution_cuts]))
+        segment = np.searchsorted(self.cuts, np.arange(n), side="right")
+        size = len(self.cuts)
+
+        def cumulative(codes, weights=None, width=players):
+            sums = np.bincount(segment * width + codes, weights, minlength=size * width)
+            return sums.reshape(size, width).cumsum(axis=0)
+
+        self.pass_n = cumulative(passer)
+        self.pass_x = cumulative(passer, df_pass["x"].to_numpy(dtype=float))
+        self.pass_y = cumulative(passer, df_pass["y"].to_numpy(dtype=float))
+        self.rec_n = cumulative(recipient)
+        self.rec_x = cumulative(recipient, df_pass["end_x"].to_numpy(dtype=float))
+        self.rec_y = cumulative(recipient, df_pass["end_y"].to_numpy(dtype=float))
+        self.pairs = cumulative(passer * players + recipient, width=players**2).reshape(size, players, players)
+
+        #pass ordinals of each player, to find his first pass of a window
+        self.ordinals = np.argsort(passer, kind="stable")
+        self.starts = np.searchsorted(passer[self.ordinals], np.arange(players))
+
+    def window(self, start_minute: float = None, end_minute: float = None) -> list:
+        """
+        Pass ordinals of a [start_minute, end_minute) window, one run per period
+
+        Args:
+            start_minute (float, optional): first minute. Defaults to None, kick-off.
+            end_minute (float, optional): excluded last minute. Defaults to None, end of the match.
+
+        Returns:
+            list: first and excluded last pass ordinals of each run
+        """
+        start = 0 if start_minute is None else np.clip(np.ceil(start_minute), 0, PERIOD_MINUTES)
+        end = PERIOD_MINUTES if end_minute is None else np.clip(np.ceil(end_minute), start, PERIOD_MINUTES)
+        periods = np.unique(self.periods).astype(np.int64)
+        starts = np.searchsorted(self.clock, periods * PERIOD_MINUTES + start)
+        ends = np.searchsorted(self.clock, periods * PERIOD_MINUTES + end)
+
+        runs = [(first, last) for first, last in zip(starts, ends) if last > first]
+
+        return runs or [(0, 0)]
+
+    def segment(self, segment: int) -> list:
+        """
+        Pass ordinals between two substitutions, segment 0 ends at the first substitution
+
+        Args:
+            segment (int): number of substitutions before the window
+
+        Returns:
+            list: first and excluded last pass ordinals, one run
+        """
+        cuts = np.concatenate([[0], self.substitution_cuts, [len(self.minutes)]])
+        segment = min(segment, len(cuts) - 2)
+
+        return [(cuts[segment], cuts[segment + 1])]
+
+    def network(self, runs: list) -> tuple:
+        """
+        Passing network of runs of passes, from the partial sums only
+
+        Args:
+            runs (list): first and excluded last pass ordinals of each run, in event order
+
+        Returns:
+            tuple: position, line
+        """
+        bounds = np.searchsorted(self.cuts, np.array(runs, dtype=np.int64).reshape(-1, 2))
+        a, b = bounds[:, 0], bounds[:, 1]
+
+        def total(sums):
+            return (sums[b] - sums[a]).sum(axis=0)
+
+        no = total(self.pass_n)
+
+        #players who passed, in order of their first pass, found in the first run they passed in
+        players = np.flatnonzero(no > 0)
+        first_run = np.argmax((self.pass_n[b] - self.pass_n[a])[:, players] > 0, axis=0)
+        first = self.ordinals[self.starts[players] + self.pass_n[a[first_run], players].astype(int)]
+        players = players[np.argsort(first, kind="stable")]
+
+        count = no[players] + total(self.rec_n)[players]
+        scatter_df = pd.DataFrame({
+            "player_name": self.names[players].astype(object),
+            "x": (total(self.pass_x) + total(self.rec_x))[players] / count,
+            "y": (total(self.pass_y) + total(self.rec_y))[players] / count,
+            "no": no[players],
+        })
+        scatter_df['marker_size'] = (scatter_df['no'] / scatter_df['no'].max() * 1500)
+
+        #both directions of a pair, minimum pass
+        pairs = total(self.pairs)
+        pair_count = np.triu(pairs + pairs.T) - np.diag(np.diag(pairs))
+        player1, player2 = np.nonzero(pair_count > 2)
+        lines_df = pd.DataFrame({
+            "pair_key": [f"{self.names[i]}_{self.names[j]}" for i, j in zip(player1, player2)],
+            "pass_count": pair_count[player1, player2].astype(np.int64),
+        })
+        lines_df = lines_df.sort_values("pair_key", ignore_index=True)
+
+        return scatter_df, lines_df
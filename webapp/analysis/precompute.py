@@ -0,0 +1,316 @@
+import os
+import json
+import shutil
+import hashlib
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from analysis import competition
+from analysis import density
+from analysis import stats_match
+from analysis import store
+from analysis import timeline
+
+logger = logging.getLogger(__name__)
+
+#precomputed tables, relative to the directory the app is launched from
+ARTIFACT_PATH = os.environ.get("SOCCER_DATA_ARTIFACTS", "data/artifacts")
+#layout version of the artifact directory
+ARTIFACT_VERSION = 1
+
+def _code_version() -> str:
+    """
+    Hash of the aggregation sources, a change recomputes every match
+    """
+    digest = hashlib.sha1()
+    for name in ["store.py", "event_stream.py", "schema.py", "mapped.py", "stats_match.py", "passing.py",
+                 "density.py", "timeline.py", "precompute.py"]:
+        with open(os.path.join(os.path.dirname(__file__), name), "rb") as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()[:12]
+
+CODE_VERSION = _code_version()
+
+def season_path(competition_id: int, season_id: int) -> str:
+    """
+    Artifact directory of a season
+
+    Args:
+        competition_id (int): competition id
+        season_id (int): season id
+
+    Returns:
+        str: directory path
+    """
+    return os.path.join(ARTIFACT_PATH, f"v{ARTIFACT_VERSION}", str(competition_id), str(season_id))
+
+def source_signature(match: pd.core.series.Series) -> str:
+    """
+    Identity of a match source, StatsBomb updates last_updated when it changes the data
+
+    Args:
+        match (pd.core.series.Series): row of competition.get_competition
+
+    Returns:
+        str: signature
+    """
+    return f"{match.get('last_updated')}|{match.get('last_updated_360')}|{CODE_VERSION}"
+
+def read_manifest(competition_id: int, season_id: int) -> dict:
+    """
+    Signature of each precomputed match of a season
+
+    Returns:
+        dict: match id to signature
+    """
+    path = os.path.join(season_path(competition_id, season_id), "manifest.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+def _write_manifest(competition_id: int, season_id: int, manifest: dict):
+    """
+    Atomic manifest write
+    """
+    path = os.path.join(season_path(competition_id, season_id), "manifest.json")
+    tmp_path = store.temp_path(path)
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def precompute_match(match_id: int, competition_id: int, season_id: int) -> int:
+    """
+    Every page aggregation of a match written as parquet tables
+
+    Args:
+        match_id (int): match id
+        competition_id (int): competition id
+        season_id (int): season id
+
+    Returns:
+        int: match id
+    """
+    match = stats_match.stat_match(match_id, competition_id, season_id)
+    teams = list(match.teams)
+
+    events = match.get_events()
+    scatter_df, lines_df = match.get_passing_network()
+    tables = {
+        "statistics": match.get_statistics(),
+        "xG": match.get_xG(),
+        "shots": match.get_shots_compact(),
+        "events": pd.concat([df.assign(team_name=team) for df, team in zip(events, teams)]),
+        "passing_nodes": pd.concat([df.assign(team_name=team) for df, team in zip(scatter_df, teams)]),
+        "passing_lines": pd.concat([df.assign(team_name=team) for df, team in zip(lines_df, teams)]),
+        "timeline": match.get_timeline().table,
+    }
+
+    #written aside then swapped in, readers never see a partial match
+    path = os.path.join(season_path(competition_id, season_id), str(int(match_id)))
+    tmp_path = store.temp_path(path, directory=True)
+    for name, df in tables.items():
+        df.to_parquet(os.path.join(tmp_path, f"{name}.parquet"), index=False)
+    with open(os.path.join(tmp_path, "match.json"), "w") as file:
+        json.dump({"teams": teams, "last_minute": match.last_minute}, file)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+    return int(match_id)
+
+def run(competition_id: int = 43, season_id: int = 106, workers: int = None, force: bool = False) -> list:
+    """
+    Precompute every match of a season whose source changed since the last run
+
+    Args:
+        competition_id (int, optional): competition id. Defaults to 43.
+        season_id (int, optional): season id. Defaults to 106.
+        workers (int, optional): processes. Defaults to None, one per core.
+        force (bool, optional): recompute every match. Defaults to False.
+
+    Returns:
+        list: ids of the recomputed matches
+    """
+    #match list fetched again, signatures of updated matches are new
+    df_match = competition.get_competition(competition_id, season_id, max_age=0)
+    os.makedirs(season_path(competition_id, season_id), exist_ok=True)
+    manifest = {} if force else read_manifest(competition_id, season_id)
+
+    signatures = {str(row.match_id): source_signature(row) for _, row in df_match.iterrows()}
+    todo = [int(match_id) for match_id, signature in signatures.items() if manifest.get(match_id) != signature]
+    logger.info("%d matches to precompute, %d up to date", len(todo), len(signatures) - len(todo))
+
+    done = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(precompute_match, match_id, competition_id, season_id) for match_id in todo]
+        for future in as_completed(futures):
+            try:
+                match_id = future.result()
+            except Exception:
+                logger.exception("precompute failed")
+                continue
+            manifest[str(match_id)] = signatures[str(match_id)]
+            _write_manifest(competition_id, season_id, manifest)
+            done.append(match_id)
+
+    return done
+
+class precomputed_match:
+
+    def __init__(self, id_match: int, competition_id: int = 43, season_id: int = 106):
+        """
+        Match aggregations read from the artifact directory, same accessors as stat_match
+
+        Args:
+            id_match (int): id match
+            competition_id (int, optional): competition id. Defaults to 43.
+            season_id (int, optional): season id. Defaults to 106.
+        """
+        self.id_match = id_match
+        self.competition_id = competition_id
+        self.season_id = season_id
+        self.path = os.path.join(season_path(competition_id, season_id), str(int(id_match)))
+        with open(os.path.join(self.path, "match.json")) as file:
+            info = json.load(file)
+        self.teams = info["teams"]
+        self.last_minute = info["last_minute"]
+        self.colors = stats_match.COLORS
+        self.cmap = stats_match.CMAPS
+        self.scans = 0
+        self._live = None
+        #tables, event densities and timeline, counted in the match cache size
+        self._cache = {}
+
+    @stats_match.memoized
+    def _read(self, name: str) -> pd.core.frame.DataFrame:
+        """
+        One precomputed table, read once and kept with the match
+
+        Args:
+            name (str): table name
+
+        Returns:
+            pd.core.frame.DataFrame: table
+        """
+        return pd.read_parquet(os.path.join(self.path, f"{name}.parquet"))
+
+    def _per_team(self, name: str) -> list:
+        """
+        One precomputed table split by team
+
+        Args:
+            name (str): table name
+
+        Returns:
+            list: table of each team
+        """
+        df = self._read(name)
+        return [df.loc[df.team_name == team].drop(columns="team_name").reset_index(drop=True) for team in self.teams]
+
+    def get_events(self) -> list:
+        """
+        Position of event data for each team
+
+        Returns:
+            list: position event data
+        """
+        return self._per_team("events")
+
+    @stats_match.memoized
+    def get_event_density(self, team: int, bw_adjust: float = 1.) -> tuple:
+        """
+        Event density of a team on the pitch grid, drawn by visuals.display_events
+
+        Args:
+            team (int): team position in self.teams
+            bw_adjust (float, optional): bandwidth factor. Defaults to 1.
+
+        Returns:
+            tuple: x grid, y grid, density
+        """
+        events = self.get_events()[team]
+
+        return density.kde_grid(events.x.to_numpy(), events.y.to_numpy(), bw_adjust)
+
+    def get_shots_compact(self) -> pd.core.frame.DataFrame:
+        """
+        All shot during the match
+
+        Returns:
+            pd.core.frame.DataFrame: shots
+        """
+        return self._read("shots")
+
+    def get_xG(self) -> pd.core.frame.DataFrame:
+        """
+        Cumulative xG for each shot
+
+        Returns:
+            pd.core.frame.DataFrame: xG data
+        """
+        return self._read("xG")
+
+    def get_statistics(self) -> pd.core.frame.DataFrame:
+        """
+        Statistics for each team on various actions
+
+        Returns:
+            pd.core.frame.DataFrame: Statistic data
+        """
+        return self._read("statistics")
+
+    @stats_match.memoized
+    def get_timeline(self) -> timeline.TimelineIndex:
+        """
+        Cumulative per-minute counts and xG, for the statistics of any minute range
+
+        Returns:
+            timeline.TimelineIndex: timeline of the match
+        """
+        return timeline.TimelineIndex(self._read("timeline"), self.teams, self.last_minute)
+
+    def get_passing_network(self, *window) -> tuple:
+        """
+        Precomputed network until the first substitution, other windows come from the events
+
+        Returns:
+            tuple: position, line
+        """
+        if window:
+            if self._live is None:
+                self._live = stats_match.stat_match(self.id_match, self.competition_id, self.season_id)
+            return self._live.get_passing_network(*window)
+
+        return self._per_team("passing_nodes"), self._per_team("passing_lines")
+
+def load(id_match: int, competition_id: int = 43, season_id: int = 106):
+    """
+    Precomputed match when the artifacts exist
+
+    Args:
+        id_match (int): id match
+        competition_id (int, optional): competition id. Defaults to 43.
+        season_id (int, optional): season id. Defaults to 106.
+
+    Returns:
+        precomputed_match: aggregations, None when the match was not precomputed or by another version of the code
+    """
+    signature = read_manifest(competition_id, season_id).get(str(int(id_match)))
+    if signature is None or not signature.endswith(f"|{CODE_VERSION}"):
+        return None
+
+    return precomputed_match(id_match, competition_id, season_id)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the match page aggregations of a season")
+    parser.add_argument("--competition", type=int, default=43)
+    parser.add_argument("--season", type=int, default=106)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="recompute every match")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    done = run(args.competition, args.season, args.workers, args.force)
+    print(f"{len(done)} matches precomputed in {season_path(args.competition, args.season)}")
@@ -0,0 +1,219 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from analysis import stats_match
+from analysis import precompute
+from analysis import timing
+
+logger = logging.getLogger(__name__)
+
+#least recently used matches are dropped above this size
+MAX_BYTES = int(float(os.environ.get("SOCCER_DATA_MATCH_CACHE_MB", "512")) * 2**20)
+#background loads run next to the page, few threads keep it responsive
+WORKERS = int(os.environ.get("SOCCER_DATA_PREFETCH_WORKERS", "2"))
+#matches prefetched per selection, more would evict each other
+PREFETCH_LIMIT = int(os.environ.get("SOCCER_DATA_PREFETCH_LIMIT", "16"))
+
+def load_match(id_match: int, competition_id: int = 43, season_id: int = 106):
+    """
+    Match with the aggregations of the page computed
+
+    Args:
+        id_match (int): id match
+        competition_id (int, optional): competition id. Defaults to 43.
+        season_id (int, optional): season id. Defaults to 106.
+
+    Returns:
+        stat_match: match, precompute.precomputed_match when the offline pipeline ran
+    """
+    #precomputed tables when the offline pipeline ran, events otherwise
+    match = (precompute.load(id_match, competition_id, season_id) or
+             stats_match.stat_match(id_match, competition_id, season_id))
+    match.get_events()
+    match.get_event_density(0)
+    match.get_event_density(1)
+    match.get_passing_network()
+    match.get_xG()
+    match.get_shots_compact()
+    match.get_statistics()
+    match.get_timeline()
+
+    return match
+
+def match_bytes(match) -> int:
+    """
+    Memory held by a match: its events unless memory-mapped and its memoized frames, which grow as the pages use it
+
+    Args:
+        match (stat_match): match
+
+    Returns:
+        int: bytes
+    """
+    def size(value) -> int:
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(deep=True).sum())
+        if isinstance(value, pd.Series):
+            return int(value.memory_usage(deep=True))
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, (list, tuple)):
+            return sum(size(item) for item in value)
+        #partial sums of passing.PassingIndex
+        if hasattr(value, "__dict__"):
+            return sum(size(item) for item in vars(value).values())
+        return 0
+
+    #mapped events live in the page cache, shared by every process
+    events = None if getattr(match, "mapped", False) else getattr(match, "df_event", None)
+
+    return size(events) + size(list(getattr(match, "_cache", {}).values()))
+
+class MatchCache:
+
+    def __init__(self, max_bytes: int = MAX_BYTES, workers: int = WORKERS, load=load_match):
+        """
+        Loaded matches shared by every session, bounded in memory, filled ahead of time by a thread pool
+
+        Args:
+            max_bytes (int, optional): cache size. Defaults to MAX_BYTES.
+            workers (int, optional): prefetch threads. Defaults to WORKERS.
+            load (callable, optional): (id_match, competition_id, season_id) to match. Defaults to load_match.
+        """
+        self.max_bytes = max_bytes
+        self.load = load
+        self.matches = OrderedDict()
+        self.pending = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    def get(self, id_match: int, competition_id: int = 43, season_id: int = 106):
+        """
+        Match from the cache, waits for its prefetch when it is running, loads it otherwise
+
+        Args:
+            id_match (int): id match
+            competition_id (int, optional): competition id. Defaults to 43.
+            season_id (int, optional): season id. Defaults to 106.
+
+        Returns:
+            stat_match: match
+        """
+        key = (int(id_match), int(competition_id), int(season_id))
+        with self._lock:
+            match = self.matches[key][0] if key in self.matches else None
+            if match is not None:
+                self.matches.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                future = self.pending.get(key)
+                #a queued prefetch is taken over rather than waited for
+                owner = future is None or future.cancel()
+                if owner:
+                    future = Future()
+                    future.set_running_or_notify_cancel()
+                    self.pending[key] = future
+        if match is not None:
+            #frames memoized by the pages since the last access count too
+            if len(getattr(match, "_cache", ())) != self.matches.get(key, (None, 0, 0))[2]:
+                self._resize(key, match)
+            return match
+
+        with timing.stage("match_cache.load", match_id=key[0], prefetched=not owner):
+            if owner:
+                self._run(key, future)
+            return future.result()
+
+    def prefetch(self, match_ids, competition_id: int = 43, season_id: int = 106, limit: int = PREFETCH_LIMIT):
+        """
+        Load matches in the background, queued loads of a previous selection are dropped
+
+        Args:
+            match_ids: match ids, most likely next first
+            competition_id (int, optional): competition id. Defaults to 43.
+            season_id (int, optional): season id. Defaults to 106.
+            limit (int, optional): matches queued at most. Defaults to PREFETCH_LIMIT.
+        """
+        keys = [(int(match_id), int(competition_id), int(season_id)) for match_id in list(match_ids)[:limit]]
+        with self._lock:
+            for key, future in list(self.pending.items()):
+                if key not in keys and future.cancel():
+                    del self.pending[key]
+            for key in keys:
+                if key in self.matches or key in self.pending:
+                    continue
+                future = Future()
+                self.pending[key] = future
+                self._executor.submit(self._prefetch, key, future)
+
+    def _prefetch(self, key: tuple, future: Future):
+        """
+        Background load, skipped when cancelled or taken over
+        """
+        if future.set_running_or_notify_cancel():
+            self._run(key, future)
+
+    def _run(self, key: tuple, future: Future):
+        """
+        Load a match into the cache and resolve its future
+        """
+        try:
+            match = self.load(*key)
+        except Exception as error:
+            logger.warning("match %s not loaded: %s", key[0], error)
+            with self._lock:
+                if self.pending.get(key) is future:
+                    del self.pending[key]
+            future.set_exception(error)
+            return
+
+        size = match_bytes(match)
+        with self._lock:
+            if self.pending.get(key) is future:
+                del self.pending[key]
+            if key not in self.matches and size <= self.max_bytes:
+                self.matches[key] = (match, size, len(getattr(match, "_cache", ())))
+                self.bytes += size
+                self._evict()
+        future.set_result(match)
+
+    def _resize(self, key: tuple, match):
+        """
+        Measure a cached match again when it memoized new frames, they grow as the pages use it
+        """
+        entries = len(getattr(match, "_cache", ()))
+        size = match_bytes(match)
+        with self._lock:
+            entry = self.matches.get(key)
+            if entry is None or entry[0] is not match:
+                return
+            self.matches[key] = (match, size, entries)
+            self.bytes += size - entry[1]
+            self._evict()
+
+    def _evict(self):
+        """
+        Drop the least recently used matches until the cache fits, called with the lock held
+        """
+        while self.bytes > self.max_bytes:
+            _, (_, evicted, _) = self.matches.popitem(last=False)
+            self.bytes -= evicted
+
+    def stats(self) -> dict:
+        """
+        Size and hit counts of the cache
+
+        Returns:
+            dict: matches, bytes, pending loads, hits and misses
+        """
+        with self._lock:
+            return {"matches": len(self.matches), "bytes": self.bytes, "pending": len(self.pending),
+                    "hits": self.hits, "misses": self.misses}
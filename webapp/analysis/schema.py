@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from analysis import store
+from analysis import timing
+
+logger = logging.getLogger(__name__)
+
+#in-memory layout of the event frame
+INTEGERS = {'index': np.int32, 'period': np.int8, 'minute': np.int16, 'second': np.int8, 'possession': np.int16}
+COORDINATES = ['x', 'y', 'end_x', 'end_y']
+#categorical columns by dictionary, columns of a dictionary share their categories
+DICTIONARIES = {
+    'type': ['type_name'],
+    'team': ['team_name'],
+    'player': ['player_name', 'pass_recipient_name', 'substitution_replacement_name'],
+    'position': ['position_name'],
+    'play_pattern': ['play_pattern_name'],
+    'outcome': ['outcome_name'],
+    'sub_type': ['sub_type_name'],
+    'body_part': ['body_part_name'],
+}
+
+#categories of each competition loaded in this process
+_dtypes = {}
+#version of the saved dictionaries each competition was last read at
+_versions = {}
+
+def dictionary_path(competition_id: int) -> str:
+    """
+    Store path of the category dictionaries of a competition, shared by its seasons
+
+    Args:
+        competition_id (int): competition id
+
+    Returns:
+        str: json file path
+    """
+    return os.path.join(store.STORE_PATH, str(competition_id), "dictionary.json")
+
+def _read_dictionaries(path: str) -> dict:
+    """
+    Values of each dictionary saved for a competition
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+def _version(path: str) -> tuple:
+    """
+    Modification time and size of the saved dictionaries, None before the first write
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+def _write_dictionaries(path: str, dictionaries: dict):
+    """
+    Atomic dictionary write
+    """
+    tmp_path = store.temp_path(path)
+    with open(tmp_path, "w") as file:
+        json.dump(dictionaries, file, indent=1)
+    os.replace(tmp_path, path)
+
+def _load(competition_id: int, path: str, saved: dict, missing: dict = None) -> dict:
+    """
+    Categories of a competition as the union of the saved dictionaries, this process ones and the missing values
+    """
+    current = _dtypes.get(competition_id, {})
+    dictionaries = {name: set(saved.get(name, [])) | set(current[name].categories if name in current else [])
+                    for name in DICTIONARIES}
+    for name, values in (missing or {}).items():
+        dictionaries[name].update(values)
+    dictionaries = {name: sorted(values) for name, values in dictionaries.items()}
+    _dtypes[competition_id] = {name: pd.CategoricalDtype(values) for name, values in dictionaries.items()}
+    _versions[competition_id] = _version(path)
+
+    return dictionaries
+
+def dtypes(df_event: pd.core.frame.DataFrame, competition_id: int) -> dict:
+    """
+    Categorical dtype of each dictionary of a competition, grown with the values of a new match
+
+    Args:
+        df_event (pd.core.frame.DataFrame): events of a match
+        competition_id (int): competition id
+
+    Returns:
+        dict: dictionary name to pd.CategoricalDtype, categories in alphabetical order
+    """
+    path = dictionary_path(competition_id)
+    if _version(path) != _versions.get(competition_id):
+        #grown by another process since last read, writes are atomic so the read needs no lock
+        _load(competition_id, path, _read_dictionaries(path))
+
+    current = _dtypes.get(competition_id, {})
+    missing = {}
+    for name, columns in DICTIONARIES.items():
+        known = current[name].categories if name in current else pd.Index([])
+        values = pd.unique(np.concatenate([df_event[column].dropna().to_numpy(dtype=object)
+                                           for column in columns if column in df_event] + [np.array([], dtype=object)]))
+        if name not in current or not np.isin(values, known).all():
+            missing[name] = values
+    if not missing:
+        return current
+
+    #read-merge-write under the lock, no other process grows the dictionaries in between
+    with store.lock(path):
+        saved = _read_dictionaries(path)
+        dictionaries = _load(competition_id, path, saved, missing)
+        if dictionaries != saved:
+            _write_dictionaries(path, dictionaries)
+            _versions[competition_id] = _version(path)
+
+    return _dtypes[competition_id]
+
+@timing.timed("schema.compact")
+def compact(df_event: pd.core.frame.DataFrame, competition_id: int = 43) -> pd.core.frame.DataFrame:
+    """
+    Event frame in the compact layout: competition-wide categoricals, float32 coordinates, small integers
+
+    Args:
+        df_event (pd.core.frame.DataFrame): events of a match
+        competition_id (int, optional): competition id. Defaults to 43.
+
+    Returns:
+        pd.core.frame.DataFrame: events of the match
+    """
+    categories = dtypes(df_event, competition_id)
+    layout = {column: categories[name] for name, columns in DICTIONARIES.items() for column in columns}
+    layout.update({column: np.float32 for column in COORDINATES})
+    layout.update(INTEGERS)
+
+    return df_event.astype({column: dtype for column, dtype in layout.items() if column in df_event})
+
+def _mask_time(df_event: pd.core.frame.DataFrame, repeat: int = 50) -> float:
+    """
+    Best time of the masks stat_match used to build per action and team
+    """
+    team = df_event.team_name.iloc[0]
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for action in ['Shot', 'Pass', 'Duel', 'Foul Committed', 'Dribble', 'Interception']:
+            (df_event.type_name == action) & (df_event.team_name == team)
+        (df_event.outcome_name.isnull()) & (df_event.sub_type_name != "Throw-in")
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+def report(competition_id: int = 43, season_id: int = 106) -> pd.core.frame.DataFrame:
+    """
+    Memory and mask time of every match of a season, as stored and in the compact layout
+
+    Args:
+        competition_id (int, optional): competition id. Defaults to 43.
+        season_id (int, optional): season id. Defaults to 106.
+
+    Returns:
+        pd.core.frame.DataFrame: one row per match
+    """
+    rows = []
+    for match_id in store.load_matches(competition_id, season_id).match_id:
+        df_event = store.load_events(match_id, competition_id, season_id)
+        df_compact = compact(df_event, competition_id)
+        rows.append({
+            'match_id': match_id,
+            'events': len(df_event),
+            'bytes_before': int(df_event.memory_usage(deep=True).sum()),
+            'bytes_after': int(df_compact.memory_usage(deep=True).sum()),
+            'mask_ms_before': _mask_time(df_event) * 1e3,
+            'mask_ms_after': _mask_time(df_compact) * 1e3,
+        })
+
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bytes per match of the event frame before and after the compact layout")
+    parser.add_argument("--competition", type=int, default=43)
+    parser.add_argument("--season", type=int, default=106)
+    args = parser.parse_args()
+
+    df_report = report(args.competition, args.season)
+    print(df_report.round(3).to_string(index=False))
+    print(f"mean bytes per match {df_report.bytes_before.mean():,.0f} -> {df_report.bytes_after.mean():,.0f} "
+          f"({df_report.bytes_after.sum() / df_report.bytes_before.sum():.1%})")
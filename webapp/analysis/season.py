@@ -0,0 +1,248 @@
+import os
+import json
+import shutil
+import logging
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+from analysis import competition
+from analysis import stats_match
+from analysis import precompute
+from analysis import store
+
+logger = logging.getLogger(__name__)
+
+#grouping keys of each aggregate table
+KEYS = {
+    'players': ['team_name', 'player_name'],
+    'partners': ['team_name', 'player_name', 'pass_recipient_name'],
+    'teams': ['team_name'],
+}
+#count column of each table, a key at zero is no longer in the season
+COUNTS = {'players': 'matches', 'partners': 'passes', 'teams': 'matches'}
+#duel outcomes counted as won
+DUELS_WON = ['Won', 'Success', 'Success In Play', 'Success Out']
+#leaderboard columns computed from the totals
+RATES = {
+    'pass_completion': ('completed_passes', 'passes'),
+    'xG_per_shot': ('xG', 'shots'),
+    'xG_per_match': ('xG', 'matches'),
+    'duels_won_rate': ('duels_won', 'duels'),
+}
+#seconds a server waits before looking for new matches of a season again
+UPDATE_SECONDS = 600
+
+def match_partials(match: stats_match.stat_match) -> dict:
+    """
+    Aggregates of one match, per player, pass partners and per team
+
+    Args:
+        match (stats_match.stat_match): match
+
+    Returns:
+        dict: table name to partial aggregates, keys as KEYS
+    """
+    df = match.df_event
+    #penalty shootout kicks (period 5) are not match shots, as in outcome.shot_matrix
+    shots = ((df.type_name == 'Shot') & (df.period < 5)).to_numpy()
+    passes = (df.type_name == 'Pass').to_numpy()
+    completed = passes & df.outcome_name.isnull().to_numpy()
+    duels = (df.type_name == 'Duel').to_numpy()
+    counts = pd.DataFrame({
+        'team_name': df.team_name.astype(object).to_numpy(),
+        'player_name': df.player_name.astype(object).to_numpy(),
+        'shots': shots.astype(np.int64),
+        'goals': (shots & (df.outcome_name == 'Goal').to_numpy()).astype(np.int64),
+        'xG': np.where(shots, df.shot_statsbomb_xg.fillna(0).to_numpy(dtype=float), 0.),
+        'passes': passes.astype(np.int64),
+        'completed_passes': completed.astype(np.int64),
+        'duels': duels.astype(np.int64),
+        'duels_won': (duels & df.outcome_name.isin(DUELS_WON).to_numpy()).astype(np.int64),
+    })
+
+    players = counts.dropna(subset=['player_name']).groupby(KEYS['players'], sort=False).sum().reset_index()
+    players['matches'] = 1
+    teams = counts.drop(columns='player_name').groupby(KEYS['teams'], sort=False).sum().reset_index()
+    teams['matches'] = 1
+    partners = pd.DataFrame({
+        'team_name': df.team_name.astype(object).to_numpy()[completed],
+        'player_name': df.player_name.astype(object).to_numpy()[completed],
+        'pass_recipient_name': df.pass_recipient_name.astype(object).to_numpy()[completed],
+    }).dropna().groupby(KEYS['partners'], sort=False).size().rename('passes').reset_index()
+
+    return {'players': players, 'partners': partners, 'teams': teams}
+
+def _merge(totals: pd.core.frame.DataFrame, partial: pd.core.frame.DataFrame, name: str, sign: int = 1) -> pd.core.frame.DataFrame:
+    """
+    Totals with one match partial added (sign 1) or removed (sign -1)
+
+    Args:
+        totals (pd.core.frame.DataFrame): totals indexed by the table keys
+        partial (pd.core.frame.DataFrame): partial of a match
+        name (str): table name
+        sign (int, optional): 1 to add, -1 to remove. Defaults to 1.
+
+    Returns:
+        pd.core.frame.DataFrame: totals indexed by the table keys, keys left at zero are dropped
+    """
+    values = partial.drop(columns='match_id', errors='ignore').set_index(KEYS[name]) * sign
+    merged = values if totals is None else totals.add(values, fill_value=0)
+    merged = merged.loc[merged[COUNTS[name]] != 0]
+
+    return merged.astype({column: partial[column].dtype for column in merged.columns})
+
+class SeasonAggregates:
+
+    def __init__(self, competition_id: int = 43, season_id: int = 106):
+        """
+        Player, pass partner and team totals of a season, updated one match at a time
+
+        Args:
+            competition_id (int, optional): competition id. Defaults to 43.
+            season_id (int, optional): season id. Defaults to 106.
+        """
+        self.competition_id = competition_id
+        self.season_id = season_id
+        self.path = os.path.join(precompute.season_path(competition_id, season_id), "season")
+        self._lock = threading.Lock()
+
+        #partials of every merged match, one row per match and key
+        self.manifest = {}
+        self.partials = {name: None for name in KEYS}
+        if os.path.exists(os.path.join(self.path, "manifest.json")):
+            with open(os.path.join(self.path, "manifest.json")) as file:
+                self.manifest = json.load(file)
+            self.partials = {name: pd.read_parquet(os.path.join(self.path, f"{name}.parquet")) for name in KEYS}
+
+        self.totals = {name: None for name in KEYS}
+        for name, keys in KEYS.items():
+            if self.partials[name] is not None and len(self.partials[name]):
+                self.totals[name] = _merge(None, self.partials[name].groupby(keys, sort=False).sum().reset_index(), name)
+
+    def add_match(self, match_id: int, signature: str = None, save: bool = True):
+        """
+        Merge the partial aggregates of a match, a match merged before is replaced
+
+        Args:
+            match_id (int): match id
+            signature (str, optional): source signature of the match. Defaults to None.
+            save (bool, optional): write the store. Defaults to True.
+        """
+        match = stats_match.stat_match(match_id, self.competition_id, self.season_id)
+        partials = match_partials(match)
+        with self._lock:
+            key = str(int(match_id))
+            for name in KEYS:
+                partial = partials[name].assign(match_id=int(match_id))
+                stored = self.partials[name]
+                if key in self.manifest and stored is not None:
+                    previous = stored.loc[stored.match_id == int(match_id)]
+                    self.totals[name] = _merge(self.totals[name], previous, name, sign=-1)
+                    stored = stored.loc[stored.match_id != int(match_id)]
+                self.partials[name] = partial if stored is None else pd.concat([stored, partial], ignore_index=True)
+                self.totals[name] = _merge(self.totals[name], partial, name)
+            self.manifest[key] = signature
+            if save:
+                self._save()
+
+    def update(self) -> list:
+        """
+        Merge every match of the season that is new or changed since it was merged
+
+        Returns:
+            list: ids of the merged matches
+        """
+        df_match = competition.get_competition(self.competition_id, self.season_id, store.REFRESH_SECONDS)
+        signatures = {int(row.match_id): precompute.source_signature(row) for _, row in df_match.iterrows()}
+        todo = [match_id for match_id, signature in signatures.items() if self.manifest.get(str(match_id)) != signature]
+        merged = []
+        for match_id in todo:
+            try:
+                self.add_match(match_id, signatures[match_id], save=False)
+            except Exception:
+                logger.exception("match %s not aggregated", match_id)
+                continue
+            merged.append(match_id)
+        #nothing to write when every match failed, the tables may not exist yet
+        if merged:
+            with self._lock:
+                self._save()
+
+        return merged
+
+    def _save(self):
+        """
+        Partials and manifest written aside then swapped in
+        """
+        tmp_path = store.temp_path(self.path, directory=True)
+        for name, df in self.partials.items():
+            df.to_parquet(os.path.join(tmp_path, f"{name}.parquet"), index=False)
+        with open(os.path.join(tmp_path, "manifest.json"), "w") as file:
+            json.dump(self.manifest, file, indent=1, sort_keys=True)
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(tmp_path, self.path)
+
+    def leaderboard(self, table: str = 'players', metric: str = 'xG', team: str = None, top: int = 20,
+                    min_matches: int = 0) -> pd.core.frame.DataFrame:
+        """
+        Best players or teams on a metric
+
+        Args:
+            table (str, optional): players or teams. Defaults to 'players'.
+            metric (str, optional): total column or one of RATES. Defaults to 'xG'.
+            team (str, optional): players of one team. Defaults to None.
+            top (int, optional): rows returned, None for every row. Defaults to 20.
+            min_matches (int, optional): fewest matches played. Defaults to 0.
+
+        Returns:
+            pd.core.frame.DataFrame: totals and rates, best first
+        """
+        totals = self.totals[table]
+        if totals is None:
+            return pd.DataFrame(columns=KEYS[table])
+        if team is not None and table == 'players':
+            totals = totals.loc[[team]] if team in totals.index.get_level_values('team_name') else totals.iloc[:0]
+        totals = totals.loc[totals.matches >= min_matches]
+
+        df = totals.reset_index()
+        for rate, (numerator, denominator) in RATES.items():
+            df[rate] = (df[numerator] / df[denominator].replace(0, np.nan)).round(3)
+        df['xG'] = df['xG'].round(2)
+
+        df = df.sort_values(metric, ascending=False, kind='stable', ignore_index=True)
+
+        return df if top is None else df.head(top)
+
+    def partners(self, player_name: str, top: int = 10) -> pd.core.frame.DataFrame:
+        """
+        Teammates a player completed the most passes to
+
+        Args:
+            player_name (str): player name
+            top (int, optional): rows returned. Defaults to 10.
+
+        Returns:
+            pd.core.frame.DataFrame: recipient and completed passes, most first
+        """
+        totals = self.totals['partners']
+        if totals is None or player_name not in totals.index.get_level_values('player_name'):
+            return pd.DataFrame(columns=['pass_recipient_name', 'passes'])
+
+        df = totals.xs(player_name, level='player_name').reset_index()
+
+        return df[['pass_recipient_name', 'passes']].nlargest(top, 'passes').reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the season aggregates and print the leaderboards")
+    parser.add_argument("--competition", type=int, default=43)
+    parser.add_argument("--season", type=int, default=106)
+    parser.add_argument("--metric", default="xG")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    aggregates = SeasonAggregates(args.competition, args.season)
+    print(f"{len(aggregates.update())} matches merged, {len(aggregates.manifest)} in the season aggregates")
+    print(aggregates.leaderboard('players', args.metric, top=args.top).to_string(index=False))
+    print(aggregates.leaderboard('teams', args.metric, top=args.top).to_string(index=False))
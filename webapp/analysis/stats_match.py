@@ -1,34 +1,107 @@
+import inspect
+import logging
+import functools
 import numpy as np
 import pandas as pd
-from mplsoccer import Sbopen
 from matplotlib.colors import LinearSegmentedColormap
+from analysis import mapped
+from analysis import passing
+from analysis import density
+from analysis import timeline
+from analysis import timing
+
+logger = logging.getLogger(__name__)
+
+#team colors and their event density colormaps
+COLORS = ['#3e5eeb','#ff3131']
+
+blue = np.array([0.243, 0.369, 0.922])  # #3E5EEB
+white_blue = np.array([0.925, 0.937, 0.992])  # #eceffd
+red = np.array([1.0, 0.192, 0.192])  # #cc2727
+white_red = np.array([1.0, 0.917, 0.917])  # #ffeaea
+
+blue_cmap = [white_blue * (1 - i/9) + blue * (i/9) for i in range(10)]
+red_cmap = [white_red * (1 - i/9) + red * (i/9) for i in range(10)]
+
+CMAPS = [LinearSegmentedColormap.from_list('blue_cmap', blue_cmap),
+         LinearSegmentedColormap.from_list('red_cmap', red_cmap)]
+
+def memoized(method):
+    """
+    Compute an accessor once per match and arguments, later calls return the stored result.
+    Keyword and positional calls share their result, arguments are keyed with their defaults applied.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        args = bound.args[1:] + tuple(sorted(bound.kwargs.items()))
+        key = (method.__name__,) + args
+        if key not in self._cache:
+            with timing.stage(f"{type(self).__name__}.{method.__name__}", args=args):
+                self._cache[key] = method(*bound.args, **bound.kwargs)
+        return self._cache[key]
+
+    return wrapper
 
 class stat_match:
 
-    def __init__(self, id_match: np.int64):
+    @timing.timed("stat_match.__init__")
+    def __init__(self, id_match: np.int64, competition_id: int = 43, season_id: int = 106):
         """
         Match Data recovery 
 
         Args:
             id_match (np.int64): id match
+            competition_id (int, optional): competition id. Defaults to 43.
+            season_id (int, optional): season id. Defaults to 106.
         """
-        parser = Sbopen()
+        self.df_event = mapped.load_events(id_match, competition_id, season_id)
+        #events memory-mapped and shared with the other processes, not counted in the match cache
+        self.mapped = mapped.ENABLED
+        self.teams = np.asarray(self.df_event.team_name.unique())
+        self.scans = 0
+        self._cache = {}
+        #single grouped pass, row positions of each (action, team)
+        self._rows = self._scan(["type_name", "team_name"])
+        self.last_minute = int(self.df_event.minute.max()) + 1
+        self.colors = COLORS
+        self.cmap = CMAPS
 
-        self.df_event = parser.event(id_match)[0]
-        self.teams = self.df_event.team_name.unique()
-        self.colors = ['#3e5eeb','#ff3131']
-        
-        blue = np.array([0.243, 0.369, 0.922])  # #3E5EEB
-        white_blue = np.array([0.925, 0.937, 0.992])  # #eceffd
-        red = np.array([1.0, 0.192, 0.192])  # #cc2727
-        white_red = np.array([1.0, 0.917, 0.917])  # #ffeaea
-        
-        blue_cmap = [white_blue * (1 - i/9) + blue * (i/9) for i in range(10)]
-        red_cmap = [white_red * (1 - i/9) + red * (i/9) for i in range(10)]
+    def _scan(self, columns: list) -> dict:
+        """
+        Full pass over the events grouped by columns, counted in self.scans
+
+        Args:
+            columns (list): grouping columns
 
-        self.cmap = [LinearSegmentedColormap.from_list('blue_cmap', blue_cmap),
-                     LinearSegmentedColormap.from_list('red_cmap', red_cmap)]
+        Returns:
+            dict: row positions of each group
+        """
+        self.scans += 1
+        logger.debug("full-frame scan %d on %s", self.scans, columns)
 
+        return self.df_event.groupby(columns, sort=False, observed=True).indices
+
+    def _rows_of(self, action: str = None, team: str = None) -> np.ndarray:
+        """
+        Row positions of an action and/or a team, without scanning the events
+
+        Args:
+            action (str, optional): type_name. Defaults to None, every action.
+            team (str, optional): team_name. Defaults to None, both teams.
+
+        Returns:
+            np.ndarray: sorted row positions
+        """
+        rows = [positions for (type_name, team_name), positions in self._rows.items()
+                if (action is None or type_name == action) and (team is None or team_name == team)]
+
+        return np.sort(np.concatenate(rows)) if rows else np.array([], dtype=np.intp)
+
+    @memoized
     def get_events(self) -> pd.core.frame.DataFrame:
         """
         Position of event data for each team
@@ -38,10 +111,27 @@ class stat_match:
         """
         events = []
         for team in self.teams:
-            events.append(self.df_event.loc[self.df_event.team_name == team, ['x', 'y']])
+            events.append(self.df_event.iloc[self._rows_of(team=team)][['x', 'y']])
     
         return events
 
+    @memoized
+    def get_event_density(self, team: int, bw_adjust: float = 1.) -> tuple:
+        """
+        Event density of a team on the pitch grid, drawn by visuals.display_events
+
+        Args:
+            team (int): team position in self.teams
+            bw_adjust (float, optional): bandwidth factor. Defaults to 1.
+
+        Returns:
+            tuple: x grid, y grid, density
+        """
+        events = self.get_events()[team]
+
+        return density.kde_grid(events.x.to_numpy(), events.y.to_numpy(), bw_adjust)
+
+    @memoized
     def get_shots_compact(self) -> list:
         """
         All shot during the match 
@@ -49,11 +139,11 @@ class stat_match:
         Returns:
             list: shots
         """
-        mask_shots = (self.df_event.type_name == 'Shot')
-        shots = self.df_event.loc[mask_shots, ['x', 'y', 'end_x', 'end_y', 'outcome_name', 'shot_statsbomb_xg', 'player_name', 'team_name']]
+        shots = self.df_event.iloc[self._rows_of('Shot')][['x', 'y', 'end_x', 'end_y', 'outcome_name', 'shot_statsbomb_xg', 'player_name', 'team_name']]
     
         return shots
         
+    @memoized
     def get_shots(self) -> list:
         """
         Shot for each team
@@ -63,11 +153,11 @@ class stat_match:
         """
         shots = []
         for team in self.teams:
-            mask_shots = (self.df_event.type_name == 'Shot') & (self.df_event.team_name == team)
-            shots.append(self.df_event.loc[mask_shots, ['x', 'y', 'end_x', 'end_y', 'outcome_name', 'shot_statsbomb_xg','player_name']])
+            shots.append(self.df_event.iloc[self._rows_of('Shot', team)][['x', 'y', 'end_x', 'end_y', 'outcome_name', 'shot_statsbomb_xg','player_name']])
     
         return shots
     
+    @memoized
     def get_xG(self) -> pd.core.frame.DataFrame:
         """
         Cumulative xG for each shot
@@ -75,12 +165,11 @@ class stat_match:
         Returns:
             pd.core.frame.DataFrame: xG data
         """
-        mask_xG = (self.df_event.type_name == 'Shot')
-        xG = self.df_event.loc[mask_xG, ["period", "minute", "shot_statsbomb_xg", "team_name", "player_name", "outcome_name"]]  
+        xG = self.df_event.iloc[self._rows_of('Shot')][["period", "minute", "shot_statsbomb_xg", "team_name", "player_name", "outcome_name"]]
 
         xG.rename(columns = {"shot_statsbomb_xg":"xG", "outcome_name":"result"}, inplace = True)
         xG.sort_values(by=["team_name","period","minute"], inplace=True)
-        xG['cumul_xG'] = xG.groupby('team_name')['xG'].cumsum()
+        xG['cumul_xG'] = xG.groupby('team_name', observed=True)['xG'].cumsum()
 
         start_rows = pd.DataFrame([
             {'period': 1, 'minute': 0, 'xG': 0., 'team_name': self.teams[0], 'player_name':"start", 'result':"start", 'cumul_xG': 0,},
@@ -90,6 +179,7 @@ class stat_match:
 
         return xG 
 
+    @memoized
     def get_statistics(self) -> pd.core.frame.DataFrame:
         """
         Statistics for each team on various actions 
@@ -98,15 +188,8 @@ class stat_match:
             pd.core.frame.DataFrame: Statistic data
         """
         statistics = {'name': [], self.teams[0]: [], self.teams[1]: [], 'cumul': []}
-        actions = ['Shot', 'Pass', 'Duel', 'Foul Committed', 'Dribble', 'Interception']
-
-        for action in actions:
-            mask = (self.df_event.type_name == action)
-            action_counts = self.df_event.loc[mask, ['team_name']].groupby(['team_name']).size()
-            
-            for team in self.teams:
-                if team not in action_counts:
-                    action_counts[team] = 0
+        for action in timeline.STATISTICS:
+            action_counts = {team: len(self._rows.get((action, team), [])) for team in self.teams}
 
             statistics['name'].append(action)
             statistics[self.teams[0]].append(action_counts[self.teams[0]])
@@ -117,50 +200,68 @@ class stat_match:
 
         return statistics
 
-    def get_passing_network(self) -> tuple:
+    @memoized
+    def get_timeline(self) -> timeline.TimelineIndex:
         """
-        Size, position of players and link between them 
+        Cumulative per-minute counts and xG, for the statistics of any minute range
 
         Returns:
-            tuple: position, line
+            timeline.TimelineIndex: timeline of the match
         """
-        teams_scatter_df = []
-        teams_lines_df = []
-    
+        table = timeline.minute_table(self.df_event.period.to_numpy(), self.df_event.minute.to_numpy(),
+                                      self.df_event.shot_statsbomb_xg.to_numpy(dtype=float), self._rows)
+
+        return timeline.TimelineIndex(table, self.teams, self.last_minute)
+
+    @memoized
+    def _passing_indexes(self) -> list:
+        """
+        Partial sums of the successful passes (throw-ins excluded) of each team
+
+        Returns:
+            list: passing.PassingIndex of each team
+        """
+        indexes = []
         for team in self.teams:
-            #first sub
-            sub = self.df_event.loc[self.df_event["type_name"] == "Substitution"].loc[self.df_event["team_name"] == team].iloc[0]["index"]
-            #successfull passes until the first substitution
-            mask_pass = ((self.df_event.type_name == 'Pass') & (self.df_event.team_name == team) & 
-                         (self.df_event.index < sub) & (self.df_event.outcome_name.isnull()) & 
-                         (self.df_event.sub_type_name != "Throw-in"))
-            df_pass = self.df_event.loc[mask_pass, ['x', 'y', 'end_x', 'end_y', "player_name", "pass_recipient_name"]]
-            #surname of a player
-            df_pass["player_name"] = df_pass["player_name"].apply(lambda x: str(x).split()[-1])
-            df_pass["pass_recipient_name"] = df_pass["pass_recipient_name"].apply(lambda x: str(x).split()[-1])
-    
-            scatter_df = pd.DataFrame()
-            for i, name in enumerate(df_pass["player_name"].unique()):
-                passx = df_pass.loc[df_pass["player_name"] == name]["x"].to_numpy()
-                recx = df_pass.loc[df_pass["pass_recipient_name"] == name]["end_x"].to_numpy()
-                passy = df_pass.loc[df_pass["player_name"] == name]["y"].to_numpy()
-                recy = df_pass.loc[df_pass["pass_recipient_name"] == name]["end_y"].to_numpy()
-                scatter_df.at[i, "player_name"] = name
-                #average x and y location
-                scatter_df.at[i, "x"] = np.mean(np.concatenate([passx, recx]))
-                scatter_df.at[i, "y"] = np.mean(np.concatenate([passy, recy]))
-                #calculate number of passes
-                scatter_df.at[i, "no"] = df_pass.loc[df_pass["player_name"] == name].count().iloc[0]
-
-            scatter_df['marker_size'] = (scatter_df['no'] / scatter_df['no'].max() * 1500)
-    
-            df_pass["pair_key"] = df_pass.apply(lambda x: "_".join(sorted([x["player_name"], x["pass_recipient_name"]])), axis=1)
-            lines_df = df_pass.groupby(["pair_key"]).x.count().reset_index()
-            lines_df.rename({'x':'pass_count'}, axis='columns', inplace=True)
-            #minimum pass
-            lines_df = lines_df[lines_df['pass_count']>2]
-    
-            teams_scatter_df.append(scatter_df)
-            teams_lines_df.append(lines_df)
-    
-        return teams_scatter_df, teams_lines_df
\ No newline at end of file
+            rows = self._rows_of("Pass", team)
+            df_pass = self.df_event.iloc[rows]
+            mask_pass = (df_pass.outcome_name.isnull() & (df_pass.sub_type_name != "Throw-in")).to_numpy()
+            indexes.append(passing.PassingIndex(df_pass.loc[mask_pass], rows[mask_pass], 
+                                                self._rows_of("Substitution", team)))
+
+        return indexes
+
+    def get_passing_network(self, start_minute: float = None, end_minute: float = None) -> tuple:
+        """
+        Size, position of players and link between them, 
+        until the first substitution unless a [start_minute, end_minute) window is given.
+        Windows are not memoized, a few lookups in the partial sums and one per slider position otherwise.
+
+        Args:
+            start_minute (float, optional): first minute. Defaults to None.
+            end_minute (float, optional): excluded last minute. Defaults to None.
+
+        Returns:
+            tuple: position, line
+        """
+        if start_minute is None and end_minute is None:
+            return self.get_passing_network_segment(0)
+
+        networks = [index.network(index.window(start_minute, end_minute)) for index in self._passing_indexes()]
+
+        return [scatter_df for scatter_df, _ in networks], [lines_df for _, lines_df in networks]
+
+    @memoized
+    def get_passing_network_segment(self, segment: int) -> tuple:
+        """
+        Size, position of players and link between them, between two substitutions of each team
+
+        Args:
+            segment (int): number of substitutions before the window, 0 is until the first one
+
+        Returns:
+            tuple: position, line
+        """
+        networks = [index.network(index.segment(segment)) for index in self._passing_indexes()]
+
+        return [scatter_df for scatter_df, _ in networks], [lines_df for _, lines_df in networks]
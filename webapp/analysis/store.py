@@ -0,0 +1,312 @@
+import os
+import time
+import logging
+import argparse
+import tempfile
+import contextlib
+import requests
+import numpy as np
+import pandas as pd
+from mplsoccer import Sbopen, Sblocal
+from analysis import event_stream
+from analysis import timing
+
+logger = logging.getLogger(__name__)
+
+#local store of parsed frames, relative to the directory the app is launched from
+STORE_PATH = os.environ.get("SOCCER_DATA_STORE", "data/store")
+#local StatsBomb open-data layout (matches/<competition>/<season>.json, events/<match>.json)
+FIXTURES_PATH = os.environ.get("SOCCER_DATA_FIXTURES", "data/statsbomb")
+#offline mode never reaches the StatsBomb repository
+OFFLINE = os.environ.get("SOCCER_DATA_OFFLINE", "0") == "1"
+#seconds a stored competition or match list is trusted by callers that look for new and updated matches
+REFRESH_SECONDS = float(os.environ.get("SOCCER_DATA_REFRESH_SECONDS", "600"))
+#seconds after which a lock file left by a process that died holding it is taken over
+LOCK_SECONDS = 30
+
+def competition_path() -> str:
+    """
+    Store path of the competition frame
+
+    Returns:
+        str: parquet file path
+    """
+    return os.path.join(STORE_PATH, "competitions.parquet")
+
+def match_path(competition_id: int, season_id: int) -> str:
+    """
+    Store path of the match frame of a season
+
+    Args:
+        competition_id (int): competition id
+        season_id (int): season id
+
+    Returns:
+        str: parquet file path
+    """
+    return os.path.join(STORE_PATH, str(competition_id), str(season_id), "matches.parquet")
+
+def event_path(competition_id: int, season_id: int, match_id: int) -> str:
+    """
+    Store path of the event frame of a match
+
+    Args:
+        competition_id (int): competition id
+        season_id (int): season id
+        match_id (int): match id
+
+    Returns:
+        str: parquet file path
+    """
+    return os.path.join(STORE_PATH, str(competition_id), str(season_id), "events", f"{int(match_id)}.parquet")
+
+def _expired(path: str, max_age: float = None) -> bool:
+    """
+    Whether a stored frame was fetched more than max_age seconds ago, None never expires
+    """
+    return max_age is not None and time.time() - os.path.getmtime(path) >= max_age
+
+def temp_path(path: str, directory: bool = False) -> str:
+    """
+    Unique temporary file or directory next to path, swapped in with os.replace
+
+    Args:
+        path (str): destination
+        directory (bool, optional): create a directory. Defaults to False.
+
+    Returns:
+        str: temporary path, created empty
+    """
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    prefix = f"{os.path.basename(path)}."
+    if directory:
+        return tempfile.mkdtemp(suffix=".tmp", prefix=prefix, dir=parent)
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", prefix=prefix, dir=parent)
+    os.close(fd)
+
+    return tmp_path
+
+def save(df: pd.core.frame.DataFrame, path: str):
+    """
+    Atomic parquet write, concurrent readers never see a partial file
+
+    Args:
+        df (pd.core.frame.DataFrame): frame to save
+        path (str): destination
+    """
+    tmp_path = temp_path(path)
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+@contextlib.contextmanager
+def lock(path: str, timeout: float = LOCK_SECONDS):
+    """
+    Exclusive lock of a file between processes and threads, held by creating path.lock with O_EXCL
+
+    Args:
+        path (str): locked file
+        timeout (float, optional): age of an abandoned lock file. Defaults to LOCK_SECONDS.
+    """
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(lock_path).st_mtime > timeout:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.005)
+    try:
+        yield
+    finally:
+        os.remove(lock_path)
+
+@timing.timed("store.fetch_competitions")
+def _fetch_competitions() -> pd.core.frame.DataFrame:
+    """
+    Competition frame from the local fixtures in offline mode, from StatsBomb otherwise
+    """
+    if OFFLINE:
+        path = os.path.join(FIXTURES_PATH, "competitions.json")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"offline mode: no competition fixture {path}")
+        return Sblocal().competition(path)
+
+    return Sbopen().competition()
+
+@timing.timed("store.fetch_matches")
+def _fetch_matches(competition_id: int, season_id: int) -> pd.core.frame.DataFrame:
+    """
+    Match frame from the local fixtures in offline mode, from StatsBomb otherwise
+    """
+    if OFFLINE:
+        path = os.path.join(FIXTURES_PATH, "matches", str(competition_id), f"{season_id}.json")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"offline mode: no match fixture {path}")
+        return Sblocal().match(path)
+
+    return Sbopen().match(competition_id=competition_id, season_id=season_id)
+
+@timing.timed("store.fetch_events")
+def _fetch_events(match_id: int) -> pd.core.frame.DataFrame:
+    """
+    Event frame from the local fixtures in offline mode, from StatsBomb otherwise,
+    streamed so that only the event_stream.EVENT_COLUMNS are ever materialized
+    """
+    if OFFLINE:
+        path = os.path.join(FIXTURES_PATH, "events", f"{int(match_id)}.json")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"offline mode: no stored events and no fixture {path}")
+        return event_stream.read_events(path)
+
+    with requests.get(f"{Sbopen().url}events/{int(match_id)}.json", stream=True) as response:
+        response.raise_for_status()
+        return event_stream.read_events(event_stream.open_stream(response))
+
+def _refresh(path: str, fetch, max_age: float = None) -> tuple:
+    """
+    Stored frame, fetched again once older than max_age, the stored one is kept when the fetch fails
+
+    Args:
+        path (str): store path
+        fetch (callable): returns the frame from StatsBomb or the fixtures
+        max_age (float, optional): seconds the stored frame is trusted. Defaults to None, forever.
+
+    Returns:
+        tuple: frame, stored frame it replaced or None
+    """
+    if os.path.exists(path) and not _expired(path, max_age):
+        return pd.read_parquet(path), None
+
+    previous = pd.read_parquet(path) if os.path.exists(path) else None
+    try:
+        df = fetch()
+    except Exception as error:
+        if previous is None:
+            raise
+        logger.warning("%s not refreshed: %s", path, error)
+        #tried again after another max_age
+        os.utime(path)
+        return previous, None
+    save(df, path)
+
+    return df, previous
+
+@timing.timed("store.load_competitions")
+def load_competitions(max_age: float = None) -> pd.core.frame.DataFrame:
+    """
+    Every competition and season, parsed once then read from the store, fetched again once older than max_age
+
+    Args:
+        max_age (float, optional): seconds the stored frame is trusted. Defaults to None, forever.
+
+    Returns:
+        pd.core.frame.DataFrame: one row per competition season
+    """
+    return _refresh(competition_path(), _fetch_competitions, max_age)[0]
+
+@timing.timed("store.load_matches")
+def load_matches(competition_id: int, season_id: int, max_age: float = None) -> pd.core.frame.DataFrame:
+    """
+    Match frame of a season, parsed once then read from the store, fetched again once older than max_age.
+    Stored events of the matches StatsBomb updated since are dropped, they are fetched again on next use.
+
+    Args:
+        competition_id (int): competition id
+        season_id (int): season id
+        max_age (float, optional): seconds the stored frame is trusted. Defaults to None, forever.
+
+    Returns:
+        pd.core.frame.DataFrame: information on each match
+    """
+    df_match, previous = _refresh(match_path(competition_id, season_id),
+                                  lambda: _fetch_matches(competition_id, season_id), max_age)
+    if previous is not None:
+        _drop_updated_events(competition_id, season_id, previous, df_match)
+
+    return df_match
+
+def _drop_updated_events(competition_id: int, season_id: int, previous: pd.core.frame.DataFrame, df_match: pd.core.frame.DataFrame):
+    """
+    Remove the stored events of the matches whose last_updated or last_updated_360 changed
+    """
+    columns = [column for column in ["last_updated", "last_updated_360"] if column in previous and column in df_match]
+    if not columns:
+        return
+    merged = df_match[["match_id"] + columns].merge(previous[["match_id"] + columns], on="match_id", suffixes=("", "_stored"))
+    updated = np.zeros(len(merged), dtype=bool)
+    for column in columns:
+        updated |= merged[column].astype(str).to_numpy() != merged[f"{column}_stored"].astype(str).to_numpy()
+    for match_id in merged.match_id[updated]:
+        logger.info("match %s updated, stored events dropped", match_id)
+        try:
+            os.remove(event_path(competition_id, season_id, match_id))
+        except FileNotFoundError:
+            pass
+
+@timing.timed("store.load_events")
+def load_events(match_id: int, competition_id: int = 43, season_id: int = 106) -> pd.core.frame.DataFrame:
+    """
+    Event frame of a match, parsed once then read from the store
+
+    Args:
+        match_id (int): match id
+        competition_id (int, optional): competition id. Defaults to 43.
+        season_id (int, optional): season id. Defaults to 106.
+
+    Returns:
+        pd.core.frame.DataFrame: events of the match
+    """
+    path = event_path(competition_id, season_id, match_id)
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+
+    df_event = _fetch_events(match_id)
+    save(df_event, path)
+
+    return df_event
+
+def seed(competition_id: int, season_id: int, fixtures_path: str = None) -> int:
+    """
+    Fill the store with every match of a season from local StatsBomb JSON files
+
+    Args:
+        competition_id (int): competition id
+        season_id (int): season id
+        fixtures_path (str, optional): open-data directory. Defaults to FIXTURES_PATH.
+
+    Returns:
+        int: number of matches stored
+    """
+    fixtures_path = fixtures_path or FIXTURES_PATH
+    parser = Sblocal()
+
+    if os.path.exists(os.path.join(fixtures_path, "competitions.json")):
+        save(parser.competition(os.path.join(fixtures_path, "competitions.json")), competition_path())
+
+    df_match = parser.match(os.path.join(fixtures_path, "matches", str(competition_id), f"{season_id}.json"))
+    save(df_match, match_path(competition_id, season_id))
+
+    count = 0
+    for match_id in df_match.match_id:
+        path = os.path.join(fixtures_path, "events", f"{match_id}.json")
+        if os.path.exists(path):
+            save(event_stream.read_events(path), event_path(competition_id, season_id, match_id))
+            count += 1
+
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed the local event store from StatsBomb JSON files")
+    parser.add_argument("--competition", type=int, default=43)
+    parser.add_argument("--season", type=int, default=106)
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    args = parser.parse_args()
+
+    print(f"{seed(args.competition, args.season, args.fixtures)} matches stored in {STORE_PATH}")
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+from analysis import passing
+
+#actions of the statistics chart
+STATISTICS = ['Shot', 'Pass', 'Duel', 'Foul Committed', 'Dribble', 'Interception']
+#minutes of the momentum window
+MOMENTUM_WINDOW = 5
+
+def minute_table(periods: np.ndarray, minutes: np.ndarray, xG: np.ndarray, rows: dict) -> pd.core.frame.DataFrame:
+    """
+    Events of each minute of each period, team and action, from the grouped row positions of a match
+
+    Args:
+        periods (np.ndarray): period of every event
+        minutes (np.ndarray): minute of every event
+        xG (np.ndarray): shot xG of every event, NaN for other events
+        rows (dict): row positions of each (type_name, team_name)
+
+    Returns:
+        pd.core.frame.DataFrame: period, minute, team_name, type_name, count, xG
+    """
+    #match clock of passing.PassingIndex
+    clock = periods.astype(np.int64) * passing.PERIOD_MINUTES + minutes
+    tables = []
+    for (action, team), positions in rows.items():
+        key, inverse, count = np.unique(clock[positions], return_inverse=True, return_counts=True)
+        tables.append(pd.DataFrame({
+            "period": (key // passing.PERIOD_MINUTES).astype(np.int64),
+            "minute": (key % passing.PERIOD_MINUTES).astype(np.int64),
+            "team_name": team,
+            "type_name": action,
+            "count": count.astype(np.int64),
+            "xG": np.bincount(inverse, np.nan_to_num(xG[positions]), minlength=len(key)),
+        }))
+    columns = ["period", "minute", "team_name", "type_name", "count", "xG"]
+
+    return pd.concat(tables, ignore_index=True)[columns] if tables else pd.DataFrame(columns=columns)
+
+class TimelineIndex:
+
+    def __init__(self, table: pd.core.frame.DataFrame, teams: list, last_minute: int):
+        """
+        Cumulative per-minute counts of each (team, action) and cumulative xG of each team, one run per period
+        as the passing windows (first half stoppage time is not mixed with the second half restart at 45),
+        any [start_minute, end_minute) window is two lookups per period
+
+        Args:
+            table (pd.core.frame.DataFrame): events per period and minute, from minute_table
+            teams (list): team names
+            last_minute (int): minutes of the match, later events count in the last one
+        """
+        self.table = table
+        self.teams = list(teams)
+        self.last_minute = int(last_minute)
+        self.actions = np.unique(table.type_name.astype(str).to_numpy())
+
+        period = table.period.to_numpy(dtype=np.int64)
+        minute = np.clip(table.minute.to_numpy(dtype=np.int64), 0, self.last_minute - 1)
+        team = pd.Categorical(table.team_name.astype(str), categories=self.teams).codes.astype(np.int64)
+        action = np.searchsorted(self.actions, table.type_name.astype(str).to_numpy())
+        known = team >= 0
+        period, minute, team, action = period[known], minute[known], team[known], action[known]
+        n_teams, n_actions = len(self.teams), len(self.actions)
+
+        #first and last minute of each period, the first period from kick-off
+        self.periods = np.unique(period)
+        spans = pd.DataFrame({"period": period, "minute": minute}).groupby("period").minute.agg(["min", "max"])
+        self.spans = [(int(p), 0 if i == 0 else int(spans.loc[p, "min"]), int(spans.loc[p, "max"]))
+                      for i, p in enumerate(self.periods)] or [(1, 0, self.last_minute - 1)]
+        slot = np.searchsorted(self.periods, period) * self.last_minute + minute
+        size = len(self.periods) * self.last_minute
+
+        def cumulative(keys, weights, width):
+            sums = np.bincount(keys, weights, minlength=size * width).reshape(len(self.periods), self.last_minute, width)
+            #row m of a period holds its events before minute m
+            return np.concatenate([np.zeros((len(self.periods), 1, width)), sums.cumsum(axis=1)], axis=1)
+
+        counts = cumulative((slot * n_teams + team) * n_actions + action, table["count"].to_numpy(dtype=float)[known], n_teams * n_actions)
+        self.counts = counts.round().astype(np.int64).reshape(len(self.periods), -1, n_teams, n_actions)
+        self.xG = cumulative(slot * n_teams + team, table["xG"].to_numpy(dtype=float)[known], n_teams)
+
+    def _bounds(self, start_minute: float = None, end_minute: float = None) -> tuple:
+        """
+        Rows of the cumulative arrays around a [start_minute, end_minute) window
+
+        Returns:
+            tuple: first row, last row
+        """
+        start = 0 if start_minute is None else int(np.clip(np.ceil(start_minute), 0, self.last_minute))
+        end = self.last_minute if end_minute is None else int(np.clip(np.ceil(end_minute), 0, self.last_minute))
+
+        return start, max(start, end)
+
+    def count(self, action: str, start_minute: float = None, end_minute: float = None) -> np.ndarray:
+        """
+        Events of an action in a window
+
+        Args:
+            action (str): type_name
+            start_minute (float, optional): first minute. Defaults to None, kick-off.
+            end_minute (float, optional): excluded last minute. Defaults to None, end of the match.
+
+        Returns:
+            np.ndarray: count of each team
+        """
+        a, b = self._bounds(start_minute, end_minute)
+        column = np.searchsorted(self.actions, action)
+        if column == len(self.actions) or self.actions[column] != action:
+            return np.zeros(len(self.teams), dtype=np.int64)
+
+        return (self.counts[:, b, :, column] - self.counts[:, a, :, column]).sum(axis=0)
+
+    def statistics(self, start_minute: float = None, end_minute: float = None, actions: list = STATISTICS) -> pd.core.frame.DataFrame:
+        """
+        Statistics for each team on various actions in a window, as stat_match.get_statistics
+
+        Args:
+            start_minute (float, optional): first minute. Defaults to None, kick-off.
+            end_minute (float, optional): excluded last minute. Defaults to None, end of the match.
+            actions (list, optional): type_name of each row. Defaults to STATISTICS.
+
+        Returns:
+            pd.core.frame.DataFrame: Statistic data
+        """
+        counts = np.array([self.count(action, start_minute, end_minute) for action in actions]).reshape(len(actions), len(self.teams))
+        statistics = pd.DataFrame({'name': list(actions), self.teams[0]: counts[:, 0], self.teams[1]: counts[:, 1]})
+        statistics['cumul'] = counts.sum(axis=1)
+
+        return statistics
+
+    def xG_delta(self, start_minute: float = None, end_minute: float = None) -> np.ndarray:
+        """
+        xG created in a window
+
+        Args:
+            start_minute (float, optional): first minute. Defaults to None, kick-off.
+            end_minute (float, optional): excluded last minute. Defaults to None, end of the match.
+
+        Returns:
+            np.ndarray: xG of each team
+        """
+        a, b = self._bounds(start_minute, end_minute)
+
+        return (self.xG[:, b] - self.xG[:, a]).sum(axis=0)
+
+    def momentum(self, window: int = MOMENTUM_WINDOW) -> pd.core.frame.DataFrame:
+        """
+        xG of each team over the last window minutes of the match clock, at the end of every minute of every period
+
+        Args:
+            window (int, optional): minutes. Defaults to MOMENTUM_WINDOW.
+
+        Returns:
+            pd.core.frame.DataFrame: period, minute, xG of each team, momentum (first team minus second team)
+        """
+        period = np.concatenate([np.full(last + 1 - first, p) for p, first, last in self.spans])
+        end = np.concatenate([np.arange(first + 1, last + 2) for _, first, last in self.spans])
+        if len(self.periods):
+            row = np.searchsorted(self.periods, period)
+            minute_xG = self.xG[row, end] - self.xG[row, end - 1]
+        else:
+            minute_xG = np.zeros((len(end), len(self.teams)))
+        cumulative = np.concatenate([np.zeros((1, len(self.teams))), minute_xG.cumsum(axis=0)])
+        slots = np.arange(1, len(end) + 1)
+        recent = cumulative[slots] - cumulative[np.maximum(slots - window, 0)]
+        momentum = pd.DataFrame({'period': period, 'minute': end, self.teams[0]: recent[:, 0], self.teams[1]: recent[:, 1]})
+        momentum['momentum'] = recent[:, 0] - recent[:, 1]
+
+        return momentum
@@ -0,0 +1,129 @@
+import os
+import time
+import logging
+import functools
+import contextlib
+import contextvars
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+#log a record for every stage of every page run
+ENABLED = os.environ.get("SOCCER_DATA_TIMING", "0") == "1"
+
+#stages of the current page run when its performance panel is open, None otherwise
+_records = contextvars.ContextVar("timing_records", default=None)
+_depth = contextvars.ContextVar("timing_depth", default=0)
+_disabled = contextlib.nullcontext()
+
+class _Stage:
+
+    __slots__ = ("record", "records", "start", "token")
+
+    def __init__(self, name: str, fields: dict, records: list):
+        """
+        Timed stage, recorded in start order with its nesting depth
+
+        Args:
+            name (str): stage name
+            fields (dict): context of the stage (chart, table, rows...)
+            records (list): records of the page run, None when only logged
+        """
+        self.record = {"stage": name, "depth": _depth.get(), "ms": None, **fields}
+        self.records = records
+
+    def __enter__(self):
+        if self.records is not None:
+            self.records.append(self.record)
+        self.token = _depth.set(self.record["depth"] + 1)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.record["ms"] = (time.perf_counter() - self.start) * 1e3
+        _depth.reset(self.token)
+        if ENABLED:
+            logger.info("%s %.2f ms", self.record["stage"], self.record["ms"], extra={"timing": self.record})
+        return False
+
+def start(collect: bool = True) -> list:
+    """
+    Collect the stages of the current page run, called at the top of a page
+
+    Args:
+        collect (bool, optional): record the stages. Defaults to True.
+
+    Returns:
+        list: records filled as the page runs, None when not collecting
+    """
+    records = [] if collect else None
+    _records.set(records)
+    _depth.set(0)
+
+    return records
+
+def stage(name: str, **fields):
+    """
+    Context manager timing a block, a shared no-op when nothing collects or logs
+
+    Args:
+        name (str): stage name
+
+    Returns:
+        context manager
+    """
+    records = _records.get()
+    if records is None and not ENABLED:
+        return _disabled
+
+    return _Stage(name, fields, records)
+
+def timed(name: str):
+    """
+    Decorator timing every call of a function as a stage
+
+    Args:
+        name (str): stage name
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            records = _records.get()
+            if records is None and not ENABLED:
+                return function(*args, **kwargs)
+            with _Stage(name, {}, records):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+def table(records: list) -> pd.core.frame.DataFrame:
+    """
+    Records of a page run for the performance panel, nested stages indented under their parent
+
+    Args:
+        records (list): output of start
+
+    Returns:
+        pd.core.frame.DataFrame: stage, milliseconds and context of each stage
+    """
+    df = pd.DataFrame(records, columns=["stage", "depth", "ms"] + sorted({key for record in records for key in record} - {"stage", "depth", "ms"}))
+    df["stage"] = ["· " * depth + stage for stage, depth in zip(df["stage"], df["depth"])]
+
+    return df.drop(columns="depth").round({"ms": 2})
+
+def summary(records: list) -> pd.core.frame.DataFrame:
+    """
+    Calls and time of each stage name over a page run
+
+    Args:
+        records (list): output of start
+
+    Returns:
+        pd.core.frame.DataFrame: one row per stage name, slowest first
+    """
+    df = pd.DataFrame(records, columns=["stage", "depth", "ms"])
+
+    return (df.groupby("stage")["ms"].agg(calls="count", total_ms="sum", max_ms="max")
+              .sort_values("total_ms", ascending=False).round(2).reset_index())
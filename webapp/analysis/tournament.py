@@ -0,0 +1,273 @@
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from analysis import competition
+from analysis import outcome
+from analysis import timing
+
+logger = logging.getLogger(__name__)
+
+#simulated tournaments
+SIMULATIONS = 100_000
+#tournaments of one worker task, fixed so results do not depend on the worker count
+CHUNK = 10_000
+#knockout stages off the path to the final
+PLACEMENT_STAGES = ['3rd Place Final']
+#extra time is a third of a match
+EXTRA_TIME = 1 / 3
+
+def team_rates(df_match: pd.core.frame.DataFrame, load=outcome.load_match) -> pd.core.frame.DataFrame:
+    """
+    xG created and conceded per match by each team
+
+    Args:
+        df_match (pd.core.frame.DataFrame): matches from competition.get_competition
+        load (callable, optional): (id_match, competition_id, season_id) to match. Defaults to outcome.load_match.
+
+    Returns:
+        pd.core.frame.DataFrame: matches, xG_for and xG_against per match, indexed by team_name
+    """
+    rows = []
+    for _, row in df_match.iterrows():
+        match = load(row.match_id, row.competition_id, row.season_id)
+        teams = list(match.teams)
+        shots = outcome.shot_matrix([match.get_xG()], [teams])[0].sum(axis=1)
+        for team, xG_for, xG_against in zip(teams, shots, shots[::-1]):
+            rows.append({'team_name': team, 'matches': 1, 'xG_for': xG_for, 'xG_against': xG_against})
+
+    rates = pd.DataFrame(rows, columns=['team_name', 'matches', 'xG_for', 'xG_against']).groupby('team_name').sum()
+    rates[['xG_for', 'xG_against']] = rates[['xG_for', 'xG_against']].div(rates.matches, axis=0)
+
+    return rates
+
+def bracket(df_match: pd.core.frame.DataFrame, from_stage: str = None) -> tuple:
+    """
+    Knockout bracket of a competition: the last stages by date whose match count halves down to the final
+
+    Args:
+        df_match (pd.core.frame.DataFrame): matches from competition.get_competition
+        from_stage (str, optional): first simulated stage, earlier results are kept. Defaults to None, the first knockout stage.
+
+    Returns:
+        tuple: stage names, team pairs of the first stage (matches, 2), feeder matches of each later stage (matches, 2)
+    """
+    df = df_match.loc[~df_match.competition_stage_name.isin(PLACEMENT_STAGES)].sort_values(['match_date', 'match_id'])
+    stages = list(df.groupby('competition_stage_name', sort=False).match_date.min().sort_values().index)
+    sizes = df.competition_stage_name.value_counts()
+
+    knockout = [stages[-1]]
+    for stage in stages[-2::-1]:
+        if sizes[stage] != 2 * sizes[knockout[0]]:
+            break
+        knockout.insert(0, stage)
+    if from_stage is not None:
+        if from_stage not in knockout:
+            raise ValueError(f"{from_stage} is not a knockout stage, expected one of {knockout}")
+        knockout = knockout[knockout.index(from_stage):]
+
+    fixtures = [df.loc[df.competition_stage_name == stage, ['home_team_name', 'away_team_name']].to_numpy() for stage in knockout]
+    feeders = []
+    for previous, current in zip(fixtures, fixtures[1:]):
+        played = {team: i for i, pair in enumerate(previous) for team in pair}
+        stage_feeders, used = [], set()
+        for pair in current:
+            matches = [played.get(team) for team in pair]
+            if None in matches or matches[0] == matches[1] or used & set(matches):
+                continue
+            stage_feeders.append(matches)
+            used.update(matches)
+        #pairs the played matches do not tell, in match order
+        left = [i for i in range(len(previous)) if i not in used]
+        stage_feeders += [left[i:i + 2] for i in range(0, len(left), 2)]
+        feeders.append(np.array(stage_feeders, dtype=np.intp))
+
+    return knockout, fixtures[0], feeders
+
+def _winner(row, later: set, load=outcome.load_match) -> str:
+    """
+    Winner of a played knockout match: the score, the team that played on after a draw, the penalty shootout otherwise
+
+    Returns:
+        str: team name, None when the shootout is not in the events
+    """
+    home, away = row.home_team_name, row.away_team_name
+    if row.home_score != row.away_score:
+        return home if row.home_score > row.away_score else away
+    for team in (home, away):
+        if team in later:
+            return team
+    xG = load(row.match_id, row.competition_id, row.season_id).get_xG()
+    goals = xG.loc[(xG.period == 5) & (xG.result == "Goal")].team_name.astype(str).value_counts()
+    if goals.get(home, 0) == goals.get(away, 0):
+        return None
+
+    return home if goals.get(home, 0) > goals.get(away, 0) else away
+
+def results(df_match: pd.core.frame.DataFrame, stages: list, fixtures: np.ndarray, feeders: list,
+            load=outcome.load_match) -> list:
+    """
+    Winner of each played match of the bracket, in the order the simulation plays them
+
+    Args:
+        df_match (pd.core.frame.DataFrame): matches from competition.get_competition
+        stages (list): stage names from bracket
+        fixtures (np.ndarray): team pairs of the first stage from bracket
+        feeders (list): feeder matches of each later stage from bracket
+        load (callable, optional): (id_match, competition_id, season_id) to match, for drawn finals. Defaults to outcome.load_match.
+
+    Returns:
+        list: winner name of each match of each stage, None for the ties still to play
+    """
+    df = df_match.loc[df_match.competition_stage_name.isin(stages) & df_match.home_score.notna() & df_match.away_score.notna()]
+    played = {}
+    for i, stage in enumerate(stages):
+        later = set(df.loc[df.competition_stage_name.isin(stages[i + 1:]), ['home_team_name', 'away_team_name']].to_numpy().ravel())
+        for row in df.loc[df.competition_stage_name == stage].itertuples(index=False):
+            played[(stage, frozenset((row.home_team_name, row.away_team_name)))] = _winner(row, later, load)
+
+    winners = [[played.get((stages[0], frozenset(pair))) for pair in fixtures]]
+    #a later match is known once both its feeder matches are
+    for stage, stage_feeders in zip(stages[1:], feeders):
+        pairs = [[winners[-1][i] for i in feeder] for feeder in stage_feeders]
+        winners.append([None if None in pair else played.get((stage, frozenset(pair))) for pair in pairs])
+
+    return winners
+
+def _play(teams: np.ndarray, xG_for: np.ndarray, xG_against: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Knockout matches of every simulation: Poisson goals, extra time, then a penalty shootout
+
+    Args:
+        teams (np.ndarray): team indices (simulations, matches, 2)
+        xG_for (np.ndarray): xG created per match of each team
+        xG_against (np.ndarray): xG conceded per match of each team
+        rng (np.random.Generator): random generator
+
+    Returns:
+        np.ndarray: winner indices (simulations, matches)
+    """
+    home, away = teams[..., 0], teams[..., 1]
+    #expected goals of a side: its attack against the other defence
+    rate_home = (xG_for[home] + xG_against[away]) / 2
+    rate_away = (xG_for[away] + xG_against[home]) / 2
+    margin = rng.poisson(rate_home) - rng.poisson(rate_away)
+
+    draw = margin == 0
+    margin[draw] = rng.poisson(rate_home[draw] * EXTRA_TIME) - rng.poisson(rate_away[draw] * EXTRA_TIME)
+    shootout = draw & (margin == 0)
+    margin[shootout] = np.where(rng.random(shootout.sum()) < 0.5, 1, -1)
+
+    return np.where(margin > 0, home, away)
+
+def _simulate_chunk(fixtures: np.ndarray, feeders: list, xG_for: np.ndarray, xG_against: np.ndarray,
+                    simulations: int, seed: np.random.SeedSequence, fixed: list = None) -> np.ndarray:
+    """
+    Tournaments of one worker task, every simulation of a round played at once,
+    the fixed winners (team index, -1 for the ties to play) of each stage replace the simulated ones
+
+    Returns:
+        np.ndarray: appearances (stages + 1, teams), the last row counts the wins
+    """
+    rng = np.random.default_rng(seed)
+    reached = np.zeros((len(feeders) + 2, len(xG_for)), dtype=np.int64)
+    teams = np.broadcast_to(fixtures, (simulations,) + fixtures.shape)
+    for stage in range(len(feeders) + 1):
+        reached[stage] = np.bincount(teams.ravel(), minlength=len(xG_for))
+        winners = _play(teams, xG_for, xG_against, rng)
+        if fixed is not None:
+            known = fixed[stage] >= 0
+            winners[:, known] = fixed[stage][known]
+        if stage < len(feeders):
+            teams = winners[:, feeders[stage]]
+    reached[-1] = np.bincount(winners.ravel(), minlength=len(xG_for))
+
+    return reached
+
+@timing.timed("tournament.simulate")
+def simulate(stages: list, fixtures: np.ndarray, feeders: list, rates: pd.core.frame.DataFrame,
+             simulations: int = SIMULATIONS, seed: int = 0, workers: int = None, chunk: int = CHUNK,
+             winners: list = None) -> pd.core.frame.DataFrame:
+    """
+    Knockout bracket played many times, chunks of simulations spread over a process pool
+
+    Args:
+        stages (list): stage names from bracket
+        fixtures (np.ndarray): team pairs of the first stage from bracket
+        feeders (list): feeder matches of each later stage from bracket
+        rates (pd.core.frame.DataFrame): xG_for and xG_against per match of each team from team_rates
+        simulations (int, optional): simulated tournaments. Defaults to SIMULATIONS.
+        seed (int, optional): random seed, the results do not depend on the workers. Defaults to 0.
+        workers (int, optional): processes, 1 runs in this process. Defaults to None, one per core.
+        chunk (int, optional): simulations of a worker task. Defaults to CHUNK.
+        winners (list, optional): winner of the played matches from results, kept in every simulation. Defaults to None, every match is played.
+
+    Returns:
+        pd.core.frame.DataFrame: probability of each team to reach each stage and to win, favourites first
+    """
+    teams = np.unique(fixtures)
+    #teams without a rated match play as the average team
+    rates = rates.reindex(teams).fillna(rates[['xG_for', 'xG_against']].mean())
+    xG_for, xG_against = rates.xG_for.to_numpy(dtype=float), rates.xG_against.to_numpy(dtype=float)
+    indices = np.searchsorted(teams, fixtures)
+    fixed = None if winners is None else [np.array([-1 if team is None else np.searchsorted(teams, team) for team in stage],
+                                                   dtype=np.intp) for stage in winners]
+
+    sizes = [min(chunk, simulations - start) for start in range(0, simulations, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(indices, feeders, xG_for, xG_against, size, child, fixed) for size, child in zip(sizes, seeds)]
+    if workers == 1:
+        reached = sum(_simulate_chunk(*arg) for arg in args)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            reached = sum(executor.map(_simulate_chunk, *zip(*args)))
+
+    df = pd.DataFrame(reached.T / simulations, index=pd.Index(teams, name='team_name'), columns=list(stages) + ['Winner'])
+
+    return df.sort_values(['Winner'] + list(stages)[::-1], ascending=False)
+
+def simulate_competition(competition_id: int = 43, season_id: int = 106, from_stage: str = None,
+                         simulations: int = SIMULATIONS, seed: int = 0, workers: int = None,
+                         replay: bool = False) -> pd.core.frame.DataFrame:
+    """
+    Remaining knockout bracket of a competition played many times, team rates from the matches before it
+
+    Args:
+        competition_id (int, optional): competition id. Defaults to 43.
+        season_id (int, optional): season id. Defaults to 106.
+        from_stage (str, optional): first simulated stage. Defaults to None, the first knockout stage.
+        simulations (int, optional): simulated tournaments. Defaults to SIMULATIONS.
+        seed (int, optional): random seed. Defaults to 0.
+        workers (int, optional): processes. Defaults to None, one per core.
+        replay (bool, optional): play the matches already played too. Defaults to False, their winners are kept.
+
+    Returns:
+        pd.core.frame.DataFrame: probability of each team to reach each stage and to win
+    """
+    df_match = competition.get_competition(competition_id, season_id)
+    stages, fixtures, feeders = bracket(df_match, from_stage)
+    #rates from the matches played before the simulated stages, every match if there is none
+    start = df_match.loc[df_match.competition_stage_name == stages[0], 'match_date'].min()
+    played = df_match.loc[df_match.match_date < start]
+    rates = team_rates(played if len(played) else df_match)
+    winners = None if replay else results(df_match, stages, fixtures, feeders)
+    kept = 0 if winners is None else sum(team is not None for stage in winners for team in stage)
+    logger.info("%d simulations of %s from %d teams, %d played matches kept", simulations, " > ".join(stages), fixtures.size, kept)
+
+    return simulate(stages, fixtures, feeders, rates, simulations, seed, workers, winners=winners)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play the knockout bracket of a competition many times")
+    parser.add_argument("--competition", type=int, default=43)
+    parser.add_argument("--season", type=int, default=106)
+    parser.add_argument("--from-stage", default=None)
+    parser.add_argument("--simulations", type=int, default=SIMULATIONS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--replay", action="store_true", help="play the matches already played too")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    df = simulate_competition(args.competition, args.season, args.from_stage, args.simulations, args.seed, args.workers, args.replay)
+    print(df.round(3).to_string())
@@ -4,24 +4,28 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 
 from mplsoccer import Pitch, Sbopen, VerticalPitch
+from analysis import density as event_density
 
 
-def display_events(events : pd.core.frame.DataFrame, color: str):
+def display_events(events : pd.core.frame.DataFrame, color: str, density: tuple = None):
     """
     KDE plot on event team 
 
     Args:
         events (pd.core.frame.DataFrame): all events
         color (str): team cmap color
+        density (tuple, optional): x grid, y grid and density from stat_match.get_event_density. Defaults to None, computed from the events.
 
     """
     pitch = Pitch(line_color='#1c2632', line_zorder=2, 
                   corner_arcs=True, linewidth=1.5)
     fig, ax = pitch.draw(figsize=(4.4, 6.4))
 
-    kde = pitch.kdeplot(events.x, events.y, ax=ax, 
-                        fill=True, levels=25, thresh=0, 
-                        cut=20, cmap=color)
+    if density is None:
+        density = event_density.kde_grid(events.x.to_numpy(), events.y.to_numpy())
+    xs, ys, values = density
+    #same levels as pitch.kdeplot(levels=25, thresh=0, cut=20)
+    kde = ax.contourf(xs, ys, values, levels=event_density.iso_levels(values, levels=25, thresh=0), cmap=color)
     
     return fig
 
@@ -44,23 +48,20 @@ def display_passing_network(scatter_df: pd.core.frame.DataFrame, lines_df: pd.co
     #scatter
     pitch.scatter(scatter_df.x, scatter_df.y, s=scatter_df.marker_size, color=color, 
                   edgecolors='grey', linewidth=1, alpha=1, ax=ax["pitch"], zorder = 3)
-    for i, row in scatter_df.iterrows():
-        pitch.annotate(row.player_name, xy=(row.x, row.y), c='black', va='center', 
+    for name, x, y in zip(scatter_df.player_name, scatter_df.x, scatter_df.y):
+        pitch.annotate(name, xy=(x, y), c='black', va='center', 
                        ha='center', weight = "bold", size=16, ax=ax["pitch"], zorder = 4)
     
-    #arrow
-    for i, row in lines_df.iterrows():     
-        player1 = row["pair_key"].split("_")[0]
-        player2 = row['pair_key'].split("_")[1]
+    #lines, one collection
+    if len(lines_df):
+        players = lines_df["pair_key"].str.split("_", n=1, expand=True)
         #take the average location of players to plot a line between them
-        player1_x = scatter_df.loc[scatter_df["player_name"] == player1]['x'].iloc[0]
-        player1_y = scatter_df.loc[scatter_df["player_name"] == player1]['y'].iloc[0]
-        player2_x = scatter_df.loc[scatter_df["player_name"] == player2]['x'].iloc[0]
-        player2_y = scatter_df.loc[scatter_df["player_name"] == player2]['y'].iloc[0]
-        num_passes = row["pass_count"]
+        positions = scatter_df.set_index("player_name")[["x", "y"]]
+        player1 = positions.reindex(players[0]).to_numpy()
+        player2 = positions.reindex(players[1]).to_numpy()
         #adjust the line width so that the more passes, the wider the line
-        line_width = (num_passes / lines_df['pass_count'].max() * 10)
-        pitch.lines(player1_x, player1_y, player2_x, player2_y,alpha=1, 
+        line_width = (lines_df["pass_count"] / lines_df['pass_count'].max() * 10).to_numpy()
+        pitch.lines(player1[:, 0], player1[:, 1], player2[:, 0], player2[:, 1], alpha=1, 
                     lw=line_width, zorder=2, color=color, ax = ax["pitch"])
     
     return fig
@@ -83,14 +84,15 @@ def display_shots_separate_pitch(shots: pd.core.frame.DataFrame, teams: np.ndarr
     #each team
     for i, ax in enumerate(axs):
         df_team = shots[shots.team_name == teams[i]]
-        #each shot
-        for j, row in df_team.iterrows():
-            if row["outcome_name"] == 'Goal':
-                pitch.arrows(row.x, row.y, row.end_x, row.end_y, headwidth=4, headlength=4, color=colors[i], ax=ax)
-                pitch.scatter(row.x, row.y, alpha = 1, s = 700, c = colors[i], ax=ax, marker='football') 
-                pitch.annotate(row["player_name"], (row.x - 2, row.y - 2), ax=ax, fontsize = 12)
-            else:
-                pitch.scatter(row.x, row.y, alpha = 0.5, s = 700, color = colors[i], ax=ax)
+        goals = df_team[df_team["outcome_name"] == 'Goal']
+        misses = df_team[df_team["outcome_name"] != 'Goal']
+        #one call per artist
+        if len(goals):
+            pitch.arrows(goals.x, goals.y, goals.end_x, goals.end_y, headwidth=4, headlength=4, color=colors[i], ax=ax)
+            pitch.scatter(goals.x, goals.y, alpha = 1, s = 700, c = colors[i], ax=ax, marker='football') 
+        for name, x, y in zip(goals.player_name, goals.x, goals.y):
+            pitch.annotate(name, (x - 2, y - 2), ax=ax, fontsize = 12)
+        pitch.scatter(misses.x, misses.y, alpha = 0.5, s = 700, color = colors[i], ax=ax)
 
     return fig 
 
@@ -136,24 +138,18 @@ def display_shots_same_pitch(shots: pd.core.frame.DataFrame, teams: np.ndarray,
     df_team1 = shots[shots.team_name == teams[0]]
     df_team2 = shots[shots.team_name == teams[1]]
     #change shot side 
-    df_team1['x'] = pitch.dim.right - df_team1.x
+    df_team1 = df_team1.assign(x=pitch.dim.right - df_team1.x)
     #add histogram
     team1_hist_y = sns.kdeplot(y=df_team1.y, ax=axs['left'], color=colors[0], fill=True)
     team1_hist_x = sns.kdeplot(x=df_team1.x, ax=axs['top'], color=colors[0], fill=True)
     team2_hist_x = sns.kdeplot(x=df_team2.x, ax=axs['top'], color=colors[1], fill=True)
     team2_hist_y = sns.kdeplot(y=df_team2.y, ax=axs['right'], color=colors[1], fill=True)
-    #team 1 
-    for i, row in df_team1.iterrows():
-        if row["outcome_name"] == 'Goal':
-            pitch.scatter(row.x, row.y, s=row.shot_statsbomb_xg * 700, c=colors[0], ax=axs['pitch'])
-        else:
-            pitch.scatter(row.x, row.y, alpha = 0.5, s=row.shot_statsbomb_xg * 700, color = colors[0], ax=axs['pitch'])
-    #team 2
-    for i, row in df_team2.iterrows():
-        if row["outcome_name"] == 'Goal':
-            pitch.scatter(row.x, row.y, s=row.shot_statsbomb_xg * 700, c=colors[1], ax=axs['pitch'])
-        else:
-            pitch.scatter(row.x, row.y, alpha = 0.5, s=row.shot_statsbomb_xg * 700, color = colors[1], ax=axs['pitch'])
+    #each team, one scatter for goals and one for misses
+    for df_team, color in zip([df_team1, df_team2], colors):
+        goals = df_team[df_team["outcome_name"] == 'Goal']
+        misses = df_team[df_team["outcome_name"] != 'Goal']
+        pitch.scatter(goals.x, goals.y, s=goals.shot_statsbomb_xg * 700, color=color, ax=axs['pitch'])
+        pitch.scatter(misses.x, misses.y, alpha = 0.5, s=misses.shot_statsbomb_xg * 700, color = color, ax=axs['pitch'])
 
     return fig
 
@@ -174,13 +170,15 @@ def display_shots_one_team(shots: pd.core.frame.DataFrame, team: str, color: str
     fig, ax = pitch.grid(grid_height=0.9, title_height=0.1, axis=False,
                          endnote_height=0.0, title_space=0, endnote_space=0)
 
-    for i, row in shots.iterrows():
-        if row["outcome_name"] == 'Goal':
-            pitch.scatter(row.x, row.y, alpha = 1, s = 500, c = color, ax=ax['pitch'], marker='football') 
-            pitch.arrows(row.x, row.y, row.end_x, row.end_y, ax=ax['pitch'])
-            pitch.annotate(row["player_name"], (row.x - 2, row.y - 2), ax=ax['pitch'], fontsize = 12)
-        else:
-            pitch.scatter(row.x, row.y, alpha = 0.5, s = 500, color = color, ax=ax['pitch'])
+    goals = shots[shots["outcome_name"] == 'Goal']
+    misses = shots[shots["outcome_name"] != 'Goal']
+    #one call per artist
+    if len(goals):
+        pitch.scatter(goals.x, goals.y, alpha = 1, s = 500, c = color, ax=ax['pitch'], marker='football') 
+        pitch.arrows(goals.x, goals.y, goals.end_x, goals.end_y, ax=ax['pitch'])
+    for name, x, y in zip(goals.player_name, goals.x, goals.y):
+        pitch.annotate(name, (x - 2, y - 2), ax=ax['pitch'], fontsize = 12)
+    pitch.scatter(misses.x, misses.y, alpha = 0.5, s = 500, color = color, ax=ax['pitch'])
 
     return fig
 
@@ -225,4 +223,80 @@ def display_xG(xG: pd.core.frame.DataFrame, teams: np.ndarray, colors: list):
 
     ax.grid(axis='y')
             
-    return fig
\ No newline at end of file
+    return fig
+
+def display_outcome(probabilities: pd.core.frame.Series, scorelines: pd.core.frame.DataFrame, teams: np.ndarray, colors: list, top: int = 10):
+    """
+    Simulated outcome Plot 
+
+    Args:
+        probabilities (pd.core.frame.Series): team 1 win, draw and team 2 win probabilities
+        scorelines (pd.core.frame.DataFrame): scorelines and their probability, most likely first
+        teams (np.ndarray): team names 
+        colors (list): team colors
+        top (int, optional): scorelines shown. Defaults to 10.
+
+    """
+    fig, (ax_outcome, ax_score) = plt.subplots(1, 2, figsize=(14, 4), gridspec_kw={'width_ratios': [1, 2]})
+
+    #win / draw / loss bar
+    left = 0
+    for probability, color in zip(probabilities, [colors[0], 'grey', colors[1]]):
+        ax_outcome.barh(0, probability, left=left, color=color)
+        if probability > 0.08:
+            ax_outcome.text(left + probability / 2, 0, f"{probability:.0%}", ha='center', va='center', color='white', fontweight='bold')
+        left += probability
+    ax_outcome.set_xlim(0, 1)
+    ax_outcome.set_yticks([])
+    ax_outcome.set_xticks([0, 1], [teams[0], teams[1]])
+    ax_outcome.set_title('Simulated outcome')
+
+    #most likely scorelines
+    scores = scorelines.head(top)
+    goals = list(zip(scores[teams[0]], scores[teams[1]]))
+    labels = [f"{goals1}-{goals2}" for goals1, goals2 in goals]
+    bar_colors = [colors[0] if goals1 > goals2 else colors[1] if goals1 < goals2 else 'grey' for goals1, goals2 in goals]
+    ax_score.bar(labels, scores['probability'], color=bar_colors)
+    ax_score.set_title(f'Most likely scorelines ({teams[0]} - {teams[1]})')
+    ax_score.grid(axis='y')
+
+    for ax in (ax_outcome, ax_score):
+        ax.tick_params(axis='both', length=0)
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+
+    return fig
+
+def display_momentum(momentum: pd.core.frame.DataFrame, teams: np.ndarray, colors: list, window: tuple = ()):
+    """
+    Momentum Plot, xG difference over the last minutes
+
+    Args:
+        momentum (pd.core.frame.DataFrame): minute, momentum from TimelineIndex.momentum
+        teams (np.ndarray): team names 
+        colors (list): team colors
+        window (tuple, optional): [start_minute, end_minute) highlighted. Defaults to (), none.
+
+    """
+    fig, ax = plt.subplots(figsize=(14, 3))
+
+    bar_colors = np.where(momentum['momentum'] >= 0, colors[0], colors[1])
+    ax.bar(momentum['minute'] - 0.5, momentum['momentum'], width=1, color=bar_colors)
+    if window:
+        ax.axvspan(window[0], window[1], color='grey', alpha=0.15)
+
+    ax.set_title(f'Momentum ({teams[0]} up, {teams[1]} down)')
+    ax.set_xlim(0, max(90, momentum['minute'].max()))
+    limit = max(momentum['momentum'].abs().max(), 0.1)
+    ax.set_ylim(-limit, limit)
+
+    ax.tick_params(axis='both', length=0)
+    ax.axhline(y=0, color='grey', linewidth=1)
+    ax.axvline(x=45, color='grey', linestyle='--')
+
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    ax.grid(axis='y')
+
+    return fig
@@ -0,0 +1,90 @@
+import streamlit as st
+from analysis import catalog
+from analysis import season
+from analysis import timing
+
+st.set_page_config(
+    page_title="Leaderboards",
+    page_icon=":soccer:",
+    layout="wide"
+)
+
+st.title("Leaderboards")
+
+#stages of this run, shown in the performance panel
+records = timing.start(st.sidebar.toggle("Performance panel"))
+
+st.markdown(
+    """
+    Tournament totals of every player and team, updated as new matches are available
+    """
+)
+
+@st.cache_resource(ttl=catalog.REFRESH_SECONDS)
+def match_catalog() -> catalog.Catalog:
+    """
+    Catalog of every competition shared by the sessions of the server, checked again for new matches
+    """
+    return catalog.load()
+
+@st.cache_resource
+def season_aggregates(competition_id: int, season_id: int) -> season.SeasonAggregates:
+    """
+    Season aggregates shared by the sessions of the server
+    """
+    return season.SeasonAggregates(competition_id, season_id)
+
+@st.cache_data(ttl=season.UPDATE_SECONDS, show_spinner="Adding the new matches")
+def update_season(competition_id: int, season_id: int) -> list:
+    """
+    New or changed matches merged in the shared aggregates, checked at most once per UPDATE_SECONDS
+    """
+    return season_aggregates(competition_id, season_id).update()
+
+df_competitions = match_catalog().competitions()
+if df_competitions.empty:
+    st.warning("No competition available, seed the local event store or check the connection to StatsBomb.")
+    st.stop()
+
+col_button1, col_button2, col_button3 = st.columns(3)
+
+with col_button1:
+    selected = st.selectbox(
+        "Sélectionnez une compétition",
+        df_competitions.index,
+        format_func=lambda i: f"{df_competitions.competition_name[i]} {df_competitions.season_name[i]}")
+    competition_id = int(df_competitions.competition_id[selected])
+    season_id = int(df_competitions.season_id[selected])
+
+aggregates = season_aggregates(competition_id, season_id)
+with timing.stage("season.update"):
+    update_season(competition_id, season_id)
+
+with col_button2:
+    metric = st.selectbox("Metric", ["xG", "goals", "shots", "passes", "completed_passes", "duels", "duels_won"] + list(season.RATES))
+
+with col_button3:
+    top = st.slider("Rows", 5, 50, 20)
+
+st.divider()
+
+players, teams, partners = st.tabs(["Players", "Teams", "Pass partners"])
+
+with players:
+    df_teams = aggregates.leaderboard('teams', 'matches', top=None)
+    team = st.selectbox("Team", [None] + sorted(df_teams.team_name), format_func=lambda name: "All teams" if name is None else name)
+    min_matches = st.number_input("Matches played at least", min_value=0, value=0, step=1)
+    st.dataframe(aggregates.leaderboard('players', metric, team, top, min_matches), use_container_width=True, hide_index=True)
+
+with teams:
+    st.dataframe(aggregates.leaderboard('teams', metric, top=top), use_container_width=True, hide_index=True)
+
+with partners:
+    df_players = aggregates.leaderboard('players', 'passes', top=None)
+    player = st.selectbox("Player", df_players.player_name)
+    st.dataframe(aggregates.partners(player, top), use_container_width=True, hide_index=True)
+
+if records is not None:
+    with st.expander("Performance"):
+        st.dataframe(timing.summary(records), use_container_width=True, hide_index=True)
+        st.dataframe(timing.table(records), use_container_width=True, hide_index=True)
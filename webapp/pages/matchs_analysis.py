@@ -1,7 +1,12 @@
+import numpy as np
 import streamlit as st
-from analysis import competition 
+from analysis import catalog
 from analysis import stats_match
+from analysis import outcome
+from analysis import prefetch
 from analysis import visuals
+from analysis import figure_cache
+from analysis import timing
 
 st.set_page_config(
     page_title="Matchs analysis",
@@ -11,29 +16,67 @@ st.set_page_config(
 
 st.title("Matchs analysis")
 
+#stages of this run, shown in the performance panel
+records = timing.start(st.sidebar.toggle("Performance panel"))
+
 st.markdown(
     """
     Faudra écrire un peu de markdown pour présenter ce qui est dispo sur cette page 
 """
 )
 
-df_match = competition.get_competition()
+@st.cache_resource(ttl=catalog.REFRESH_SECONDS)
+def match_catalog() -> catalog.Catalog:
+    """
+    Catalog of every competition shared by the sessions of the server, checked again for new matches
+    """
+    return catalog.load()
+
+@st.cache_resource
+def match_cache() -> prefetch.MatchCache:
+    """
+    Loaded matches shared by the sessions of the server, the other matches of a stage load in the background
+    """
+    return prefetch.MatchCache()
+
+@st.cache_data
+def competition_outcomes(competition_id: int, season_id: int):
+    """
+    Every match of a competition replayed from its shots, computed once per competition
+    """
+    return outcome.simulate_competition(competition_id, season_id, load=match_cache().get)
+
+df_catalog = match_catalog()
+df_competitions = df_catalog.competitions()
+if df_competitions.empty:
+    st.warning("No competition available, seed the local event store or check the connection to StatsBomb.")
+    st.stop()
 
-col_button1, col_button2 = st.columns(2)
+col_button1, col_button2, col_button3 = st.columns(3)
 
 with col_button1:
+    season = st.selectbox(
+        "Sélectionnez une compétition",
+        df_competitions.index,
+        format_func=lambda i: f"{df_competitions.competition_name[i]} {df_competitions.season_name[i]}")
+    competition_id = int(df_competitions.competition_id[season])
+    season_id = int(df_competitions.season_id[season])
+    df_season = df_catalog.lookup(competition_id=competition_id, season_id=season_id)
+
+with col_button2:
     competition_stage = st.selectbox(
         "Selectionner votre partie de la compétition ",
-        df_match.competition_stage_name.unique())
-    df_filtered_match = competition.get_matchs(df_match, competition_stage)
+        df_season.competition_stage_name.dropna().unique())
+    df_filtered_match = df_catalog.lookup(competition_id=competition_id, season_id=season_id, stage=competition_stage)
 
-with col_button2:
+with col_button3:
     teams = st.selectbox(
         "Sélectionnez un match", 
-        df_filtered_match['teams'])
+        range(len(df_filtered_match)),
+        format_func=lambda i: df_filtered_match['teams'].iloc[i])
 
-    id_match = df_filtered_match[df_filtered_match['teams'] == teams]['match_id'].values[0]
-    match_info = df_filtered_match[df_filtered_match['teams'] == teams]
+    match_info = df_filtered_match.iloc[[teams]]
+    id_match = match_info['match_id'].values[0]
 
 st.divider()
 
@@ -50,17 +93,63 @@ st.divider()
 
 team1, all, team2 = st.columns([0.3,0.4,0.3])
 
-match = stats_match.stat_match(id_match)
+#selected match first, then the next ones of the stage
+match_cache().prefetch(np.roll(df_filtered_match.match_id.to_numpy(), -teams), competition_id, season_id)
+match = match_cache().get(id_match, competition_id, season_id)
+
+if st.toggle("Choose the passing network minutes (until the first substitution otherwise)"):
+    network_window = st.slider("Passing network minutes", 0, match.last_minute, (0, match.last_minute))
+else:
+    network_window = ()
+
+#statistics of a minute range, from the match timeline only
+timeline_window = st.slider("Match minutes", 0, match.last_minute, (0, match.last_minute))
+with timing.stage("timeline", window=timeline_window):
+    window_xG = match.get_timeline().xG_delta(*timeline_window)
+    window_statistics = match.get_timeline().statistics(*timeline_window)
+
+def show(chart: str, build, **params):
+    """
+    Chart from the figure cache, matplotlib only runs on a miss
+    """
+    with timing.stage("figure", chart=chart, **params):
+        image = figure_cache.get(id_match, chart, build, params)
+    with timing.stage("st.image", chart=chart):
+        st.image(image, use_column_width=True)
+
+def passing_network(team: int):
+    """
+    Passing network figure of a team over the selected minutes
+    """
+    scatter_df, lines_df = match.get_passing_network(*network_window)
+    return visuals.display_passing_network(scatter_df[team], lines_df[team], match.teams[team], match.colors[team])
 
 with team1:
-    st.pyplot(visuals.display_events(match.get_events()[0], match.cmap[0]))
-    st.pyplot(visuals.display_passing_network(match.get_passing_network()[0][0], match.get_passing_network()[1][0], match.teams[0], match.colors[0]))
+    show("events", lambda: visuals.display_events(match.get_events()[0], match.cmap[0], match.get_event_density(0)), team=0)
+    show("passing_network", lambda: passing_network(0), team=0, window=network_window)
 
 with all:
-    st.pyplot(visuals.display_xG(match.get_xG(), match.teams, match.colors))
-    st.pyplot(visuals.display_shots_separate_pitch(match.get_shots_compact(), match.teams, match.colors))
-    st.pyplot(visuals.display_statistics(match.get_statistics(), match.teams, match.colors))
+    show("xG", lambda: visuals.display_xG(match.get_xG(), match.teams, match.colors))
+    show("outcome", lambda: visuals.display_outcome(*outcome.simulate_match(match.get_xG(), match.teams), match.teams, match.colors))
+    show("shots", lambda: visuals.display_shots_separate_pitch(match.get_shots_compact(), match.teams, match.colors))
+    show("momentum", lambda: visuals.display_momentum(match.get_timeline().momentum(), match.teams, match.colors, timeline_window),
+         window=timeline_window)
+    st.html(f"<h4><center>xG between minutes {timeline_window[0]} and {timeline_window[1]} : "
+            f"{window_xG[0]:.2f} - {window_xG[1]:.2f}</center></h4>")
+    show("statistics", lambda: visuals.display_statistics(window_statistics, match.teams, match.colors), window=timeline_window)
 
 with team2:
-    st.pyplot(visuals.display_events(match.get_events()[1], match.cmap[1]))
-    st.pyplot(visuals.display_passing_network(match.get_passing_network()[0][1], match.get_passing_network()[1][1], match.teams[1], match.colors[1]))
\ No newline at end of file
+    show("events", lambda: visuals.display_events(match.get_events()[1], match.cmap[1], match.get_event_density(1)), team=1)
+    show("passing_network", lambda: passing_network(1), team=1, window=network_window)
+
+if st.toggle("Simulate every match of the competition"):
+    with st.spinner("Replaying every match"), timing.stage("outcome.competition"):
+        st.dataframe(competition_outcomes(competition_id, season_id), use_container_width=True, hide_index=True)
+
+stats_match.logger.info("match %s rendered with %d full-frame scans", id_match, match.scans)
+
+if records is not None:
+    with st.expander("Performance"):
+        st.caption("Match cache: {matches} matches, {bytes:,} bytes, {pending} loading, {hits} hits, {misses} misses".format(**match_cache().stats()))
+        st.dataframe(timing.summary(records), use_container_width=True, hide_index=True)
+        st.dataframe(timing.table(records), use_container_width=True, hide_index=True)
@@ -1,8 +1,12 @@
+import os
 import streamlit as st
 import pandas as pd
 
 from simulator import visuals
 from simulator import xG
+from simulator import batching
+from simulator import optimizer
+from analysis import timing
 
 st.set_page_config(
     page_title="xG simulator",
@@ -10,8 +14,25 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def prediction_service() -> batching.PredictionService:
+    """
+    Prediction service shared by every session of the server
+    """
+    return batching.PredictionService(xG.predictions)
+
+@st.cache_resource
+def optimizer_pool(workers: int):
+    """
+    Worker processes of the defence search, started once per worker count and shared by every session
+    """
+    return optimizer.pool(workers)
+
 st.title("xG simulator")
 
+#stages of this run, shown in the performance panel
+records = timing.start(st.sidebar.toggle("Performance panel"))
+
 st.markdown(
     """
     Faudra écrire un peu de markdown pour présenter ce qui est dispo sur cette page 
@@ -55,6 +76,8 @@ with st.expander("#### Change players positions"):
         else:
             opponents[i] = (opponent_x, opponent_y)
 
+show_surface = st.toggle("Show xG for every shooter position")
+
 # Shot dataframe Creation
 data_shot = [[shoter_x,shoter_y,shoter_contact]]
 cols_shot = ['x','y','body_part_name']
@@ -76,7 +99,8 @@ X = model_vars[["x0", "is_closer", "angle", "distance", "gk_distance",
                 "gk_distance_y", "triangle", "close_players", "header"
                 ]].values
 
-prediction = xG.prediction(X)
+with timing.stage("inference"):
+    prediction = float(prediction_service().submit(X).result()[0])
 
 #visual 
 st.divider()
@@ -84,7 +108,11 @@ st.divider()
 pitch, variable = st.columns([0.6, 0.3])
 with pitch:
     st.html("<h3><center>Pitch position</center></h3>")
-    st.pyplot(visuals.display_state(shot_df, track_df))
+    surface = xG.xG_surface(track_df, shoter_contact) if show_surface else None
+    with timing.stage("figure.build", chart="display_state"):
+        fig = visuals.display_state(shot_df, track_df, surface)
+    with timing.stage("st.pyplot", chart="display_state"):
+        st.pyplot(fig)
 with variable:
     st.html("<h3><center>Variables</center></h3>")
     st.markdown(
@@ -99,3 +127,39 @@ with variable:
     st.divider()
     st.html(f"<h2><center>Expected Goal : {round(prediction, 3)}</center></h2>")
     #st.dataframe(model_vars.T)
+
+st.divider()
+
+if st.toggle("Find the defence that minimizes xG"):
+    col_budget, col_workers = st.columns(2)
+    with col_budget:
+        budget = st.slider("Time budget (seconds)", min_value=0.5, max_value=10., value=optimizer.BUDGET, step=0.5)
+    with col_workers:
+        workers = st.number_input("Worker processes", min_value=1, max_value=os.cpu_count() or 1, value=1, step=1)
+
+    if st.button(f"Place the goalkeeper and {opponent_number} defenders"):
+        executor = optimizer_pool(workers) if workers > 1 else None
+        bar = st.progress(0., text="Searching")
+        def report(share: float, best: float, evaluated: int):
+            bar.progress(share, text=f"Best xG {best:.3f} after {evaluated:,} configurations")
+
+        result = optimizer.optimize((shoter_x, shoter_y), shoter_contact == "Head", opponent_number, budget,
+                                    workers=workers, progress=report, executor=executor)
+        optimized_df = pd.DataFrame(result["positions"], columns=['x', 'y']).round(1)
+        optimized_df['position_name'] = ['Goalkeeper'] + ['Defender'] * opponent_number
+
+        pitch, variable = st.columns([0.6, 0.3])
+        with pitch:
+            with timing.stage("figure.build", chart="display_state(optimized)"):
+                fig = visuals.display_state(shot_df, optimized_df)
+            with timing.stage("st.pyplot", chart="display_state(optimized)"):
+                st.pyplot(fig)
+        with variable:
+            st.html(f"<h2><center>Lowest Expected Goal : {round(result['xG'], 3)}</center></h2>")
+            st.caption(f"{result['evaluated']:,} configurations in {result['seconds']:.1f} s, {result['rate']:,.0f} per second")
+            st.dataframe(optimized_df, use_container_width=True, hide_index=True)
+
+if records is not None:
+    with st.expander("Performance"):
+        st.dataframe(timing.summary(records), use_container_width=True, hide_index=True)
+        st.dataframe(timing.table(records), use_container_width=True, hide_index=True)
@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+class PredictionService:
+
+    def __init__(self, predict, max_batch_size: int = 512, max_wait: float = 0.005):
+        """
+        Gather the rows submitted by many sessions and score them in one call
+
+        Args:
+            predict (callable): batch prediction, (N, 9) variables to (N,) xG
+            max_batch_size (int, optional): maximum rows per call. Defaults to 512.
+            max_wait (float, optional): seconds a request waits for others. Defaults to 0.005.
+        """
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        #no request is queued behind the stop marker
+        self._lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="xg-prediction-service", daemon=True)
+        self._worker.start()
+
+    def submit(self, X: np.ndarray) -> Future:
+        """
+        Queue variables for prediction, RuntimeError once the service is closed
+
+        Args:
+            X (np.ndarray): variables (N, 9)
+
+        Returns:
+            Future: resolves to the xG of each row (N,)
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("cannot submit to a closed prediction service")
+            self._queue.put((np.atleast_2d(np.asarray(X, dtype=float)), future))
+
+        return future
+
+    def close(self):
+        """
+        Stop the worker once the queued requests are scored, later submits raise
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first: tuple) -> tuple:
+        """
+        Requests arriving before the deadline or until the batch is full
+        """
+        pending = [first]
+        rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return pending, True
+            pending.append(item)
+            rows += len(item[0])
+
+        return pending, False
+
+    def _run(self):
+        """
+        Worker loop, one predict call per gathered batch
+        """
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            pending, stop = self._collect(first)
+            pending = [(X, future) for X, future in pending if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+
+            try:
+                xg = self.predict(np.vstack([X for X, _ in pending]))
+            except Exception as error:
+                for _, future in pending:
+                    future.set_exception(error)
+                continue
+
+            self.batches += 1
+            self.requests += len(pending)
+            splits = np.cumsum([len(X) for X, _ in pending])[:-1]
+            for (_, future), result in zip(pending, np.split(np.asarray(xg), splits)):
+                future.set_result(result)
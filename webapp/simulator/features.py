@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+from analysis import timing
+
+#model input order
+FEATURES = ["x0", "is_closer", "angle", "distance", "gk_distance",
+            "gk_distance_y", "triangle", "close_players", "header"]
+
+GOAL_X = 105
+GOAL_Y = 34
+GOAL_WIDTH = 7.32
+
+def pad_tracks(shot_ids: np.ndarray, track: pd.core.frame.DataFrame) -> tuple:
+    """
+    Ragged freeze frames to padded arrays, missing players are NaN
+
+    Args:
+        shot_ids (np.ndarray): shot ids, one per row of the batch
+        track (pd.core.frame.DataFrame): players with id, x, y and position_name
+
+    Returns:
+        tuple: players positions (N, M, 2), goalkeeper mask (N, M)
+    """
+    shot_ids = np.asarray(shot_ids)
+    row = pd.Index(shot_ids).get_indexer(track["id"])
+    track = track.loc[row >= 0]
+    row = row[row >= 0]
+    #rank of each player inside his freeze frame
+    order = np.argsort(row, kind="stable")
+    row = row[order]
+    starts = np.searchsorted(row, np.arange(len(shot_ids)))
+    col = np.arange(len(row)) - starts[row]
+    size = col.max() + 1 if len(col) else 0
+
+    players = np.full((len(shot_ids), size, 2), np.nan)
+    players[row, col] = track[["x", "y"]].to_numpy(dtype=float)[order]
+    is_gk = np.zeros((len(shot_ids), size), dtype=bool)
+    is_gk[row, col] = (track["position_name"].to_numpy() == "Goalkeeper")[order]
+
+    return players, is_gk
+
+def batch_features(shot: np.ndarray, header: np.ndarray, players: np.ndarray, is_gk: np.ndarray) -> np.ndarray:
+    """
+    The nine model variables for N shots at once
+
+    Args:
+        shot (np.ndarray): shooter positions (N, 2)
+        header (np.ndarray): shot from the head (N,)
+        players (np.ndarray): opponents positions (N, M, 2) or (M, 2) shared by every shot, NaN padded
+        is_gk (np.ndarray): goalkeeper mask (N, M) or (M,)
+
+    Returns:
+        np.ndarray: variables (N, 9) in FEATURES order
+    """
+    shot = np.asarray(shot, dtype=float).reshape(-1, 2)
+    n = len(shot)
+    players = np.broadcast_to(np.asarray(players, dtype=float), (n,) + np.shape(players)[-2:])
+    is_gk = np.broadcast_to(np.asarray(is_gk, dtype=bool), players.shape[:2])
+    if players.shape[1] == 0:
+        players = np.full((n, 1, 2), np.nan)
+        is_gk = np.zeros((n, 1), dtype=bool)
+
+    x0 = shot[:, 0]
+    y0 = shot[:, 1]
+    x = GOAL_X - x0
+    c = np.abs(GOAL_Y - y0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        angle = np.arctan(GOAL_WIDTH * x / (x**2 + c**2 - (GOAL_WIDTH/2)**2))
+    angle = np.where(angle >= 0, angle, angle + np.pi)*180/np.pi
+    distance = np.sqrt(x**2 + c**2)
+
+    #first goalkeeper of each frame, NaN when there is none
+    has_gk = is_gk.any(axis=1)
+    gk = players[np.arange(n), is_gk.argmax(axis=1)]
+    gk[~has_gk] = np.nan
+    gk_distance = np.sqrt((x0 - gk[:, 0])**2 + (y0 - gk[:, 1])**2)
+    gk_distance_y = np.abs(y0 - gk[:, 1])
+    gk_dist_to_goal = np.sqrt((GOAL_X - gk[:, 0])**2 + (GOAL_Y - gk[:, 1])**2)
+
+    xp = players[:, :, 0]
+    yp = players[:, :, 1]
+    xs = x0[:, None]
+    ys = y0[:, None]
+    dist = np.sqrt((xs - xp)**2 + (ys - yp)**2)
+    close_players = (dist < 3).sum(axis=1)
+
+    x1, y1 = GOAL_X, GOAL_Y - GOAL_WIDTH/2
+    x2, y2 = GOAL_X, GOAL_Y + GOAL_WIDTH/2
+    c1 = (x2-x1)*(yp-y1)-(y2-y1)*(xp-x1)
+    c2 = (xs-x2)*(yp-y2)-(ys-y2)*(xp-x2)
+    c3 = (x1-xs)*(yp-ys)-(y1-ys)*(xp-xs)
+    triangle = (((c1<0) & (c2<0) & (c3<0)) | ((c1>0) & (c2>0) & (c3>0))).sum(axis=1)
+
+    is_closer = np.where(gk_dist_to_goal > distance, 1, 0)
+
+    return np.column_stack([x0, is_closer, angle, distance, gk_distance, gk_distance_y,
+                            triangle, close_players, np.asarray(header, dtype=float).reshape(-1)])
+
+@timing.timed("features.get_batch_model_vars")
+def get_batch_model_vars(shot: pd.core.frame.DataFrame, track: pd.core.frame.DataFrame) -> pd.core.frame.DataFrame:
+    """
+    Variable calculation for many shots, same values as xG.get_model_vars
+
+    Args:
+        shot (pd.core.frame.DataFrame): shots with id, x, y and body_part_name
+        track (pd.core.frame.DataFrame): freeze frame players with shot id, x, y and position_name
+
+    Returns:
+        pd.core.frame.DataFrame: variables of each shot in FEATURES order
+    """
+    players, is_gk = pad_tracks(shot["id"].to_numpy(), track)
+    X = batch_features(shot[["x", "y"]].to_numpy(dtype=float),
+                       (shot["body_part_name"] == "Head").to_numpy(),
+                       players, is_gk)
+
+    return pd.DataFrame(X, columns=FEATURES, index=shot.index)
@@ -0,0 +1,115 @@
+import io
+import json
+import argparse
+import zipfile
+import numpy as np
+
+KERAS_PATH = "models/xG_predictor.keras"
+SCALER_PATH = "models/xG_scaler.pkl"
+NPZ_PATH = "models/xG_predictor.npz"
+
+ACTIVATIONS = {
+    "linear": lambda z: z,
+    "relu": lambda z: np.maximum(z, 0),
+    "sigmoid": lambda z: 0.5 * (1 + np.tanh(z / 2)),
+    "tanh": np.tanh,
+}
+
+def export(keras_path: str = KERAS_PATH, scaler_path: str = SCALER_PATH, npz_path: str = NPZ_PATH):
+    """
+    Dense weights and scaler parameters to a compact .npz file, read without TensorFlow
+
+    Args:
+        keras_path (str, optional): Keras model archive. Defaults to KERAS_PATH.
+        scaler_path (str, optional): fitted StandardScaler. Defaults to SCALER_PATH.
+        npz_path (str, optional): destination. Defaults to NPZ_PATH.
+    """
+    import h5py
+    import joblib
+
+    scaler = joblib.load(scaler_path)
+    arrays = {"mean": scaler.mean_, "scale": scaler.scale_}
+
+    with zipfile.ZipFile(keras_path) as archive:
+        config = json.loads(archive.read("config.json"))
+        weights = h5py.File(io.BytesIO(archive.read("model.weights.h5")), "r")
+        activations = []
+        for layer in config["config"]["layers"]:
+            if layer["class_name"] == "InputLayer":
+                continue
+            if layer["class_name"] != "Dense":
+                raise ValueError(f"unsupported layer {layer['class_name']}")
+            name = layer["config"]["name"]
+            arrays[f"kernel_{len(activations)}"] = weights[f"layers/{name}/vars/0"][()]
+            arrays[f"bias_{len(activations)}"] = weights[f"layers/{name}/vars/1"][()]
+            activations.append(layer["config"]["activation"])
+
+    np.savez(npz_path, activations=np.array(activations), **arrays)
+
+class NumpyModel:
+
+    def __init__(self, npz_path: str = NPZ_PATH):
+        """
+        Standardization and dense forward pass in pure NumPy
+
+        Args:
+            npz_path (str, optional): exported model. Defaults to NPZ_PATH.
+        """
+        with np.load(npz_path) as data:
+            self.mean = data["mean"]
+            self.scale = data["scale"]
+            self.layers = [(data[f"kernel_{i}"], data[f"bias_{i}"], ACTIVATIONS[str(activation)])
+                           for i, activation in enumerate(data["activations"])]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        xG prediction on raw variables
+
+        Args:
+            X (np.ndarray): variables (N, 9)
+
+        Returns:
+            np.ndarray: xG (N, 1)
+        """
+        #scaler in float64 then float32 layers, as Keras does
+        z = ((np.asarray(X, dtype=float) - self.mean) / self.scale).astype(np.float32)
+        for kernel, bias, activation in self.layers:
+            z = activation(z @ kernel + bias)
+
+        return z
+
+def check_parity(n: int = 10000, seed: int = 0) -> float:
+    """
+    Largest gap between the NumPy and the Keras predictions on random variables
+
+    Args:
+        n (int, optional): number of rows. Defaults to 10000.
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        float: maximum absolute difference
+    """
+    import joblib
+    import tensorflow as tf
+
+    scaler = joblib.load(SCALER_PATH)
+    model = tf.keras.models.load_model(KERAS_PATH)
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(scaler.mean_, scaler.scale_, size=(n, len(scaler.mean_)))
+    expected = model.predict(scaler.transform(X), verbose=0)
+
+    return float(np.abs(NumpyModel().predict(X) - expected).max())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the xG model for the NumPy backend")
+    parser.add_argument("--check", action="store_true", help="compare with the Keras predictions")
+    args = parser.parse_args()
+
+    export()
+    print(f"exported {NPZ_PATH}")
+    if args.check:
+        gap = check_parity()
+        print(f"max abs difference with Keras: {gap:.2e}")
+        if gap > 1e-5:
+            raise SystemExit("NumPy backend differs from Keras")
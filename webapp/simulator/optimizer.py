@@ -0,0 +1,164 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from simulator import features
+from simulator import xG
+from analysis import timing
+
+#players stay in the attacking half, as on the simulator page
+BOUNDS = (np.array([52.5, 0.]), np.array([105., 68.]))
+#the goalkeeper stays in his penalty area, the model is not trained on keepers far from goal
+GOALKEEPER_BOUNDS = (np.array([105. - 16.5, 34. - 20.16]), np.array([105., 34. + 20.16]))
+#configurations scored per round
+BATCH = 8192
+#share of a round kept to fit the next sampling distribution
+ELITE = 0.02
+#smallest spread of the sampling distribution, in metres
+MIN_STD = 0.25
+#seconds of search
+BUDGET = 2.
+
+def evaluate(shot: np.ndarray, header: bool, configs: np.ndarray) -> np.ndarray:
+    """
+    xG of a shot against many defensive configurations, in one batch
+
+    Args:
+        shot (np.ndarray): shooter position (2,)
+        header (bool): shot from the head
+        configs (np.ndarray): positions (B, players, 2), the goalkeeper first
+
+    Returns:
+        np.ndarray: xG (B,)
+    """
+    n, players, _ = configs.shape
+    is_gk = np.zeros((n, players), dtype=bool)
+    is_gk[:, 0] = True
+    X = features.batch_features(np.broadcast_to(np.asarray(shot, dtype=float), (n, 2)), np.full(n, float(header)), configs, is_gk)
+
+    return xG.predictions(X)
+
+def bounds(players: int) -> tuple:
+    """
+    Lowest and highest position of every player, the goalkeeper first
+
+    Returns:
+        tuple: lower bounds (players, 2), upper bounds (players, 2)
+    """
+    lower = np.vstack([GOALKEEPER_BOUNDS[0], np.tile(BOUNDS[0], (players - 1, 1))])
+    upper = np.vstack([GOALKEEPER_BOUNDS[1], np.tile(BOUNDS[1], (players - 1, 1))])
+
+    return lower, upper
+
+def _warm(_) -> bool:
+    """
+    First call of a worker process, loads the model
+    """
+    evaluate(np.array([95., 34.]), False, np.array([[[104., 34.]]]))
+
+    return True
+
+def pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool for optimize with every worker started and the model loaded, so that no budget is spent waiting for them
+
+    Args:
+        workers (int): processes
+
+    Returns:
+        ProcessPoolExecutor: warm pool, kept by the caller across searches
+    """
+    executor = ProcessPoolExecutor(max_workers=workers)
+    list(executor.map(_warm, range(workers)))
+
+    return executor
+
+def _round(shot: np.ndarray, header: bool, mean: np.ndarray, std: np.ndarray, size: int, elite: int,
+           seed: np.random.SeedSequence) -> tuple:
+    """
+    Configurations sampled around the current distribution and scored, the best ones kept
+
+    Returns:
+        tuple: elite configurations (elite, players, 2), their xG (elite,)
+    """
+    rng = np.random.default_rng(seed)
+    configs = np.clip(rng.normal(mean, std, (size,) + mean.shape), *bounds(len(mean)))
+    scores = evaluate(shot, header, configs)
+    best = np.argpartition(scores, min(elite, size) - 1)[:elite]
+
+    return configs[best], scores[best]
+
+@timing.timed("optimizer.optimize")
+def optimize(shot: tuple, header: bool = False, defenders: int = 0, budget: float = BUDGET, batch: int = BATCH,
+             workers: int = 1, progress=None, seed: int = 0, max_rounds: int = None, executor: ProcessPoolExecutor = None) -> dict:
+    """
+    Goalkeeper and defender positions minimizing the xG of a shot, cross-entropy search:
+    each round scores a batch of configurations, the best ones set the next sampling distribution.
+    At least one round runs whatever the budget, the clock starts once the worker processes are ready.
+
+    Args:
+        shot (tuple): shooter x and y
+        header (bool, optional): shot from the head. Defaults to False.
+        defenders (int, optional): defenders besides the goalkeeper. Defaults to 0.
+        budget (float, optional): seconds of search. Defaults to BUDGET.
+        batch (int, optional): configurations per round. Defaults to BATCH.
+        workers (int, optional): processes sharing each round, 1 scores in this process. Defaults to 1.
+        progress (callable, optional): called after each round with (share of the budget, best xG, configurations). Defaults to None.
+        seed (int, optional): random seed. Defaults to 0.
+        max_rounds (int, optional): rounds at most, 0 scores the centre of the bounds only. Defaults to None, until the budget.
+        executor (ProcessPoolExecutor, optional): long-lived pool from pool, used when workers > 1. Defaults to None,
+            a pool started for this search.
+
+    Returns:
+        dict: positions (players, 2) goalkeeper first, xG, configurations scored, rounds, seconds
+    """
+    shot = np.asarray(shot, dtype=float)
+    players = defenders + 1
+    #first round spread over the whole of the bounds
+    lower, upper = bounds(players)
+    mean, std = (lower + upper) / 2, (upper - lower) / 2
+    elite = max(2, int(batch * ELITE))
+    seeds = np.random.SeedSequence(seed)
+
+    start = time.perf_counter()
+    if max_rounds is not None and max_rounds < 1:
+        score = float(evaluate(shot, header, mean[None])[0])
+        seconds = time.perf_counter() - start
+        return {"positions": mean, "xG": score, "evaluated": 1, "rounds": 0, "seconds": seconds, "rate": 1 / seconds}
+
+    best_configs, best_scores = np.empty((0, players, 2)), np.empty(0)
+    evaluated, rounds = 0, 0
+    owned = workers > 1 and executor is None
+    if owned:
+        executor = pool(workers)
+    elif workers == 1:
+        executor = None
+    start = time.perf_counter()
+    try:
+        while rounds == 0 or (time.perf_counter() - start < budget and (max_rounds is None or rounds < max_rounds)):
+            if executor is None:
+                results = [_round(shot, header, mean, std, batch, elite, seeds.spawn(1)[0])]
+            else:
+                size = -(-batch // workers)
+                results = list(executor.map(_round, *zip(*[(shot, header, mean, std, size, elite, child)
+                                                           for child in seeds.spawn(workers)])))
+                size *= workers
+            evaluated += batch if executor is None else size
+            rounds += 1
+
+            configs = np.concatenate([best_configs] + [configs for configs, _ in results])
+            scores = np.concatenate([best_scores] + [scores for _, scores in results])
+            keep = np.argsort(scores, kind="stable")[:elite]
+            best_configs, best_scores = configs[keep], scores[keep]
+            #smoothed update keeps the search from collapsing on one round
+            mean = 0.7 * best_configs.mean(axis=0) + 0.3 * mean
+            std = np.maximum(0.7 * best_configs.std(axis=0) + 0.3 * std, MIN_STD)
+
+            if progress is not None:
+                progress(min(1., (time.perf_counter() - start) / budget), float(best_scores[0]), evaluated)
+    finally:
+        if owned:
+            executor.shutdown(cancel_futures=True)
+
+    seconds = time.perf_counter() - start
+    return {"positions": best_configs[0], "xG": float(best_scores[0]), "evaluated": evaluated,
+            "rounds": rounds, "seconds": seconds, "rate": evaluated / seconds}
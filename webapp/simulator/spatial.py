@@ -0,0 +1,132 @@
+import numpy as np
+from simulator import features
+
+#model pitch, positions outside are counted in the border cells
+PITCH = (105., 68.)
+#cell side in metres, the 3 metre radius of close_players spans a 3 x 3 block
+CELL = 3.
+
+def _expand(counts: np.ndarray) -> tuple:
+    """
+    Owner and rank of every item when owner i has counts[i] items
+
+    Returns:
+        tuple: owner index, rank inside the owner
+    """
+    owner = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    return owner, np.arange(len(owner)) - starts[owner]
+
+class PlayerIndex:
+
+    def __init__(self, players: np.ndarray, frames: np.ndarray = None, cell: float = CELL, pitch: tuple = PITCH):
+        """
+        Uniform grid over freeze frame positions, players sorted by (frame, cell)
+
+        Args:
+            players (np.ndarray): positions (M, 2), NaN rows are left out
+            frames (np.ndarray, optional): frame of each player (M,), 0 to F-1. Defaults to None, one shared frame.
+            cell (float, optional): cell side in metres. Defaults to CELL.
+            pitch (tuple, optional): pitch length and width. Defaults to PITCH.
+        """
+        players = np.asarray(players, dtype=float).reshape(-1, 2)
+        frames = np.zeros(len(players), dtype=np.int64) if frames is None else np.asarray(frames, dtype=np.int64)
+        known = np.isfinite(players).all(axis=1)
+        players, frames = players[known], frames[known]
+
+        self.cell = cell
+        self.shape = (int(np.ceil(pitch[0] / cell)), int(np.ceil(pitch[1] / cell)))
+        keys = self._keys(frames, *self._cells(players))
+        order = np.argsort(keys, kind="stable")
+        #sorted keys, the players of a run of keys are found by binary search
+        self.keys = keys[order]
+        self.players = players[order]
+
+    def _cells(self, points: np.ndarray) -> tuple:
+        """
+        Cell coordinates of points, clipped to the pitch, NaN in the first cell
+        """
+        cx = np.clip(np.nan_to_num(np.floor(points[:, 0] / self.cell)), 0, self.shape[0] - 1).astype(np.int64)
+        cy = np.clip(np.nan_to_num(np.floor(points[:, 1] / self.cell)), 0, self.shape[1] - 1).astype(np.int64)
+        return cx, cy
+
+    def _keys(self, frames: np.ndarray, cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+        return (frames * self.shape[0] + cx) * self.shape[1] + cy
+
+    def _candidates(self, frames: np.ndarray, lo: tuple, hi: tuple) -> tuple:
+        """
+        Players of the cells of a box per query, as (query, player position) pairs
+
+        Args:
+            frames (np.ndarray): frame of each query (N,)
+            lo (tuple): first cell x and y of each query
+            hi (tuple): last cell x and y of each query, included
+
+        Returns:
+            tuple: query index, player positions (K, 2)
+        """
+        #every (query, cell column) pair, a column is a run of consecutive keys
+        width = hi[0] - lo[0] + 1
+        query, dx = _expand(width)
+        first = self._keys(frames[query], lo[0][query] + dx, lo[1][query])
+        start = np.searchsorted(self.keys, first, side="left")
+        end = np.searchsorted(self.keys, first + (hi[1] - lo[1])[query], side="right")
+
+        owner, rank = _expand(end - start)
+        return query[owner], self.players[start[owner] + rank]
+
+    def _query_frames(self, points: np.ndarray, frames: np.ndarray) -> np.ndarray:
+        return np.zeros(len(points), dtype=np.int64) if frames is None else np.asarray(frames, dtype=np.int64)
+
+    def count_within(self, points: np.ndarray, radius: float = 3., frames: np.ndarray = None) -> np.ndarray:
+        """
+        Players closer than radius to each point, as close_players
+
+        Args:
+            points (np.ndarray): query positions (N, 2)
+            radius (float, optional): distance in metres. Defaults to 3.
+            frames (np.ndarray, optional): frame of each query (N,). Defaults to None, frame 0.
+
+        Returns:
+            np.ndarray: counts (N,)
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        frames = self._query_frames(points, frames)
+        reach = int(np.ceil(radius / self.cell))
+        cx, cy = self._cells(points)
+        lo = (np.maximum(cx - reach, 0), np.maximum(cy - reach, 0))
+        hi = (np.minimum(cx + reach, self.shape[0] - 1), np.minimum(cy + reach, self.shape[1] - 1))
+
+        query, candidates = self._candidates(frames, lo, hi)
+        near = ((points[query] - candidates)**2).sum(axis=1) < radius**2
+
+        return np.bincount(query[near], minlength=len(points))
+
+    def count_in_triangle(self, points: np.ndarray, frames: np.ndarray = None) -> np.ndarray:
+        """
+        Players strictly inside the triangle between each point and the posts, as triangle
+
+        Args:
+            points (np.ndarray): shooter positions (N, 2)
+            frames (np.ndarray, optional): frame of each query (N,). Defaults to None, frame 0.
+
+        Returns:
+            np.ndarray: counts (N,)
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        frames = self._query_frames(points, frames)
+        x1, y1 = features.GOAL_X, features.GOAL_Y - features.GOAL_WIDTH/2
+        x2, y2 = features.GOAL_X, features.GOAL_Y + features.GOAL_WIDTH/2
+        #bounding box of the triangle
+        box_lo = np.column_stack([np.minimum(points[:, 0], x1), np.minimum(points[:, 1], y1)])
+        box_hi = np.column_stack([np.maximum(points[:, 0], x2), np.maximum(points[:, 1], y2)])
+
+        query, candidates = self._candidates(frames, self._cells(box_lo), self._cells(box_hi))
+        xp, yp = candidates[:, 0], candidates[:, 1]
+        xs, ys = points[query, 0], points[query, 1]
+        c1 = (x2-x1)*(yp-y1)-(y2-y1)*(xp-x1)
+        c2 = (xs-x2)*(yp-y2)-(ys-y2)*(xp-x2)
+        c3 = (x1-xs)*(yp-ys)-(y1-ys)*(xp-xs)
+        inside = ((c1<0) & (c2<0) & (c3<0)) | ((c1>0) & (c2>0) & (c3>0))
+
+        return np.bincount(query[inside], minlength=len(points))
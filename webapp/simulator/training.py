@@ -0,0 +1,335 @@
+import os
+import glob
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from analysis import event_stream
+from simulator import features
+from simulator import inference
+
+logger = logging.getLogger(__name__)
+
+#local StatsBomb open-data layout, three-sixty/<match>.json next to events/
+DATA_PATH = os.environ.get("SOCCER_DATA_FIXTURES", "data/statsbomb")
+MODELS_PATH = "models"
+#StatsBomb pitch (120 x 80) to the model pitch (105 x 68)
+PITCH_SCALE = np.array([105 / 120, 68 / 80])
+#shots per feature shard on disk
+SHARD_SIZE = 1 << 16
+#match files read ahead of the shard writer per worker
+PREFETCH = 4
+#one match in VALIDATION_EVERY is held out
+VALIDATION_EVERY = 10
+
+def match_files(data_path: str = DATA_PATH, seasons: list = None) -> list:
+    """
+    Event and 360 files of every match of the seasons
+
+    Args:
+        data_path (str, optional): StatsBomb data directory. Defaults to DATA_PATH.
+        seasons (list, optional): (competition id, season id) pairs. Defaults to None, every season of the directory.
+
+    Returns:
+        list: (match id, events path, 360 path or None)
+    """
+    if seasons is None:
+        paths = sorted(glob.glob(os.path.join(data_path, "matches", "*", "*.json")))
+    else:
+        paths = [os.path.join(data_path, "matches", str(competition_id), f"{season_id}.json") for competition_id, season_id in seasons]
+
+    files = []
+    for path in paths:
+        for match in event_stream.iter_elements(path):
+            match_id = int(match["match_id"])
+            events = os.path.join(data_path, "events", f"{match_id}.json")
+            frames = os.path.join(data_path, "three-sixty", f"{match_id}.json")
+            if os.path.exists(events):
+                files.append((match_id, events, frames if os.path.exists(frames) else None))
+
+    return files
+
+def _opponents(frame: list) -> tuple:
+    """
+    Opponent positions and goalkeeper flags of a freeze frame, 360 or shot event layout
+    """
+    players = [player for player in frame if not player.get("teammate") and not player.get("actor")]
+    positions = np.array([player["location"][:2] for player in players], dtype=float).reshape(-1, 2)
+    is_gk = np.array([player.get("keeper", player.get("position", {}).get("name") == "Goalkeeper") for player in players], dtype=bool)
+
+    return positions * PITCH_SCALE, is_gk
+
+def match_features(events_path: str, frames_path: str = None) -> tuple:
+    """
+    Model variables and goal labels of the shots of a match, files streamed one element at a time.
+    360 freeze frames are used when available, the shot freeze frames of the events otherwise.
+    Penalties, shootouts and shots without a goalkeeper in the frame are left out.
+
+    Args:
+        events_path (str): StatsBomb events file
+        frames_path (str, optional): StatsBomb 360 file. Defaults to None.
+
+    Returns:
+        tuple: variables (N, 9) in features.FEATURES order, goals (N,)
+    """
+    shots = {}
+    for event in event_stream.iter_elements(events_path):
+        shot = event.get("shot")
+        if event["type"]["name"] != "Shot" or event["period"] == 5 or shot["type"]["name"] == "Penalty":
+            continue
+        shots[event["id"]] = {"location": event["location"][:2], "header": shot.get("body_part", {}).get("name") == "Head",
+                              "goal": shot["outcome"]["name"] == "Goal", "frame": shot.get("freeze_frame", [])}
+    if frames_path is not None and shots:
+        for frame in event_stream.iter_elements(frames_path):
+            if frame.get("event_uuid") in shots:
+                shots[frame["event_uuid"]]["frame"] = frame["freeze_frame"]
+    if not shots:
+        return np.empty((0, len(features.FEATURES)), dtype=np.float32), np.empty(0, dtype=np.int8)
+
+    opponents = [_opponents(shot["frame"]) for shot in shots.values()]
+    size = max(1, max(len(positions) for positions, _ in opponents))
+    players = np.full((len(shots), size, 2), np.nan)
+    is_gk = np.zeros((len(shots), size), dtype=bool)
+    for i, (positions, keepers) in enumerate(opponents):
+        players[i, :len(positions)] = positions
+        is_gk[i, :len(keepers)] = keepers
+
+    X = features.batch_features(np.array([shot["location"] for shot in shots.values()], dtype=float) * PITCH_SCALE,
+                                np.array([shot["header"] for shot in shots.values()]), players, is_gk)
+    y = np.array([shot["goal"] for shot in shots.values()], dtype=np.int8)
+    keep = np.isfinite(X).all(axis=1)
+
+    return X[keep].astype(np.float32), y[keep]
+
+class ShardWriter:
+
+    def __init__(self, path: str, shard_size: int = SHARD_SIZE):
+        """
+        Rows appended in memory up to a shard, then written as .npy files
+
+        Args:
+            path (str): shard directory
+            shard_size (int, optional): rows per shard. Defaults to SHARD_SIZE.
+        """
+        self.path = path
+        self.shard_size = shard_size
+        self.shards = []
+        self.rows = 0
+        self._X, self._y = [], []
+        self._buffered = 0
+        os.makedirs(path, exist_ok=True)
+
+    def append(self, X: np.ndarray, y: np.ndarray):
+        self._X.append(X)
+        self._y.append(y)
+        self._buffered += len(X)
+        self.rows += len(X)
+        if self._buffered >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows as one shard
+        """
+        if not self._buffered:
+            return
+        name = os.path.join(self.path, f"{len(self.shards):05d}")
+        np.save(f"{name}.X.npy", np.concatenate(self._X))
+        np.save(f"{name}.y.npy", np.concatenate(self._y))
+        self.shards.append(name)
+        self._X, self._y = [], []
+        self._buffered = 0
+
+def extract(files: list, path: str, workers: int = None, shard_size: int = SHARD_SIZE) -> tuple:
+    """
+    Features of every match computed on a process pool and written as shards,
+    a bounded number of matches in flight
+
+    Args:
+        files (list): (match id, events path, 360 path) from match_files
+        path (str): shard directory
+        workers (int, optional): processes. Defaults to None, one per core.
+        shard_size (int, optional): rows per shard. Defaults to SHARD_SIZE.
+
+    Returns:
+        tuple: training ShardWriter, validation ShardWriter
+    """
+    train = ShardWriter(os.path.join(path, "train"), shard_size)
+    validation = ShardWriter(os.path.join(path, "validation"), shard_size)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        pending = iter(files)
+        limit = PREFETCH * workers
+        for done in range(len(files)):
+            for match_id, events_path, frames_path in pending:
+                in_flight.append((match_id, executor.submit(match_features, events_path, frames_path)))
+                if len(in_flight) >= limit:
+                    break
+            match_id, future = in_flight.popleft()
+            try:
+                X, y = future.result()
+            except Exception:
+                logger.exception("match %s skipped", match_id)
+                continue
+            (validation if match_id % VALIDATION_EVERY == 0 else train).append(X, y)
+            if (done + 1) % 100 == 0:
+                logger.info("%d/%d matches, %d shots", done + 1, len(files), train.rows + validation.rows)
+    train.flush()
+    validation.flush()
+
+    return train, validation
+
+def fit_scaler(shards: list):
+    """
+    StandardScaler fitted one shard at a time
+
+    Args:
+        shards (list): shard names from ShardWriter
+
+    Returns:
+        sklearn.preprocessing.StandardScaler: fitted scaler
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    for name in shards:
+        scaler.partial_fit(np.load(f"{name}.X.npy", mmap_mode="r"))
+
+    return scaler
+
+def shard_dataset(shards: list, scaler, batch_size: int = 256, shuffle: bool = True, seed: int = 0):
+    """
+    Keras input pipeline over the shards, batches are read from memory-mapped files and scaled on the fly
+
+    Args:
+        shards (list): shard names from ShardWriter
+        scaler (StandardScaler): fitted scaler
+        batch_size (int, optional): rows per batch. Defaults to 256.
+        shuffle (bool, optional): shuffle shards and rows every epoch. Defaults to True.
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        keras.utils.PyDataset: batches of scaled variables and goals
+    """
+    import keras
+
+    class ShardDataset(keras.utils.PyDataset):
+
+        def __init__(self):
+            super().__init__()
+            self.X = [np.load(f"{name}.X.npy", mmap_mode="r") for name in shards]
+            self.y = [np.load(f"{name}.y.npy", mmap_mode="r") for name in shards]
+            #(shard, first row) of every batch, no batch spans two shards
+            self.batches = [(i, start) for i, X in enumerate(self.X) for start in range(0, len(X), batch_size)]
+            self.rng = np.random.default_rng(seed)
+            self.on_epoch_end()
+
+        def __len__(self):
+            return len(self.batches)
+
+        def __getitem__(self, index):
+            shard, start = self.order[index]
+            rows = slice(start, start + batch_size)
+            X = scaler.transform(np.asarray(self.X[shard][rows], dtype=float)).astype(np.float32)
+            return X, np.asarray(self.y[shard][rows], dtype=np.float32)
+
+        def on_epoch_end(self):
+            self.order = [self.batches[i] for i in self.rng.permutation(len(self.batches))] if shuffle else self.batches
+
+    return ShardDataset()
+
+def build_model():
+    """
+    Same layers, loss and optimizer as the shipped xG model
+
+    Returns:
+        keras.Sequential: compiled model
+    """
+    import keras
+
+    model = keras.Sequential([
+        keras.Input(shape=(len(features.FEATURES),)),
+        keras.layers.Dense(9, activation="relu"),
+        keras.layers.Dense(9, activation="relu"),
+        keras.layers.Dense(1, activation="sigmoid"),
+    ])
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=0.001), loss="mean_squared_error", metrics=["accuracy"])
+
+    return model
+
+def train(data_path: str = DATA_PATH, seasons: list = None, output_path: str = MODELS_PATH, epochs: int = 20,
+          batch_size: int = 256, workers: int = None, work_path: str = None, seed: int = 0) -> dict:
+    """
+    Retrain the xG model from StatsBomb files: features streamed to shards, scaler and model fitted on the shards,
+    then the Keras model, the scaler and the NumPy export written to output_path
+
+    Args:
+        data_path (str, optional): StatsBomb data directory. Defaults to DATA_PATH.
+        seasons (list, optional): (competition id, season id) pairs. Defaults to None, every season of the directory.
+        output_path (str, optional): model directory. Defaults to MODELS_PATH.
+        epochs (int, optional): training epochs. Defaults to 20.
+        batch_size (int, optional): rows per batch. Defaults to 256.
+        workers (int, optional): feature processes. Defaults to None, one per core.
+        work_path (str, optional): shard directory, kept when given. Defaults to None, a temporary directory.
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        dict: matches, shots, goals and final losses
+    """
+    import joblib
+    import keras
+
+    files = match_files(data_path, seasons)
+    logger.info("%d matches, %d with 360 frames", len(files), sum(frames is not None for _, _, frames in files))
+    shard_path = work_path or tempfile.mkdtemp(prefix="xg-shards-")
+    try:
+        train_shards, validation_shards = extract(files, shard_path, workers)
+        if not train_shards.rows:
+            raise ValueError(f"no shot with a goalkeeper in the freeze frame under {data_path}")
+        scaler = fit_scaler(train_shards.shards)
+
+        keras.utils.set_random_seed(seed)
+        model = build_model()
+        validation = shard_dataset(validation_shards.shards, scaler, batch_size, shuffle=False) if validation_shards.rows else None
+        history = model.fit(shard_dataset(train_shards.shards, scaler, batch_size, seed=seed), validation_data=validation,
+                            epochs=epochs, verbose=2)
+        goals = sum(int(np.load(f"{name}.y.npy", mmap_mode="r").sum()) for name in train_shards.shards + validation_shards.shards)
+
+        #written aside then swapped in, the app never loads a partial model
+        os.makedirs(output_path, exist_ok=True)
+        paths = {name: os.path.join(output_path, name) for name in ("xG_predictor.keras", "xG_scaler.pkl", "xG_predictor.npz")}
+        tmp = {name: os.path.join(shard_path, name) for name in paths}
+        model.save(tmp["xG_predictor.keras"])
+        joblib.dump(scaler, tmp["xG_scaler.pkl"])
+        inference.export(tmp["xG_predictor.keras"], tmp["xG_scaler.pkl"], tmp["xG_predictor.npz"])
+        for name, path in paths.items():
+            shutil.move(tmp[name], f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+    finally:
+        if work_path is None:
+            shutil.rmtree(shard_path, ignore_errors=True)
+
+    return {"matches": len(files), "shots": train_shards.rows + validation_shards.rows, "goals": goals,
+            "loss": history.history["loss"][-1], "val_loss": history.history.get("val_loss", [None])[-1]}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrain the xG model from StatsBomb events and 360 freeze frames")
+    parser.add_argument("--data", default=DATA_PATH, help="StatsBomb open-data directory")
+    parser.add_argument("--seasons", nargs="*", default=None, help="competition:season pairs, every season when omitted")
+    parser.add_argument("--output", default=MODELS_PATH)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--work-dir", default=None, help="keep the feature shards in this directory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    seasons = None if args.seasons is None else [tuple(int(part) for part in pair.split(":")) for pair in args.seasons]
+    summary = train(args.data, seasons, args.output, args.epochs, args.batch_size, args.workers, args.work_dir, args.seed)
+    print(json.dumps(summary, indent=1))
@@ -8,13 +8,14 @@ pitch_spec = {'pad_left': 10, 'pad_right': 10,
               'pad_bottom': PAD, 'pad_top': PAD, 'pitch_color': 'None'}
 pitch_width, pitch_length = 68, 105
 
-def display_state(shot: pd.core.frame.DataFrame, track: pd.core.frame.DataFrame):
+def display_state(shot: pd.core.frame.DataFrame, track: pd.core.frame.DataFrame, surface: tuple = None):
     """
     Position players plot
 
     Args:
         shot (pd.core.frame.DataFrame): shot informations
         track (pd.core.frame.DataFrame): opponent informations
+        surface (tuple, optional): x positions, y positions and xG of a shooter grid. Defaults to None.
 
     """
     gk = pd.DataFrame([track.iloc[0,:]])
@@ -29,6 +30,13 @@ def display_state(shot: pd.core.frame.DataFrame, track: pd.core.frame.DataFrame)
                           axis=False,
                           grid_height=0.83)
     
+    # xG of the shooter on each cell, the grid covers the attacking half of the pitch bins
+    if surface is not None:
+        xs, ys, xg = surface
+        stats = pitch.bin_statistic(xs.ravel(), ys.ravel(), values=xg.ravel(), statistic='mean',
+                                    bins=(2 * xs.shape[1], xs.shape[0]))
+        pitch.heatmap(stats, ax=axs['pitch'], cmap='Reds', alpha=0.7, zorder=0.5)
+
     # Plot the players
     sc1 = pitch.scatter(shot.x, shot.y, marker='football', s=150, label='Shooter', ax=axs['pitch'])
     sc2 = pitch.scatter(track.x, track.y, s=150, c='#5ba965', label='Defender', ax=axs['pitch'])
@@ -1,10 +1,26 @@
+import os
+import functools
 import numpy as np
 import pandas as pd
-import tensorflow as tf
-import joblib
 
-scaler = joblib.load('models/xG_scaler.pkl')
-model = tf.keras.models.load_model("models/xG_predictor.keras")
+from simulator import inference
+from simulator import features
+from analysis import timing
+
+#"numpy" runs the exported weights without TensorFlow, "keras" the original model
+BACKEND = os.environ.get("XG_BACKEND", "numpy")
+
+if BACKEND == "keras":
+    import tensorflow as tf
+    import joblib
+
+    scaler = joblib.load('models/xG_scaler.pkl')
+    model = tf.keras.models.load_model("models/xG_predictor.keras")
+else:
+    model = inference.NumpyModel()
+
+#shooter grid over the attacking half, (x bins, y bins)
+GRID_BINS = (70, 72)
 
 def dist_to_gk(shot: pd.core.frame.DataFrame, track: pd.core.frame.DataFrame) -> float:
     """
@@ -97,6 +113,7 @@ def gk_dist_to_goal(shot: pd.core.frame.DataFrame, track: pd.core.frame.DataFram
 
     return dist.iloc[0]
 
+@timing.timed("xG.get_model_vars")
 def get_model_vars(shot: pd.core.frame.DataFrame, track: pd.core.frame.DataFrame) -> pd.core.frame.DataFrame:
     """
     Variable calculation
@@ -142,7 +159,72 @@ def prediction(X: np.ndarray) -> float:
     Returns:
         float: xG
     """
-    X_predict = scaler.transform(X)
-    prediction = model.predict(np.array(X_predict))
+    return float(predictions(X)[0])
+
+def predictions(X: np.ndarray) -> np.ndarray:
+    """
+    xG prediction for every row
+
+    Args:
+        X (np.ndarray): Variables (N, 9)
+
+    Returns:
+        np.ndarray: xG (N,)
+    """
+    with timing.stage("xG.predictions", rows=len(X), backend=BACKEND):
+        if BACKEND == "keras":
+            X_predict = scaler.transform(X)
+            prediction = model.predict(np.array(X_predict), verbose=0)
+        else:
+            prediction = model.predict(X)
+
+    return prediction[:, 0].astype(float)
+
+def grid_positions(bins: tuple = GRID_BINS) -> tuple:
+    """
+    Cell centers of a grid over the attacking half
+
+    Args:
+        bins (tuple, optional): number of cells on x and y. Defaults to GRID_BINS.
+
+    Returns:
+        tuple: x positions, y positions, both (y bins, x bins)
+    """
+    x = 52.5 + (np.arange(bins[0]) + 0.5) * 52.5 / bins[0]
+    y = (np.arange(bins[1]) + 0.5) * 68 / bins[1]
+
+    return np.meshgrid(x, y)
+
+@functools.lru_cache(maxsize=64)
+def _surface(defence: tuple, header: int, bins: tuple) -> np.ndarray:
+    """
+    xG of every grid cell for one defensive configuration, in a single batch
+    """
+    players = np.array([(x, y) for x, y, _ in defence], dtype=float).reshape(-1, 2)
+    is_gk = np.array([position == "Goalkeeper" for _, _, position in defence], dtype=bool)
+    xs, ys = grid_positions(bins)
+
+    X = features.batch_features(np.column_stack([xs.ravel(), ys.ravel()]),
+                                np.full(xs.size, header), players, is_gk)
+    surface = predictions(X).reshape(xs.shape)
+    surface.setflags(write=False)
+
+    return surface
+
+@timing.timed("xG.xG_surface")
+def xG_surface(track: pd.core.frame.DataFrame, body_part: str = "Foot", bins: tuple = GRID_BINS) -> tuple:
+    """
+    xG for a shooter on each cell of the attacking half, defence held fixed
+
+    Args:
+        track (pd.core.frame.DataFrame): opponent informations
+        body_part (str, optional): body part of the shot. Defaults to "Foot".
+        bins (tuple, optional): number of cells on x and y. Defaults to GRID_BINS.
+
+    Returns:
+        tuple: x positions, y positions, xG, all (y bins, x bins)
+    """
+    defence = tuple(track[["x", "y", "position_name"]].itertuples(index=False, name=None))
+    xs, ys = grid_positions(bins)
 
-    return float(prediction[0][0])
\ No newline at end of file
+    return xs, ys, _surface(defence, int(body_part == "Head"), tuple(bins))